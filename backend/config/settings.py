@@ -77,13 +77,122 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 #? <|--------------Database Configuration--------------|>
 
-DATABASES = {
+# DATABASE_ENGINE selects the backend: 'sqlite' (default, also used for CI) or 'postgresql'
+DB_ENGINE = os.getenv('DATABASE_ENGINE', 'sqlite').lower()
+
+if DB_ENGINE in ('postgresql', 'postgres'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DATABASE_NAME', 'agah_solutions'),
+            'USER': os.getenv('DATABASE_USER', 'postgres'),
+            'PASSWORD': os.getenv('DATABASE_PASSWORD', ''),
+            'HOST': os.getenv('DATABASE_HOST', 'localhost'),
+            'PORT': os.getenv('DATABASE_PORT', '5432'),
+            # Check reused connections before each request instead of failing on a dropped one
+            'CONN_HEALTH_CHECKS': os.getenv('DATABASE_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DATABASE_CONNECT_TIMEOUT', '10')),
+            },
+        }
+    }
+    
+    # Connection pooling (psycopg 3 + psycopg-pool) shares connections between requests of a worker;
+    # Django does not allow it together with persistent connections, so CONN_MAX_AGE stays 0
+    if os.getenv('DATABASE_POOL', 'False').lower() == 'true':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.getenv('DATABASE_POOL_TIMEOUT', '10')),
+        }
+    else:
+        # Persistent connections: reuse one connection per worker for DATABASE_CONN_MAX_AGE seconds
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DATABASE_CONN_MAX_AGE', '60'))
+
+    if os.getenv('DATABASE_SSLMODE'):
+        DATABASES['default']['OPTIONS']['sslmode'] = os.getenv('DATABASE_SSLMODE')
+
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# SQLite tuning profile (SQLITE_TUNING=False restores the driver defaults)
+# WAL lets readers run alongside the single writer, IMMEDIATE transactions take the
+# write lock up front so busy_timeout can wait for it instead of failing with "database is locked"
+if DB_ENGINE == 'sqlite' and os.getenv('SQLITE_TUNING', 'True').lower() == 'true':
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '20'))  # seconds
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': os.getenv('SQLITE_CACHE_SIZE', '-64000'),  # negative = KiB, ~64 MB
+        'mmap_size': os.getenv('SQLITE_MMAP_SIZE', '134217728'),  # 128 MB
+        'busy_timeout': SQLITE_BUSY_TIMEOUT * 1000,
+        'temp_store': 'MEMORY',
+    }
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': SQLITE_BUSY_TIMEOUT,
+        'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        #* Runs on every new connection
+        'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    }
+
+# Optional on-disk test database (e.g. SQLITE_TEST_NAME=test_db.sqlite3) so the
+# concurrency tests run against real file locking instead of shared in-memory cache
+if DB_ENGINE == 'sqlite' and os.getenv('SQLITE_TEST_NAME'):
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / os.getenv('SQLITE_TEST_NAME')}
+
+# Optional read replica for the public read endpoints (services.db_router)
+# PostgreSQL: DATABASE_REPLICA_HOST (+ _PORT/_NAME/_USER/_PASSWORD), SQLite: SQLITE_REPLICA_PATH
+if DB_ENGINE in ('postgresql', 'postgres') and os.getenv('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DATABASE_REPLICA_HOST'),
+        'PORT': os.getenv('DATABASE_REPLICA_PORT', DATABASES['default']['PORT']),
+        'NAME': os.getenv('DATABASE_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.getenv('DATABASE_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DATABASE_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+    }
+elif DB_ENGINE == 'sqlite' and os.getenv('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('SQLITE_REPLICA_PATH'),
+    }
+
+if 'replica' in DATABASES:
+    # Tests read the replica through the default test database
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+REPLICA_DATABASE_ALIAS = 'replica' if 'replica' in DATABASES else None
+DATABASE_ROUTERS = ['services.db_router.ReplicaRouter']
+
+# After creating/confirming an order the client reads from the primary for this many seconds
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '15'))
+REPLICA_STICKY_COOKIE = 'agah_read_primary'
+
+#? <|--------------Cache Configuration--------------|>
+
+# Local-memory cache by default; point CACHE_BACKEND/CACHE_LOCATION at a shared cache
+# (e.g. django.core.cache.backends.redis.RedisCache) when running several workers
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'agah-default'),
     }
 }
 
+# Cache alias and timeout (seconds) for the public catalog payloads and their version.
+# "none" disables expiry, which only takes effect on a shared cache: invalidations made by
+# one worker never reach the local-memory cache of the others, so that cache keeps 60s
+CATALOG_CACHE_ALIAS = os.getenv('CATALOG_CACHE_ALIAS', 'default')
+CATALOG_CACHE_TIMEOUT = os.getenv('CATALOG_CACHE_TIMEOUT', '60')
+CATALOG_CACHE_TIMEOUT = None if CATALOG_CACHE_TIMEOUT.lower() == 'none' else int(CATALOG_CACHE_TIMEOUT)
+
 #? <|--------------Custom User Model--------------|>
 
 AUTH_USER_MODEL = 'user_auth.User'
@@ -121,10 +230,15 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 26214400  # 25MB
+# Multipart files above this size are spooled to a temp file instead of worker memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', '2621440'))  # 2.5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 26214400  # 25MB
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# Chunked design uploads (/api/uploads/): part files live outside MEDIA_ROOT until complete
+DESIGN_UPLOAD_TEMP_DIR = os.getenv('DESIGN_UPLOAD_TEMP_DIR', os.path.join(BASE_DIR, 'tmp', 'design_uploads'))
+DESIGN_UPLOAD_CHUNK_SIZE = int(os.getenv('DESIGN_UPLOAD_CHUNK_SIZE', '1048576'))  # 1MB suggested to clients
+
 # Ensure media directory exists
 import os
 if not os.path.exists(MEDIA_ROOT):
@@ -173,8 +287,14 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-primary-until',
+    'upload-offset',
+    'upload-checksum',
 ]
 
+# Response headers React can read (read-your-writes window, resumable upload progress)
+CORS_EXPOSE_HEADERS = ['X-Primary-Until', 'Upload-Offset', 'Upload-Length']
+
 # HTTP methods React can use
 CORS_ALLOW_METHODS = [
     'DELETE',
@@ -204,6 +324,10 @@ CONTACT_EMAIL = os.getenv('CONTACT_EMAIL', 'info@agahsolutions.com')
 # Email timeout
 EMAIL_TIMEOUT = 30
 
+# Email outbox - emails are queued in the database and delivered by `manage.py send_queued_emails`
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_BASE_SECONDS', '60'))
+
 #? <|--------------Frontend Integration Configuration--------------|>
 
 # Frontend URL for email links and redirects
@@ -3,7 +3,13 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import TypeService, CompanyConfiguration, Order, OrderItem
+from django.utils import timezone
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from .models import TypeService, CompanyConfiguration, Order, OrderItem, EmailOutbox, DesignUpload, DesignBlob, ZERO_PRICE, get_item_total_expression
+from .catalog_cache import invalidate_catalog
+from .exports import stream_orders_csv, export_orders_xlsx
 
 #? <|--------------Helper Functions for Base Services--------------|>
 
@@ -161,12 +167,14 @@ class TypeServiceAdmin(admin.ModelAdmin):
     actions = ['mark_as_featured', 'mark_as_not_featured']
     
     def mark_as_featured(self, request, queryset):
-        updated = queryset.update(is_featured=True)
+        updated = queryset.update(is_featured=True, updated_at=timezone.now())
+        transaction.on_commit(invalidate_catalog)  #* queryset.update() skips post_save signals
         self.message_user(request, f'{updated} services marked as featured.')
     mark_as_featured.short_description = 'Mark as featured services'
     
     def mark_as_not_featured(self, request, queryset):
-        updated = queryset.update(is_featured=False)
+        updated = queryset.update(is_featured=False, updated_at=timezone.now())
+        transaction.on_commit(invalidate_catalog)  #* queryset.update() skips post_save signals
         self.message_user(request, f'{updated} services removed from featured.')
     mark_as_not_featured.short_description = 'Remove from featured'
     
@@ -223,6 +231,25 @@ class CompanyConfigurationAdmin(admin.ModelAdmin):
         return False
 
 
+#? <|--------------Design Preview Helpers--------------|>
+
+def design_preview_html(item, size=120):
+    """Thumbnail rendered in the background, or the preview status while it is not ready"""
+    blob = item.design_blob if item.design_blob_id else None
+    if blob is None:
+        return "No preview" if item.design_file else "No file"
+    if blob.preview_status != 'ready':
+        return blob.get_preview_status_display()
+    
+    metadata = ', '.join(f'{key}: {value}' for key, value in blob.preview_metadata.items())
+    if not blob.preview:
+        return metadata or "No preview"
+    return format_html(
+        '<a href="{}" target="_blank"><img src="{}" style="max-width: {}px; max-height: {}px; border: 1px solid #ddd;" /></a><br><small>{}</small>',
+        item.design_file.url, blob.preview.url, size, size, metadata
+    )
+
+
 #? <|--------------Order Item Inline Configuration--------------|>
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -236,9 +263,17 @@ class OrderItemInline(admin.TabularInline):
         'needs_custom_design',
         'custom_design_price',
         'estimated_unit_price', 
-        'final_unit_price'
+        'final_unit_price',
+        'design_preview_display'
     ]
-    readonly_fields = ['estimated_unit_price', 'final_unit_price']
+    readonly_fields = ['estimated_unit_price', 'final_unit_price', 'design_preview_display']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('design_blob')
+    
+    def design_preview_display(self, obj):
+        return design_preview_html(obj, size=60)
+    design_preview_display.short_description = 'Design'
 
 
 #? <|--------------Order Admin Configuration--------------|>
@@ -293,6 +328,20 @@ class OrderAdmin(admin.ModelAdmin):
     #* Inline editing for order items
     inlines = [OrderItemInline]
     
+    #* Custom actions
+    actions = ['export_as_csv', 'export_as_xlsx']
+    
+    #* Item totals are summed in the changelist query instead of once per row
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            items_estimated_total=Coalesce(
+                Sum(get_item_total_expression('estimated_unit_price', prefix='items__')), ZERO_PRICE
+            ),
+            items_final_total=Coalesce(
+                Sum(get_item_total_expression('final_unit_price', prefix='items__')), ZERO_PRICE
+            ),
+        )
+    
     #* Custom methods for display
     def order_status_display(self, obj):
         colors = {
@@ -312,31 +361,37 @@ class OrderAdmin(admin.ModelAdmin):
     order_status_display.short_description = 'Status'
     
     def estimated_total_display(self, obj):
-        total = obj.get_estimated_total_price()
+        total = obj.items_estimated_total
         if total > 0:
             return f"${total:,.2f} MXN"
         return "-"
     estimated_total_display.short_description = 'Estimated Total'
+    estimated_total_display.admin_order_field = 'items_estimated_total'
     
     def final_total_display(self, obj):
-        total = obj.get_final_total_price()
+        total = obj.items_final_total
         if total > 0:
             return f"${total:,.2f} MXN"
         return "-"
     final_total_display.short_description = 'Final Total'
+    final_total_display.admin_order_field = 'items_final_total'
+    
+    #* Exports stream straight from the database (no annotations, no model instances)
+    def export_as_csv(self, request, queryset):
+        return stream_orders_csv(Order.objects.filter(pk__in=queryset.values('pk')))
+    export_as_csv.short_description = "Export selected orders with items (CSV)"
+    
+    def export_as_xlsx(self, request, queryset):
+        return export_orders_xlsx(Order.objects.filter(pk__in=queryset.values('pk')))
+    export_as_xlsx.short_description = "Export selected orders with items (XLSX)"
     
     def save_model(self, request, obj, form, change):
         if not obj.order_number:
             import uuid
             obj.order_number = str(uuid.uuid4())[:8].upper()
         
-        # Auto-calculate totals
+        #* Totals are kept up to date by the inline item saves/deletes (OrderItem.update_order_totals)
         super().save_model(request, obj, form, change)
-        
-        # Update estimated and final prices
-        obj.estimaded_price = obj.get_estimated_total_price()
-        obj.final_price = obj.get_final_total_price()
-        obj.save(update_fields=['estimaded_price', 'final_price'])
 
 
 #? <|--------------Order Item Admin Configuration--------------|>
@@ -352,9 +407,13 @@ class OrderItemAdmin(admin.ModelAdmin):
         'dimensions_display',
         'needs_custom_design',
         'estimated_unit_price', 
-        'final_unit_price'
+        'final_unit_price',
+        'design_preview_display'
     ]
     
+    #* order_number_display, service and the design thumbnail are read for every row
+    list_select_related = ['order', 'service', 'design_blob']
+    
     #* Filters for the right sidebar
     list_filter = [
         'service',
@@ -380,7 +439,8 @@ class OrderItemAdmin(admin.ModelAdmin):
         'final_total_display',
         'plasma_formula_display',
         'laser_formula_display', 
-        'printing_formula_display'
+        'printing_formula_display',
+        'design_preview_display'
     ]
     
     def item_display(self, obj):
@@ -391,6 +451,10 @@ class OrderItemAdmin(admin.ModelAdmin):
         return obj.order.order_number
     order_number_display.short_description = 'Order'
     
+    def design_preview_display(self, obj):
+        return design_preview_html(obj)
+    design_preview_display.short_description = 'Design'
+    
     #* Organization of fields in the detail form
     def get_fieldsets(self, request, obj=None):
         if obj and obj.service:
@@ -473,8 +537,7 @@ class OrderItemAdmin(admin.ModelAdmin):
             
             fieldsets.append(
                 ('Files', {
-                    'fields': ('design_file',),
-                    'classes': ('collapse',)
+                    'fields': ('design_file', 'design_preview_display')
                 })
             )
             
@@ -575,4 +638,116 @@ G = Consumibles
         res = super().response_change(request, obj)
         if "_continue" not in request.POST and "_addanother" not in request.POST:
             return res
-        return res
\ No newline at end of file
+        return res
+
+
+#? <|--------------Email Outbox Admin Configuration--------------|>
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    
+    #* Fields to display in the list view
+    list_display = [
+        'subject',
+        'recipients',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at'
+    ]
+    
+    #* Filters for the right sidebar
+    list_filter = ['status']
+    
+    #* Searchable fields
+    search_fields = ['subject', 'recipients']
+    
+    #* Queued emails are written by the application, not edited by hand
+    readonly_fields = [
+        'subject',
+        'body',
+        'html_body',
+        'from_email',
+        'recipients',
+        'attempts',
+        'last_error',
+        'created_at',
+        'sent_at'
+    ]
+    
+    #* Actions for bulk operations
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} emails scheduled for immediate retry.')
+    retry_now.short_description = 'Retry delivery now'
+
+
+#? <|--------------Design Upload Admin Configuration--------------|>
+@admin.register(DesignUpload)
+class DesignUploadAdmin(admin.ModelAdmin):
+    
+    #* Fields to display in the list view
+    list_display = [
+        'filename',
+        'status',
+        'size',
+        'offset',
+        'created_at',
+        'attached_at'
+    ]
+    
+    #* Filters for the right sidebar
+    list_filter = ['status']
+    
+    #* Searchable fields
+    search_fields = ['filename']
+    
+    #* Uploads are written by the upload endpoints, not edited by hand
+    readonly_fields = [
+        'filename',
+        'size',
+        'offset',
+        'status',
+        'sha256',
+        'file',
+        'created_at',
+        'updated_at',
+        'attached_at'
+    ]
+
+
+#? <|--------------Design Blob Admin Configuration--------------|>
+@admin.register(DesignBlob)
+class DesignBlobAdmin(admin.ModelAdmin):
+    
+    #* Fields to display in the list view
+    list_display = [
+        'digest',
+        'file',
+        'ref_count',
+        'preview_status',
+        'created_at',
+        'updated_at'
+    ]
+    
+    #* Filters for the right sidebar
+    list_filter = ['preview_status']
+    
+    #* Searchable fields
+    search_fields = ['digest', 'file']
+    
+    #* Blobs are managed by storage and reference counting, not edited by hand
+    readonly_fields = [
+        'digest',
+        'file',
+        'ref_count',
+        'preview_status',
+        'preview',
+        'preview_metadata',
+        'vector_analysis',
+        'mesh_analysis',
+        'preview_error',
+        'created_at',
+        'updated_at'
+    ]
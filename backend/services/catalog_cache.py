@@ -0,0 +1,113 @@
+#? Catalog cache layer for the public endpoints of the services app
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .db_router import use_primary
+
+
+#* Key holding the current catalog version: the time (ms) of the last catalog change
+CATALOG_VERSION_KEY = 'catalog:version'
+
+#* Expiry (seconds) forced on a per-process cache, where an invalidation only reaches one worker
+LOCAL_CACHE_TIMEOUT = 60
+
+
+#? <|--------------Cache Helpers--------------|>
+
+def get_catalog_cache():
+    """Cache backend used for catalog payloads (configured by CATALOG_CACHE_ALIAS)"""
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_timeout():
+    """
+    CATALOG_CACHE_TIMEOUT; no expiry is only honoured on a shared cache, a local-memory
+    cache expires after LOCAL_CACHE_TIMEOUT so other workers pick up changes
+    """
+    timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', LOCAL_CACHE_TIMEOUT)
+    if timeout is None and isinstance(get_catalog_cache(), LocMemCache):
+        return LOCAL_CACHE_TIMEOUT
+    return timeout
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    """
+    Current catalog version, initialised on first use
+    A cold cache starts from the current time, later than any version handed out before,
+    so ETags / Last-Modified issued earlier never validate against it. Row timestamps
+    can't be used: queryset updates, deletes and order stats don't move them
+    """
+    cache = get_catalog_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        #* add() keeps the first value when several workers start at once
+        cache.add(CATALOG_VERSION_KEY, _now_ms(), timeout=get_catalog_timeout())
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def catalog_cache_key(name, *parts):
+    """Build a versioned key so one version bump invalidates every payload at once"""
+    key_parts = [str(part) for part in parts]
+    return ':'.join(['catalog', str(get_catalog_version()), name] + key_parts)
+
+
+def get_cached_payload(name, builder, *parts):
+    """
+    Return the cached payload for `name` (and optional key parts), building it on a miss
+    builder() must return a JSON-serializable payload
+    """
+    cache = get_catalog_cache()
+    key = catalog_cache_key(name, *parts)
+    payload = cache.get(key)
+    if payload is None:
+        #* Misses follow an invalidation, a lagging replica would pin stale data under the new version
+        with use_primary():
+            payload = builder()
+        cache.set(key, payload, timeout=get_catalog_timeout())
+    return payload
+
+
+def invalidate_catalog():
+    """Drop every cached catalog payload by moving to a new, later version"""
+    cache = get_catalog_cache()
+    version = cache.get(CATALOG_VERSION_KEY) or 0
+    #* Last-Modified has second precision, the new version must land in a later second
+    cache.set(CATALOG_VERSION_KEY, max(_now_ms(), (version // 1000 + 1) * 1000), timeout=get_catalog_timeout())
+
+
+#? <|--------------Conditional GET Support--------------|>
+
+def add_catalog_validators(response, name, *parts):
+    """Attach ETag / Last-Modified from the catalog version and force revalidation"""
+    version = get_catalog_version()
+    tag = '-'.join([name] + [str(part) for part in parts] + [str(version)])
+    response['ETag'] = f'"{tag}"'
+    response['Last-Modified'] = http_date(version // 1000)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def get_not_modified_response(request, name, *parts):
+    """
+    Return a 304 response when the client's ETag / Last-Modified is still current, else None
+    Runs before any payload is built or serialized
+    """
+    validators = add_catalog_validators(HttpResponse(), name, *parts)
+    response = get_conditional_response(
+        request,
+        etag=validators['ETag'],
+        last_modified=get_catalog_version() // 1000,
+        response=validators,
+    )
+    if response is not validators:
+        return response
+    return None
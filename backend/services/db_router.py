@@ -0,0 +1,110 @@
+#? Read-replica routing for the public read endpoints of the services app
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+#* Alias reads should go to for the current request (None = primary)
+_read_alias = ContextVar('services_read_alias', default=None)
+
+
+def get_replica_alias():
+    """Configured replica alias, or None when no replica is set up"""
+    return getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+
+
+@contextmanager
+def use_database_for_reads(alias):
+    """Send ORM reads inside the block to `alias` (None = primary)"""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary():
+    """Force reads inside the block to the primary database"""
+    return use_database_for_reads(None)
+
+
+#? <|--------------Database Router--------------|>
+class ReplicaRouter:
+    """
+    Sends reads to the replica only while a replica-enabled view is running
+    Writes always go to the primary, even for objects that were read from the replica
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        #* The replica receives its schema through replication
+        if db == get_replica_alias():
+            return False
+        return None
+
+
+#? <|--------------Read-Your-Writes Stickiness--------------|>
+
+#* Cross-origin clients echo this header back; same-origin ones get the cookie
+PRIMARY_UNTIL_HEADER = 'X-Primary-Until'
+
+
+def stick_to_primary(response):
+    """
+    Pin the client to the primary for a few seconds after it wrote something,
+    so it reads its own order back even if the replica is lagging
+    """
+    if get_replica_alias() is None:
+        return response
+    seconds = settings.REPLICA_STICKY_SECONDS
+    primary_until = str(int(time.time()) + seconds)
+    response[PRIMARY_UNTIL_HEADER] = primary_until
+    response.set_cookie(
+        settings.REPLICA_STICKY_COOKIE,
+        primary_until,
+        max_age=seconds,
+        httponly=True,
+        samesite='Lax',
+    )
+    return response
+
+
+def is_pinned_to_primary(request):
+    value = request.headers.get(PRIMARY_UNTIL_HEADER) or request.COOKIES.get(settings.REPLICA_STICKY_COOKIE)
+    try:
+        #* Never honour a window longer than the configured one
+        remaining = int(value) - time.time() if value is not None else 0
+        return 0 < remaining <= settings.REPLICA_STICKY_SECONDS
+    except ValueError:
+        return False
+
+
+class ReplicaReadMixin:
+    """
+    APIView mixin that serves the view's reads from the replica
+    Only methods listed in replica_methods are routed; recent writers stay on the primary
+    """
+
+    replica_methods = ('GET', 'HEAD')
+
+    def get_read_alias(self, request):
+        if request.method not in self.replica_methods or is_pinned_to_primary(request):
+            return None
+        return get_replica_alias()
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_database_for_reads(self.get_read_alias(request)):
+            return super().dispatch(request, *args, **kwargs)
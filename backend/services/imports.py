@@ -0,0 +1,370 @@
+#? Bulk order import (CSV / JSON) for the services app
+import csv
+import io
+import json
+import uuid
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from .models import Order, OrderItem, TypeService
+
+
+#* Order columns, rows sharing the same order_ref (or customer email) make up one order
+IMPORT_ORDER_FIELDS = ['customer_name', 'customer_email', 'customer_phone', 'additional_notes']
+
+#* Item columns accepted from the file (prices are always calculated, never imported)
+IMPORT_ITEM_FIELDS = [
+    'quantity',
+    'description',
+    'length_dimensions',
+    'width_dimensions',
+    'height_dimensions',
+    'needs_custom_design',
+    'custom_design_price',
+    'plasma_design_programming_time',
+    'plasma_cutting_time',
+    'plasma_post_process_time',
+    'plasma_material_cost',
+    'plasma_consumables',
+    'laser_design_programming_time',
+    'laser_cutting_time',
+    'laser_post_process_time',
+    'laser_material_cost',
+    'laser_consumables',
+    'printing_design_programming_time',
+    'printing_time',
+    'printing_material_used',
+    'printing_post_process_time',
+    'printing_material_cost',
+    'printing_consumables',
+]
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'si', 'sí'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', ''}
+
+#* Maximum number of row errors kept in the report
+MAX_REPORTED_ERRORS = 500
+
+#* Characters read from a JSON file at a time; only one order is decoded at once
+JSON_READ_SIZE = 64 * 1024
+
+#* Key a reader sets on a record it could not read, reported as that row's error
+INVALID_RECORD = '__invalid__'
+
+
+class ImportReadError(ValueError):
+    """The file could not be read to the end; report has what the chunks before the error imported"""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def as_text(value):
+    """Stripped text of a scalar from CSV or JSON (numbers are converted, None is empty)"""
+    return '' if value is None else str(value).strip()
+
+
+#? <|--------------Record Readers--------------|>
+
+def iter_csv_records(file):
+    """Yield (row number, record) from a CSV file object (bytes or text), one item per row"""
+    if isinstance(file.read(0), bytes):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    #* Row 1 is the header
+    for row_number, record in enumerate(csv.DictReader(file), start=2):
+        yield row_number, record
+
+
+def iter_json_array(file):
+    """
+    Yield the elements of a top-level JSON array one at a time
+    The file is read in JSON_READ_SIZE blocks, memory is bounded by the largest element
+    """
+    if isinstance(file.read(0), bytes):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig')
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+
+    def next_char():
+        """First non-whitespace character at `position`, reading more when needed ('' at the end)"""
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                return buffer[position:position + 1]
+            buffer, position = file.read(JSON_READ_SIZE), 0
+            eof = not buffer
+
+    if next_char() != '[':
+        raise ValueError('JSON imports must be a list of orders')
+    position += 1
+    if next_char() == ']':
+        return
+
+    while True:
+        next_char()
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as e:
+            value, end = None, None
+            if eof:
+                raise ValueError(f'Invalid JSON: {e}')
+        #* A value that reaches the end of the buffer may continue (e.g. a number), read more first
+        if end is None or (end == len(buffer) and not eof):
+            block = file.read(JSON_READ_SIZE)
+            buffer, position, eof = buffer[position:] + block, 0, not block
+            continue
+
+        yield value
+        buffer, position = buffer[end:], 0
+        separator = next_char()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError('Invalid JSON: expected "," or "]" between orders')
+        position += 1
+
+
+def iter_json_records(file):
+    """
+    Yield (row number, record) from a JSON array of orders, each with an "items" list
+    Every item becomes one flat record; row numbers count items across the file
+    Orders are decoded one at a time, so the whole file is never loaded
+    """
+    row_number = 0
+    for order_index, order in enumerate(iter_json_array(file)):
+        order_ref = f'order-{order_index + 1}'
+        if not isinstance(order, dict):
+            row_number += 1
+            yield row_number, {'order_ref': order_ref, INVALID_RECORD: 'Order must be a JSON object'}
+            continue
+
+        order_fields = {key: value for key, value in order.items() if key != 'items'}
+        order_fields.setdefault('order_ref', order_ref)
+        items = order.get('items') or [{}]
+        if not isinstance(items, list):
+            items = [None]
+        for item in items:
+            row_number += 1
+            if not isinstance(item, dict):
+                yield row_number, {**order_fields, INVALID_RECORD: 'Items must be a list of JSON objects'}
+                continue
+            yield row_number, {**order_fields, **item}
+
+
+RECORD_READERS = {
+    'csv': iter_csv_records,
+    'json': iter_json_records,
+}
+
+
+#? <|--------------Importer--------------|>
+class OrderImporter:
+    """
+    Streams records once: each row is validated as it is read, complete orders are
+    buffered and written with bulk_create once the buffer holds chunk_size items.
+    Rows of one order must be contiguous; an order with any invalid row is skipped.
+    """
+
+    def __init__(self, chunk_size=2000, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.services = self.load_services()
+        self.used_order_numbers = set()
+
+        self.pending_orders = []
+        self.pending_item_count = 0
+        self.orders_created = 0
+        self.items_created = 0
+        self.orders_skipped = 0
+        self.last_imported_row = 0
+        self.error_count = 0
+        self.errors = []
+
+    #* Services are few, load them once and resolve by id, type or name
+    def load_services(self):
+        services = {}
+        for service in TypeService.objects.filter(active=True):
+            services[str(service.pk)] = service
+            services[service.type.lower()] = service
+            services[service.name.lower()] = service
+        return services
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    #* Row validation
+    def clean_order_fields(self, record):
+        order_data = {}
+        for name in IMPORT_ORDER_FIELDS:
+            value = as_text(record.get(name))
+            field = Order._meta.get_field(name)
+            if not value and not field.blank:
+                raise ValueError(f'{name} is required')
+            if field.max_length and len(value) > field.max_length:
+                raise ValueError(f'{name} is longer than {field.max_length} characters')
+            order_data[name] = value
+        try:
+            validate_email(order_data['customer_email'])
+        except ValidationError:
+            raise ValueError('customer_email is not a valid email')
+        return order_data
+
+    def clean_item_fields(self, record):
+        service_key = as_text(record.get('service')).lower()
+        service = self.services.get(service_key)
+        if service is None:
+            raise ValueError(f'Unknown service "{record.get("service")}"')
+
+        item_data = {'service': service}
+        for name in IMPORT_ITEM_FIELDS:
+            value = record.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == '':
+                #* Missing values keep the model default
+                continue
+
+            field = OrderItem._meta.get_field(name)
+            if name == 'needs_custom_design' and isinstance(value, str):
+                if value.lower() not in TRUE_VALUES | FALSE_VALUES:
+                    raise ValueError(f'{name} must be true or false')
+                value = value.lower() in TRUE_VALUES
+            try:
+                item_data[name] = field.clean(value, None)
+            except ValidationError as e:
+                raise ValueError(f'{name}: {" ".join(e.messages)}')
+
+        if item_data.get('quantity') == 0:
+            raise ValueError('quantity must be at least 1')
+        return item_data
+
+    #* Main method - returns the import report
+    def run(self, records):
+        current_key = None
+        current_order = None
+
+        for row_number, record in records:
+            if not isinstance(record, dict):
+                record = {INVALID_RECORD: 'Record must be an object'}
+            key = as_text(record.get('order_ref') or record.get('customer_email')).lower()
+            if key != current_key or current_order is None:
+                self.finish_order(current_order)
+                current_key = key
+                current_order = {'data': None, 'items': [], 'valid': True}
+
+            current_order['last_row'] = row_number
+            try:
+                if INVALID_RECORD in record:
+                    raise ValueError(record[INVALID_RECORD])
+                if current_order['data'] is None:
+                    current_order['data'] = self.clean_order_fields(record)
+                current_order['items'].append(self.clean_item_fields(record))
+            except (ValueError, TypeError) as e:
+                current_order['valid'] = False
+                self.add_error(row_number, str(e))
+
+        self.finish_order(current_order)
+        self.flush()
+        return self.get_report()
+
+    def finish_order(self, order):
+        if order is None:
+            return
+        if not order['valid'] or not order['items']:
+            self.orders_skipped += 1
+            return
+
+        self.pending_orders.append(order)
+        self.pending_item_count += len(order['items'])
+        if self.pending_item_count >= self.chunk_size:
+            self.flush()
+
+    #* Write one chunk of complete orders in a single transaction
+    def flush(self):
+        if not self.pending_orders:
+            return
+        chunk, self.pending_orders, self.pending_item_count = self.pending_orders, [], 0
+
+        orders, items = [], []
+        for order_info in chunk:
+            order = Order(order_number=self.new_order_number(), **order_info['data'])
+            order_items = [OrderItem(order=order, **item_data) for item_data in order_info['items']]
+            orders.append(order)
+            items.extend(order_items)
+
+        #* Prices for the whole chunk in one vectorized pass, totals summed in memory
+        OrderItem.calculate_prices_in_batch(items)
+        totals = {}
+        for item in items:
+            estimated, final = item.get_totals_contribution()
+            order_totals = totals.setdefault(id(item.order), [Decimal('0.00'), Decimal('0.00')])
+            order_totals[0] += estimated
+            order_totals[1] += final
+        for order in orders:
+            order.estimaded_price, order.final_price = totals[id(order)]
+
+        if not self.dry_run:
+            self.avoid_existing_order_numbers(orders)
+            with transaction.atomic():
+                Order.objects.bulk_create(orders, batch_size=500)
+                OrderItem.objects.bulk_create(items, batch_size=500)
+
+        self.orders_created += len(orders)
+        self.items_created += len(items)
+        self.last_imported_row = chunk[-1]['last_row']
+
+    def new_order_number(self):
+        while True:
+            order_number = str(uuid.uuid4())[:8].upper()
+            if order_number not in self.used_order_numbers:
+                self.used_order_numbers.add(order_number)
+                return order_number
+
+    def avoid_existing_order_numbers(self, orders):
+        """Regenerate the (rare) numbers that already exist, one query per chunk"""
+        existing = set(Order.objects.filter(
+            order_number__in=[order.order_number for order in orders]
+        ).values_list('order_number', flat=True))
+        for order in orders:
+            if order.order_number in existing:
+                order.order_number = self.new_order_number()
+
+    def get_report(self):
+        return {
+            'dry_run': self.dry_run,
+            'orders_created': self.orders_created,
+            'items_created': self.items_created,
+            'orders_skipped': self.orders_skipped,
+            'last_imported_row': self.last_imported_row,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def import_orders(file, file_format, chunk_size=2000, dry_run=False):
+    """
+    Import orders from an open CSV/JSON file object and return the report
+    Raises ImportReadError when the file turns out unreadable part way; chunks written
+    before that stay committed, so the error says how far the import got
+    """
+    reader = RECORD_READERS.get(file_format)
+    if reader is None:
+        raise ValueError(f'Unsupported format. Allowed: {", ".join(RECORD_READERS)}')
+    importer = OrderImporter(chunk_size=chunk_size, dry_run=dry_run)
+    try:
+        return importer.run(reader(file))
+    except (csv.Error, ValueError) as e:
+        message = f'Invalid CSV: {e}' if isinstance(e, csv.Error) else str(e)
+        report = importer.get_report()
+        if report['orders_created'] and not dry_run:
+            message += (
+                f" ({report['orders_created']} orders up to row {report['last_imported_row']} were imported,"
+                f" remove those rows before importing the corrected file)"
+            )
+        raise ImportReadError(message, report)
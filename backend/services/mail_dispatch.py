@@ -0,0 +1,100 @@
+#? Pooled email dispatch for the services app
+import smtplib
+import threading
+from django.core.mail import get_connection
+
+
+#* Errors that mean the connection itself is gone (as opposed to a rejected message)
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+#? <|--------------Email Dispatcher--------------|>
+class EmailDispatcher:
+    """
+    Keeps one open email backend connection and reuses it for every message
+    Each email costs a single DATA exchange instead of a new connection and TLS handshake
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.connection = None
+
+    #* Connection management
+    def open(self):
+        if self.connection is None:
+            self.connection = get_connection(self.backend, fail_silently=False)
+        #* Opening explicitly keeps the connection alive across send_messages calls
+        self.connection.open()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def reconnect(self):
+        self.close()
+        return self.open()
+
+    #* Main method - send a batch over the shared connection
+    def send_messages(self, messages):
+        """
+        Send a batch of EmailMessage objects over the pooled connection
+        Returns a list of (message, error) pairs, error is None for delivered messages
+        A dropped connection is reopened once transparently before the message is failed,
+        and when the server can't be reached at all every message fails with that error
+        """
+        try:
+            connection = self.open()
+        except Exception as e:
+            #* Connect/auth failures (SMTPException, OSError) are retried like a rejected message
+            self.close()
+            return [(message, e) for message in messages]
+        results = []
+
+        for message in messages:
+            message.connection = connection
+            try:
+                connection.send_messages([message])
+            except CONNECTION_ERRORS:
+                try:
+                    connection = self.reconnect()
+                    message.connection = connection
+                    connection.send_messages([message])
+                except Exception as e:
+                    results.append((message, e))
+                    continue
+            except Exception as e:
+                results.append((message, e))
+                continue
+            results.append((message, None))
+
+        return results
+
+
+#? <|--------------Per-Worker Dispatcher--------------|>
+
+_local = threading.local()
+
+def get_dispatcher():
+    """Return the dispatcher for the current worker thread, creating it on first use"""
+    dispatcher = getattr(_local, 'dispatcher', None)
+    if dispatcher is None:
+        dispatcher = EmailDispatcher()
+        _local.dispatcher = dispatcher
+    return dispatcher
+
+
+def close_dispatcher():
+    """Close the current worker thread's connection (e.g. when the worker stops)"""
+    dispatcher = getattr(_local, 'dispatcher', None)
+    if dispatcher is not None:
+        dispatcher.close()
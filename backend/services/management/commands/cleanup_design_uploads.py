@@ -0,0 +1,56 @@
+#? Management command to remove abandoned and unused chunked design uploads
+import os
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from services.uploads import delete_upload, get_stale_uploads, get_orphan_part_files
+
+
+class Command(BaseCommand):
+    help = 'Delete partial uploads nobody finished, finished uploads no order used, and orphan part files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--abandoned-hours',
+            type=float,
+            default=24,
+            help='Delete unfinished uploads that received no chunk for this many hours'
+        )
+        parser.add_argument(
+            '--unattached-hours',
+            type=float,
+            default=72,
+            help='Delete finished uploads no order item claimed for this many hours'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        abandoned_before = now - timedelta(hours=options['abandoned_hours'])
+        unattached_before = now - timedelta(hours=options['unattached_hours'])
+
+        uploads = list(get_stale_uploads(abandoned_before, unattached_before))
+        orphan_part_files = get_orphan_part_files(abandoned_before)
+
+        for upload in uploads:
+            self.stdout.write(f'Upload {upload.pk}: {upload}')
+        for path in orphan_part_files:
+            self.stdout.write(f'Orphan part file {path}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'{len(uploads)} uploads and {len(orphan_part_files)} orphan part files would be deleted'
+            ))
+            return
+
+        #* An upload that got a chunk or was claimed in the meantime is kept
+        deleted = sum(1 for upload in uploads if delete_upload(upload))
+        for path in orphan_part_files:
+            os.remove(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} uploads and {len(orphan_part_files)} orphan part files deleted'
+        ))
@@ -0,0 +1,64 @@
+#? Management command to print the query plans of the order lookup hot paths
+from django.core.management.base import BaseCommand
+from django.db import connection
+from services.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = 'Print EXPLAIN output for the hot order lookup queries so index usage can be checked'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            default='customer@example.com',
+            help='Customer email used in the sample lookups'
+        )
+        parser.add_argument(
+            '--order-number',
+            default='AGAH-00000000-0000',
+            help='Order number used in the sample lookups'
+        )
+        parser.add_argument(
+            '--service-id',
+            type=int,
+            default=1,
+            help='Service id used in the per-service report query'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only, executes the queries)'
+        )
+
+    def get_queries(self, options):
+        """Hot queries keyed by a readable label, mirroring what the views run"""
+        email = options['email']
+        order_number = options['order_number']
+
+        return [
+            ('Order tracking (OrderTrackingView)',
+             Order.objects.filter(order_number=order_number, customer_email=email)),
+            ('Confirm / cancel order (ConfirmOrderView, CancelOrderView)',
+             Order.objects.for_customer_email(email).filter(order_number=order_number)),
+            ('Customer orders (CustomerOrdersView)',
+             Order.objects.for_customer_email(email).order_by('-created_at')),
+            ('Authenticated user orders (UserOrdersListView)',
+             Order.objects.filter(customer_email=email).order_by('-created_at')),
+            ('Admin orders by state (AdminOrderListView)',
+             Order.objects.filter(state='pending').order_by('-created_at', '-id')[:21]),
+            ('Admin orders, first page (AdminOrderListView)',
+             Order.objects.order_by('-created_at', '-id')[:21]),
+            ('Orders per service (reports)',
+             OrderItem.objects.filter(service_id=options['service_id']).values('order_id').distinct()),
+        ]
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options = {'analyze': True}
+
+        for label, queryset in self.get_queries(options):
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
@@ -0,0 +1,97 @@
+#? Management command to garbage-collect design blobs no order item uses anymore
+import os
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, ProtectedError
+from django.utils import timezone
+from services.models import DesignBlob, DesignUpload
+from services.storage import content_lock
+
+
+class Command(BaseCommand):
+    help = 'Delete stored design files whose blob has no references (optionally recounting references first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Keep unreferenced blobs touched within this many hours (uploads waiting for their order)'
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Recompute every reference count from the order items before collecting'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be fixed or deleted'
+        )
+
+    def recount(self, dry_run):
+        """Fix reference counts that drifted (e.g. after queryset updates that skip save())"""
+        drifted = []
+        blobs = DesignBlob.objects.annotate(item_count=Count('items')).only('id', 'digest', 'ref_count')
+        for blob in blobs.iterator(chunk_size=2000):
+            if blob.ref_count != blob.item_count:
+                self.stdout.write(f'Blob {blob.digest[:12]}: ref_count {blob.ref_count} -> {blob.item_count}')
+                blob.ref_count = blob.item_count
+                drifted.append(blob)
+
+        if not dry_run:
+            with transaction.atomic():
+                DesignBlob.objects.bulk_update(drifted, ['ref_count'], batch_size=500)
+        return len(drifted)
+
+    def get_unused_blobs(self, cutoff):
+        #* Files of uploads not claimed yet must survive until the upload is cleaned up
+        return DesignBlob.objects.filter(
+            ref_count__lte=0,
+            updated_at__lt=cutoff,
+            items__isnull=True,
+        ).exclude(
+            file__in=DesignUpload.objects.exclude(file='').values('file')
+        )
+
+    def file_was_reused(self, blob):
+        """Storage touches the mtime when it hands out an existing file instead of writing it"""
+        path = blob.file.path
+        return os.path.exists(path) and os.path.getmtime(path) > blob.updated_at.timestamp()
+
+    def delete_blob(self, blob):
+        """Delete the row first; the file only goes if nobody reused the blob meanwhile"""
+        try:
+            deleted, _ = DesignBlob.objects.filter(
+                pk=blob.pk, ref_count__lte=0, updated_at=blob.updated_at
+            ).delete()
+        except ProtectedError:
+            return False
+        if deleted:
+            #* Same lock as the storage reuse check: a save either sees the file gone and
+            #* writes it again, or marks it reused before the file is deleted
+            with content_lock(blob.digest):
+                if not self.file_was_reused(blob):
+                    blob.file.delete(save=False)
+            #* Previews are named by digest and may belong to a copy with another extension
+            if blob.preview and not DesignBlob.objects.filter(digest=blob.digest).exists():
+                blob.preview.delete(save=False)
+        return bool(deleted)
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            fixed = self.recount(options['dry_run'])
+            self.stdout.write(f'{fixed} reference counts {"would be " if options["dry_run"] else ""}fixed')
+
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        unused = list(self.get_unused_blobs(cutoff))
+        for blob in unused:
+            self.stdout.write(f'Unused blob {blob.file.name}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(unused)} blobs would be deleted'))
+            return
+
+        deleted = sum(1 for blob in unused if self.delete_blob(blob))
+        self.stdout.write(self.style.SUCCESS(f'{deleted} blobs deleted'))
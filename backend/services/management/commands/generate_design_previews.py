@@ -0,0 +1,66 @@
+#? Management command to render previews of uploaded design files in a process pool
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.core.management.base import BaseCommand
+from services.previews import process_previews
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnails, metadata and DXF/SVG/mesh analysis for new design files, outside of the upload requests'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Maximum number of files rendered per batch'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes used for rendering (default: one per CPU)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for new files'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when there is nothing to render (with --loop)'
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        #* Rendering is CPU bound, so it runs in processes; the pool is reused across batches
+        executor = ProcessPoolExecutor(max_workers=options['workers'])
+        try:
+            while True:
+                try:
+                    ready, failed = process_previews(batch_size=batch_size, executor=executor)
+                except BrokenProcessPool:
+                    #* A render process died (crash, OOM kill); its batch was requeued
+                    self.stderr.write('A render process died, restarting the worker pool')
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = ProcessPoolExecutor(max_workers=options['workers'])
+                    continue
+                
+                if ready or failed:
+                    self.stdout.write(f'Rendered {ready} previews, {failed} failed')
+                
+                if not options['loop']:
+                    break
+                
+                #* Only sleep when the last batch did not fill up
+                if ready + failed < batch_size:
+                    time.sleep(options['interval'])
+        
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping preview worker')
+        finally:
+            executor.shutdown()
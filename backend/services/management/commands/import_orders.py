@@ -0,0 +1,56 @@
+#? Management command to bulk import orders and items from a CSV or JSON file
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from services.imports import import_orders, RECORD_READERS
+
+
+class Command(BaseCommand):
+    help = 'Bulk import orders with their items from a CSV or JSON file (prices are calculated in batch)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file to import')
+        parser.add_argument(
+            '--format',
+            choices=list(RECORD_READERS),
+            help='File format (defaults to the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of items inserted per transaction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and price the file without writing anything'
+        )
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in RECORD_READERS:
+            raise CommandError(f'Unsupported format "{file_format}", use --format')
+        
+        started = time.monotonic()
+        try:
+            with open(path, 'rb') as file:
+                report = import_orders(
+                    file, file_format,
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run']
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f"... {report['error_count'] - len(report['errors'])} more errors")
+        
+        action = 'Validated' if report['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {report['orders_created']} orders / {report['items_created']} items "
+            f"in {time.monotonic() - started:.1f}s, {report['orders_skipped']} orders skipped"
+        ))
@@ -0,0 +1,56 @@
+#? Management command to verify and repair the denormalized order totals
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from services.models import Order, ZERO_PRICE, as_price, get_item_total_expression
+
+
+class Command(BaseCommand):
+    help = 'Compare stored order totals with their items (one aggregate query) and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report orders whose totals drifted, do not write'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of orders written per bulk update'
+        )
+
+    def get_drifted_orders(self):
+        """Yield orders whose stored totals differ from the sum of their items"""
+        orders = Order.objects.annotate(
+            items_estimated=Coalesce(Sum(get_item_total_expression('estimated_unit_price', prefix='items__')), ZERO_PRICE),
+            items_final=Coalesce(Sum(get_item_total_expression('final_unit_price', prefix='items__')), ZERO_PRICE),
+        ).only('id', 'order_number', 'estimaded_price', 'final_price').order_by('id')
+
+        for order in orders.iterator(chunk_size=2000):
+            #* An empty total and 0.00 mean the same thing
+            if (as_price(order.estimaded_price) != as_price(order.items_estimated)
+                    or as_price(order.final_price) != as_price(order.items_final)):
+                yield order
+
+    def handle(self, *args, **options):
+        #* Collect first, so no write happens while the aggregate cursor is still open
+        drifted = list(self.get_drifted_orders())
+
+        for order in drifted:
+            self.stdout.write(
+                f'Order {order.order_number}: estimated {order.estimaded_price} -> {order.items_estimated}, '
+                f'final {order.final_price} -> {order.items_final}'
+            )
+            order.estimaded_price = order.items_estimated
+            order.final_price = order.items_final
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} orders would be fixed'))
+            return
+
+        with transaction.atomic():
+            Order.objects.bulk_update(drifted, ['estimaded_price', 'final_price'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{len(drifted)} orders fixed'))
@@ -0,0 +1,60 @@
+#? Management command to deliver queued emails from the outbox
+import time
+from django.core.management.base import BaseCommand
+from services.outbox import process_outbox
+from services.mail_dispatch import close_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending emails from the email outbox over one pooled connection (retries with exponential backoff)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Maximum number of emails to deliver per batch'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the outbox for new emails'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the outbox is empty (with --loop)'
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        try:
+            while True:
+                try:
+                    sent, failed = process_outbox(batch_size=batch_size)
+                except Exception as e:
+                    #* Claimed emails are retried once their lease expires, keep the worker running
+                    if not options['loop']:
+                        raise
+                    self.stderr.write(f'Error processing the outbox: {e}')
+                    time.sleep(options['interval'])
+                    continue
+                
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent} emails, {failed} failed')
+                
+                if not options['loop']:
+                    break
+                
+                #* Only sleep when the last batch did not fill up
+                if sent + failed < batch_size:
+                    time.sleep(options['interval'])
+        
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping email worker')
+        
+        finally:
+            #* The connection stays open between batches, close it once at the end
+            close_dispatcher()
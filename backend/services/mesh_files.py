@@ -0,0 +1,146 @@
+#? Readers and vectorized analysis for 3D printing meshes (STL / OBJ / 3MF)
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+import numpy as np
+
+
+#* Meshes without units (STL, OBJ) are assumed to be in millimetres, like slicers do
+DEFAULT_UNIT_MM = 1.0
+
+#* 3MF model units -> millimetres
+THREE_MF_UNITS_TO_MM = {
+    'micron': 0.001,
+    'millimeter': 1.0,
+    'centimeter': 10.0,
+    'inch': 25.4,
+    'foot': 304.8,
+    'meter': 1000.0,
+}
+
+#* Binary STL triangle record: normal, 3 vertices, attribute byte count (50 bytes)
+STL_TRIANGLE_DTYPE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attributes', '<u2')])
+STL_HEADER_SIZE = 84
+
+STL_VERTEX_RE = re.compile(rb'vertex\s+(\S+)\s+(\S+)\s+(\S+)')
+
+
+#? <|--------------Readers--------------|>
+
+def read_stl(path):
+    """(N, 3, 3) triangle array of a binary or ASCII STL, unit_mm (None, STL has no units)"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as source:
+        header = source.read(STL_HEADER_SIZE)
+        #* Some binary files also start with "solid", the size is what tells them apart
+        if len(header) == STL_HEADER_SIZE:
+            count = int(np.frombuffer(header, '<u4', 1, offset=80)[0])
+            if size == STL_HEADER_SIZE + count * STL_TRIANGLE_DTYPE.itemsize:
+                records = np.fromfile(source, dtype=STL_TRIANGLE_DTYPE, count=count)
+                return records['vertices'].astype(np.float64), None
+        source.seek(0)
+        vertices = np.array(STL_VERTEX_RE.findall(source.read()), dtype=np.float64)
+
+    if len(vertices) % 3:
+        raise ValueError('Malformed ASCII STL: vertex count is not a multiple of 3')
+    return vertices.reshape(-1, 3, 3), None
+
+
+def read_obj(path):
+    """(N, 3, 3) triangle array of a Wavefront OBJ; polygons are split into triangle fans"""
+    vertices = []
+    faces = []
+    with open(path, 'rb') as source:
+        for line in source:
+            if line.startswith(b'v '):
+                vertices.append(line.split()[1:4])
+            elif line.startswith(b'f '):
+                #* "f 1/2/3 4/5/6 ..." - only the vertex index matters; negative indices count back
+                indices = [int(token.split(b'/')[0]) for token in line.split()[1:]]
+                indices = [index - 1 if index > 0 else len(vertices) + index for index in indices]
+                faces.extend((indices[0], indices[i], indices[i + 1]) for i in range(1, len(indices) - 1))
+
+    vertices = np.array(vertices, dtype=np.float64)
+    faces = np.array(faces, dtype=np.int64).reshape(-1, 3)
+    if len(faces) and (faces.min() < 0 or faces.max() >= len(vertices)):
+        raise ValueError('Malformed OBJ: face references a missing vertex')
+    return vertices[faces], None
+
+
+def read_3mf(path):
+    """
+    (N, 3, 3) triangle array of every mesh object in a 3MF package, and its unit in mm
+    Build item transforms and component references are not applied (one copy of each object)
+    """
+    triangles = []
+    unit_mm = DEFAULT_UNIT_MM
+    with zipfile.ZipFile(path) as package:
+        for name in package.namelist():
+            if not name.lower().endswith('.model'):
+                continue
+            with package.open(name) as model:
+                vertices, faces = [], []
+                for event, element in ElementTree.iterparse(model, events=('start', 'end')):
+                    tag = element.tag.rsplit('}', 1)[-1]
+                    if event == 'start':
+                        if tag == 'model':
+                            unit_mm = THREE_MF_UNITS_TO_MM.get(element.get('unit', 'millimeter'), DEFAULT_UNIT_MM)
+                        elif tag == 'mesh':
+                            vertices, faces = [], []
+                        continue
+                    if tag == 'vertex':
+                        vertices.append((element.get('x'), element.get('y'), element.get('z')))
+                    elif tag == 'triangle':
+                        faces.append((element.get('v1'), element.get('v2'), element.get('v3')))
+                    elif tag == 'mesh' and faces:
+                        triangles.append(
+                            np.array(vertices, dtype=np.float64)[np.array(faces, dtype=np.int64)]
+                        )
+                    if tag not in ('model', 'resources'):
+                        element.clear()
+
+    if not triangles:
+        return np.empty((0, 3, 3)), unit_mm
+    return np.concatenate(triangles), unit_mm
+
+
+MESH_READERS = {
+    '.stl': read_stl,
+    '.obj': read_obj,
+    '.3mf': read_3mf,
+}
+
+
+def read_mesh(path):
+    return MESH_READERS[os.path.splitext(path)[1].lower()](path)
+
+
+#? <|--------------Analysis--------------|>
+
+def analyze_mesh(triangles, unit_mm=None):
+    """
+    Volume, surface area and bounding box of a triangle array, all triangles at once
+    Volume is the sum of signed tetrahedra against the origin, so it assumes a closed mesh;
+    the absolute value makes it independent of the winding order
+    """
+    if not len(triangles):
+        raise ValueError('No triangles found')
+
+    scale = unit_mm or DEFAULT_UNIT_MM
+    v0, v1, v2 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    area = 0.5 * np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1).sum()
+    volume = abs(np.einsum('ij,ij->i', v0, np.cross(v1, v2)).sum()) / 6
+    low = triangles.min(axis=(0, 1))
+    high = triangles.max(axis=(0, 1))
+    width, depth, height = ((high - low) * scale).tolist()
+
+    return {
+        'triangle_count': len(triangles),
+        'volume_mm3': round(float(volume) * scale ** 3, 2),
+        'surface_area_mm2': round(float(area) * scale ** 2, 2),
+        'bbox_width_mm': round(width, 2),
+        'bbox_depth_mm': round(depth, 2),
+        'bbox_height_mm': round(height, 2),
+        'units_assumed': unit_mm is None,
+    }
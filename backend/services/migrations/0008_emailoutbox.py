@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_order_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(help_text='Email subject', max_length=255)),
+                ('body', models.TextField(blank=True, help_text='Plain text body')),
+                ('html_body', models.TextField(blank=True, help_text='HTML body (optional)')),
+                ('from_email', models.CharField(help_text='Sender address', max_length=255)),
+                ('recipients', models.JSONField(default=list, help_text='List of recipient addresses')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', help_text='Delivery status', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of failed delivery attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time for the next delivery attempt')),
+                ('last_error', models.TextField(blank=True, help_text='Error from the last failed attempt')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Queued Email',
+                'verbose_name_plural': 'Email Outbox',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx')],
+            },
+        ),
+    ]
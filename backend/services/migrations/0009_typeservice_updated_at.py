@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0008_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='typeservice',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
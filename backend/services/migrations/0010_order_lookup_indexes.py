@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:11
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0009_typeservice_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer_email', '-created_at'], name='order_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(django.db.models.functions.text.Lower('customer_email'), models.OrderBy(models.F('created_at'), descending=True), name='order_email_lower_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['service', 'order'], name='orderitem_service_order_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:27
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0010_order_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(help_text='Original file name', max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Total size in bytes declared when the upload started')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Number of bytes received so far')),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete')], default='uploading', help_text='Upload status', max_length=10)),
+                ('file', models.FileField(blank=True, help_text='Assembled file, set when the upload completes', null=True, upload_to='order_files/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attached_at', models.DateTimeField(blank=True, help_text='When an order item started using this file', null=True)),
+            ],
+            options={
+                'verbose_name': 'Design Upload',
+                'verbose_name_plural': 'Design Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0011_designupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designupload',
+            name='sha256',
+            field=models.CharField(blank=True, help_text='SHA-256 (hex) of the whole file declared by the client, checked on completion', max_length=64),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:32
+
+import django.db.models.deletion
+import services.models
+import services.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0012_designupload_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(db_index=True, help_text='SHA-256 (hex) of the file content', max_length=64)),
+                ('file', models.FileField(help_text='Content-addressed file in storage', max_length=255, storage=services.storage.get_design_file_storage, unique=True, upload_to='order_files/')),
+                ('ref_count', models.IntegerField(default=0, help_text='Number of order items using this file')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Design Blob',
+                'verbose_name_plural': 'Design Blobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='designupload',
+            name='file',
+            field=models.FileField(blank=True, help_text='Assembled file, set when the upload completes', null=True, storage=services.storage.get_design_file_storage, upload_to='order_files/'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='design_file',
+            field=models.FileField(blank=True, help_text='Upload design files for the order', null=True, storage=services.storage.get_design_file_storage, upload_to='order_files/', validators=[services.models.validate_design_file]),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='design_blob',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Deduplicated blob the design file points to', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='items', to='services.designblob'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0013_design_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designblob',
+            name='preview',
+            field=models.FileField(blank=True, help_text='Small PNG preview of the file', upload_to='design_previews/'),
+        ),
+        migrations.AddField(
+            model_name='designblob',
+            name='preview_error',
+            field=models.CharField(blank=True, help_text='Why the preview could not be generated', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='designblob',
+            name='preview_metadata',
+            field=models.JSONField(blank=True, default=dict, help_text='Page count, pixel dimensions or vector bounding box'),
+        ),
+        migrations.AddField(
+            model_name='designblob',
+            name='preview_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], db_index=True, default='pending', help_text='Thumbnail generation status', max_length=12),
+        ),
+    ]
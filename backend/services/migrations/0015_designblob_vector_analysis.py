@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:38
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def requeue_vector_blobs(apps, schema_editor):
+    """Vector files rendered before the cut analysis existed are rendered again to get it"""
+    DesignBlob = apps.get_model('services', 'DesignBlob')
+    DesignBlob.objects.filter(
+        Q(file__iendswith='.dxf') | Q(file__iendswith='.svg'), preview_status='ready'
+    ).update(preview_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0014_designblob_previews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designblob',
+            name='vector_analysis',
+            field=models.JSONField(blank=True, default=dict, help_text='Cut analysis of vector files'),
+        ),
+        migrations.RunPython(requeue_vector_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0015_designblob_vector_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designblob',
+            name='mesh_analysis',
+            field=models.JSONField(blank=True, default=dict, help_text='Volume and area analysis of 3D meshes'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0016_designblob_mesh_analysis'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='designblob',
+            name='preview_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('rendering', 'Rendering'), ('ready', 'Ready'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], db_index=True, default='pending', help_text='Thumbnail generation status', max_length=12),
+        ),
+    ]
@@ -1,18 +1,32 @@
 #? Models for the services app
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum, Case, When, Value, ExpressionWrapper
+from django.db.models.functions import Coalesce, Lower
 from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from collections import Counter
+import math
 import os 
+import uuid
+from .storage import get_design_file_storage, get_content_digest
 
-def validate_design_file(value):
-    allowed_extensions = ['.pdf', '.png', '.jpg', '.jpeg', '.svg', '.ai', '.psd', '.dwg', '.dxf']
-    ext = os.path.splitext(value.name)[1].lower()
+#* Design file rules shared by direct uploads and chunked uploads
+DESIGN_FILE_EXTENSIONS = ['.pdf', '.png', '.jpg', '.jpeg', '.svg', '.ai', '.psd', '.dwg', '.dxf', '.stl', '.obj', '.3mf']
+DESIGN_FILE_MAX_SIZE = 25 * 1024 * 1024
+
+def validate_design_file_name(name):
+    ext = os.path.splitext(name)[1].lower()
     
-    if ext not in allowed_extensions:
-        raise ValidationError(f'File type {ext} not allowed. Allowed: {", ".join(allowed_extensions)}')
+    if ext not in DESIGN_FILE_EXTENSIONS:
+        raise ValidationError(f'File type {ext} not allowed. Allowed: {", ".join(DESIGN_FILE_EXTENSIONS)}')
+
+def validate_design_file(value):
+    validate_design_file_name(value.name)
     
-    if value.size > 25 * 1024 * 1024:
+    if value.size > DESIGN_FILE_MAX_SIZE:
         raise ValidationError('File size must be less than 25MB')
 
 # Y en el campo design_file de OrderItem, cambiar:
@@ -24,6 +38,62 @@ design_file = models.FileField(
     help_text="Upload design files for the order"
 )
 
+#* OrderItem fields apply_design_analysis may fill from a design file analysis
+DESIGN_ANALYSIS_FIELDS = (
+    'length_dimensions', 'width_dimensions', 'height_dimensions',
+    'plasma_cutting_time', 'laser_cutting_time', 'printing_time', 'printing_material_used',
+)
+
+#? <|--------------Order Total Expressions--------------|>
+
+#* Decimal zero used as fallback in SQL aggregates
+ZERO_PRICE = Value(Decimal('0.00'), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+
+def as_price(value):
+    """Decimal rounded to cents, the way price fields are stored (None counts as zero)"""
+    if value is None:
+        return Decimal('0.00')
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def mm_to_inches(value):
+    """Millimetres from a design analysis as a dimension field value (inches, 2 decimals)"""
+    return as_price(Decimal(str(value)) / Decimal('25.4'))
+
+
+def fits_field(model, field_name, value):
+    """True if a derived value can be stored in the integer/decimal field (finite, within its digits)"""
+    if value is None:
+        return True
+    field = model._meta.get_field(field_name)
+    try:
+        value = Decimal(str(value))
+        if isinstance(field, models.DecimalField):
+            value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+            return abs(value) < Decimal(10) ** (field.max_digits - field.decimal_places)
+        return abs(value) <= 2 ** 31 - 1
+    except InvalidOperation:
+        #* NaN / Infinity, or too many digits to quantize
+        return False
+
+
+def get_item_total_expression(unit_price_field, prefix=''):
+    """
+    SQL version of OrderItem.get_*_total_with_design:
+    unit price × quantity plus the custom design price when the item needs it.
+    Use prefix='items__' to build it from the Order side.
+    """
+    unit_total = Coalesce(F(f'{prefix}{unit_price_field}'), ZERO_PRICE) * F(f'{prefix}quantity')
+    design_total = Case(
+        When(**{f'{prefix}needs_custom_design': True}, then=Coalesce(F(f'{prefix}custom_design_price'), ZERO_PRICE)),
+        default=ZERO_PRICE,
+    )
+    return ExpressionWrapper(
+        unit_total + design_total,
+        output_field=models.DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
 #? <|--------------Type of service Model--------------|>
 class TypeService(models.Model): 
 
@@ -107,6 +177,9 @@ class TypeService(models.Model):
         help_text="Service image for display"
     )
     
+    #* Modification timestamp (used for catalog cache validators)
+    updated_at = models.DateTimeField(auto_now=True)
+    
     #* Metadata class for the TypeService model
     class Meta:
         ordering = ['order_display', 'name']
@@ -188,6 +261,31 @@ class CompanyConfiguration(models.Model):
         return f"{self.company_name} - Configuration"
 
 
+#? <|--------------Order QuerySet--------------|>
+class OrderQuerySet(models.QuerySet):
+    
+    #* Shared queryset builder for endpoints that serialize orders with OrderDetailSerializer
+    def with_details(self):
+        """Prefetch items and their services so serializing a list runs a constant number of queries"""
+        return self.prefetch_related('items__service', 'items__design_blob')
+    
+    #* Incremental totals - one UPDATE, safe against concurrent item writes
+    def add_to_totals(self, estimated, final):
+        """Add the given deltas to estimaded_price and final_price in SQL"""
+        price_field = models.DecimalField(max_digits=10, decimal_places=2)
+        return self.update(
+            estimaded_price=Coalesce(F('estimaded_price'), ZERO_PRICE) + Value(estimated, output_field=price_field),
+            final_price=Coalesce(F('final_price'), ZERO_PRICE) + Value(final, output_field=price_field),
+        )
+    
+    #* Case-insensitive email lookup that can use the Lower(customer_email) index
+    def for_customer_email(self, email):
+        """Filter by customer email ignoring case (iexact compiles to LIKE/UPPER, which skip the index)"""
+        return self.alias(customer_email_lower=Lower('customer_email')).filter(
+            customer_email_lower=email.strip().lower()
+        )
+
+
 #? <|--------------Order Model--------------|>
 class Order(models.Model):
     
@@ -279,25 +377,62 @@ class Order(models.Model):
         blank=True,
         help_text="Additional notes for the order"
     )
+    
+    #* Custom queryset manager
+    objects = OrderQuerySet.as_manager()
 
     #* Metadata class for the Order model
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Order"
         verbose_name_plural = "Orders"
+        indexes = [
+            #* Keyset pagination of the admin order list, optionally filtered by state or assignee
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+            models.Index(fields=['state', '-created_at', '-id'], name='order_state_created_id_idx'),
+            models.Index(fields=['assigned_user', '-created_at', '-id'], name='order_assigned_created_id_idx'),
+            
+            #* Customer lookups (tracking, customer order lists, confirm/cancel) sorted by newest
+            models.Index(fields=['customer_email', '-created_at'], name='order_email_created_idx'),
+            models.Index(Lower('customer_email'), F('created_at').desc(), name='order_email_lower_created_idx'),
+        ]
+        
+    #* Fields whose persisted values are tracked for state-change emails
+    TRACKED_FIELDS = ('state', 'final_price')
         
     def __str__(self):
         return f"Order {self.order_number} - {self.customer_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked_fields(field_names)
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.snapshot_tracked_fields(kwargs.get('fields'))
+    
+    #* Method to remember persisted values so changes are detected without a query
+    def snapshot_tracked_fields(self, field_names=None):
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self.TRACKED_FIELDS:
+            if field_names is None or field in field_names:
+                self._loaded_values[field] = getattr(self, field)
+    
     def save(self, *args, **kwargs):
         if not self.order_number:
             import uuid
             self.order_number = str(uuid.uuid4())[:8].upper()
         super().save(*args, **kwargs)
+        
+        #* Only the fields that were written are now persisted
+        self.snapshot_tracked_fields(kwargs.get('update_fields'))
     
     #* SOLUCION PROBLEMA 4 - Método para calcular el precio total estimado
     def get_estimated_total_price(self):
-        """Calculate total estimated price including all items and design costs"""
+        """Calculate total estimated price including all items and design costs (uses prefetched items if available)"""
         total = 0
         for item in self.items.all():
             total += item.get_estimated_total_with_design()
@@ -305,11 +440,63 @@ class Order(models.Model):
     
     #* SOLUCION PROBLEMA 4 - Método para calcular el precio total final
     def get_final_total_price(self):
-        """Calculate total final price including all items and design costs"""
+        """Calculate total final price including all items and design costs (uses prefetched items if available)"""
         total = 0
         for item in self.items.all():
             total += item.get_final_total_with_design()
         return total
+    
+    #* Method to recompute both totals with a single aggregate query (repairs any drift)
+    def update_totals(self, save=True):
+        """Recompute estimaded_price and final_price in SQL and optionally save them"""
+        totals = self.items.aggregate(
+            estimated=Coalesce(Sum(get_item_total_expression('estimated_unit_price')), ZERO_PRICE),
+            final=Coalesce(Sum(get_item_total_expression('final_unit_price')), ZERO_PRICE),
+        )
+        self.estimaded_price = totals['estimated']
+        self.final_price = totals['final']
+        
+        if save:
+            self.save(update_fields=['estimaded_price', 'final_price'])
+    
+    #* Method to apply an item change to the totals without reading the other items
+    def add_to_totals(self, estimated, final):
+        """Add deltas to the stored totals with one F() update and mirror them on this instance"""
+        if not estimated and not final:
+            return
+        Order.objects.filter(pk=self.pk).add_to_totals(estimated, final)
+        
+        self.estimaded_price = as_price(self.estimaded_price) + estimated
+        self.final_price = as_price(self.final_price) + final
+        #* The new values are what the database now holds
+        self.snapshot_tracked_fields(['final_price'])
+    
+    #* Bulk creation path - one insert for all items and one write for the totals
+    @classmethod
+    def create_with_items(cls, items_data, **order_data):
+        """
+        Create an order and all of its items in one transaction
+        items_data is a list of OrderItem field dicts (service must be a TypeService instance)
+        """
+        with transaction.atomic():
+            order = cls.objects.create(**order_data)
+            
+            items = [OrderItem(order=order, **item_data) for item_data in items_data]
+            OrderItem.attach_design_blobs(items)
+            OrderItem.calculate_prices_in_batch(items)
+            OrderItem.objects.bulk_create(items)
+            DesignBlob.objects.add_references(Counter(item.design_blob_id for item in items))
+            
+            estimated = final = Decimal('0.00')
+            for item in items:
+                item_estimated, item_final = item.get_totals_contribution()
+                estimated += item_estimated
+                final += item_final
+                item.snapshot_totals()
+                item.snapshot_design_blob()
+            order.add_to_totals(estimated, final)
+        
+        return order
 
 
 #? <|--------------Order Item Model--------------|>
@@ -336,14 +523,26 @@ class OrderItem(models.Model):
         help_text="Additional description for the service"
     )
 
-    #* Design file upload field
+    #* Design file upload field (identical files are stored once, see ContentAddressedStorage)
     design_file = models.FileField(
         upload_to='order_files/',
+        storage=get_design_file_storage,
         validators=[validate_design_file],  # AGREGAR ESTA LÍNEA
         null=True,
         blank=True,
         help_text="Upload design files for the order"
     )
+    
+    #* Stored blob behind design_file, counted so unused blobs can be collected
+    design_blob = models.ForeignKey(
+        'DesignBlob',
+        on_delete=models.PROTECT,
+        related_name='items',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Deduplicated blob the design file points to"
+    )
 
     #* Quantity field
     quantity = models.PositiveIntegerField(
@@ -555,6 +754,10 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "Order Item"
         verbose_name_plural = "Order Items"
+        indexes = [
+            #* Covering index for per-service reports (service -> orders)
+            models.Index(fields=['service', 'order'], name='orderitem_service_order_idx'),
+        ]
         
     def __str__(self):
         return f"{self.service.name} - {self.quantity}x"
@@ -569,59 +772,23 @@ class OrderItem(models.Model):
     def calculate_service_price(self):
         if not self.service:
             return 0
-            
-        service_type = self.service.type
-        
-        if 'plasma' in service_type.lower():
-            return self.calculate_plasma_price()
-        elif 'laser' in service_type.lower():
-            return self.calculate_laser_price()
-        elif any(x in service_type.lower() for x in ['3d', 'printing', 'resin']):
-            return self.calculate_printing_price()
-        else:
-            return float(self.service.base_price) if self.service.base_price else 0
+        
+        #* Formulas live in pricing.py, shared with the batch engine and the quote preview
+        from .pricing import calculate_service_price, get_item_pricing_row
+        return calculate_service_price(get_item_pricing_row(self))
     
     #* Plasma cutting price calculation
     def calculate_plasma_price(self):
-        A = self.plasma_design_programming_time or 60
-        B = self.plasma_cutting_time or 30
-        C = self.plasma_post_process_time or 60
-        D = 0.09524 * B
-        E = float(self.plasma_material_cost) if self.plasma_material_cost else 0
-        F = self.get_area_square_inches()
-        G = float(self.plasma_consumables) if self.plasma_consumables else 162.30
-        
-        subtotal = ((A * 3.33) + (B * 16.5) + (C * 1.5) + (D * 0.03211) + (((E * F) / 4608) * 2) + G) * 1.3
-        total = subtotal * 1.08
-        
-        return total
+        from .pricing import calculate_plasma_price, get_item_pricing_row
+        return calculate_plasma_price(get_item_pricing_row(self))
     
     def calculate_laser_price(self):
-        A = self.laser_design_programming_time or 30
-        B = self.laser_cutting_time or 10
-        C = self.laser_post_process_time or 10
-        D = 0.09524 * B
-        E = float(self.laser_material_cost) if self.laser_material_cost else 0
-        F = self.get_area_square_inches()
-        G = float(self.laser_consumables) if self.laser_consumables else 30.00
-        
-        subtotal = ((A * 1.2) + (B * 1.7) + (C * 1) + (D * 0.03211) + (((E * F) / 4608) * 2) + G) * 1.3
-        total = subtotal * 1.08
-        
-        return total
+        from .pricing import calculate_laser_price, get_item_pricing_row
+        return calculate_laser_price(get_item_pricing_row(self))
     
     def calculate_printing_price(self):
-        A = self.printing_design_programming_time or 60
-        B = self.printing_time or 30
-        C = float(self.printing_material_used) if self.printing_material_used else 0
-        D = self.printing_post_process_time or 60
-        F = float(self.printing_material_cost) if self.printing_material_cost else 350.00
-        G = float(self.printing_consumables) if self.printing_consumables else 30.00
-        
-        subtotal = ((A * 2.7) + (B * 1.9) + (C / 1000) * F + (D * 1.5) + G) * 1.3
-        total = subtotal * 1.08
-        
-        return total
+        from .pricing import calculate_printing_price, get_item_pricing_row
+        return calculate_printing_price(get_item_pricing_row(self))
 
     #* SOLUCION PROBLEMA 3 - Method to get estimated total including design price
     def get_estimated_total_with_design(self):
@@ -665,43 +832,540 @@ class OrderItem(models.Model):
             return f"${total:,.2f} MXN"
         return "Not calculated"
     
-    #* Method to save and auto-calculate prices - SOLUCION PROBLEMA 5
-    def save(self, *args, **kwargs):
+    #* Method to check if the item has the inputs of its service formula
+    def has_calculation_fields(self):
+        service_type = self.service.type.lower()
+        
+        if 'plasma' in service_type:
+            return any([
+                self.plasma_design_programming_time,
+                self.plasma_cutting_time, 
+                self.plasma_material_cost
+            ])
+        elif 'laser' in service_type:
+            return any([
+                self.laser_design_programming_time,
+                self.laser_cutting_time,
+                self.laser_material_cost
+            ])
+        elif any(x in service_type for x in ['3d', 'printing', 'resin']):
+            return any([
+                self.printing_design_programming_time,
+                self.printing_time,
+                self.printing_material_used
+            ])
+        return False
+    
+    #* Method to pre-fill pricing inputs from the analysis of the uploaded design file
+    def apply_design_analysis(self, blob):
+        """
+        Fill the cutting/printing inputs and dimensions the customer/staff did not provide,
+        from the DXF/SVG cut analysis or the STL/OBJ/3MF mesh analysis of the blob
+        A time still at its default counts as not provided; returns True if anything changed
+        """
+        before = {name: getattr(self, name) for name in DESIGN_ANALYSIS_FIELDS}
+        service_type = self.service.type.lower()
+        try:
+            if 'plasma' in service_type or 'laser' in service_type:
+                changed = self.apply_vector_analysis(blob.vector_analysis, 'plasma' if 'plasma' in service_type else 'laser')
+            elif any(x in service_type for x in ['3d', 'printing', 'resin']):
+                changed = self.apply_mesh_analysis(blob.mesh_analysis, 'resin' if 'resin' in service_type else 'fdm')
+            else:
+                changed = False
+            fits = not changed or all(
+                fits_field(self, name, getattr(self, name)) for name in DESIGN_ANALYSIS_FIELDS
+            ) and fits_field(self, 'final_unit_price', self.calculate_service_price())
+        except (ArithmeticError, ValueError):
+            fits = False
+        
+        if not fits:
+            #* A value the fields can't store (e.g. a stray point far away in the file): keep the inputs as they were
+            for name, value in before.items():
+                setattr(self, name, value)
+            return False
+        return changed
+    
+    def apply_vector_analysis(self, analysis, process):
+        from .pricing import estimate_cutting_minutes
+        
+        if not analysis:
+            return False
+        
+        changed = False
+        time_field = f'{process}_cutting_time'
+        default_minutes = OrderItem._meta.get_field(time_field).default
+        if getattr(self, time_field) in (None, default_minutes):
+            #* The defaults are the minimum cutting time the formulas charge
+            minutes = max(default_minutes, math.ceil(estimate_cutting_minutes(analysis, process)))
+            changed = minutes != getattr(self, time_field)
+            setattr(self, time_field, minutes)
+        
+        #* get_area_square_inches uses length x width in inches
+        if self.length_dimensions is None and self.width_dimensions is None:
+            self.length_dimensions = mm_to_inches(analysis['bbox_width_mm'])
+            self.width_dimensions = mm_to_inches(analysis['bbox_height_mm'])
+            changed = True
+        
+        return changed
+    
+    def apply_mesh_analysis(self, analysis, process):
+        from .pricing import estimate_printing
+        
+        if not analysis:
+            return False
+        
+        changed = False
+        grams, minutes = estimate_printing(analysis, process)
+        default_minutes = OrderItem._meta.get_field('printing_time').default
+        if self.printing_time in (None, default_minutes):
+            #* The formula charges at least 30 minutes of printing
+            minutes = max(default_minutes, math.ceil(minutes))
+            changed = minutes != self.printing_time
+            self.printing_time = minutes
+        
+        if self.printing_material_used is None:
+            self.printing_material_used = as_price(grams)
+            changed = True
+        
+        if self.length_dimensions is None and self.width_dimensions is None and self.height_dimensions is None:
+            self.length_dimensions = mm_to_inches(analysis['bbox_width_mm'])
+            self.width_dimensions = mm_to_inches(analysis['bbox_depth_mm'])
+            self.height_dimensions = mm_to_inches(analysis['bbox_height_mm'])
+            changed = True
+        
+        return changed
+    
+    #* Method to store a calculated service price in the unit price fields
+    def apply_calculated_price(self, calculated_price):
+        if self.has_calculation_fields():
+            self.final_unit_price = calculated_price
+        
+        # Set estimated price only if not set
+        if not self.estimated_unit_price:
+            self.estimated_unit_price = calculated_price
+    
+    #* Method to auto-calculate unit prices before saving
+    def calculate_prices(self):
         if self.service:
-            service_type = self.service.type
-            has_calc_fields = False
-            
-            if 'plasma' in service_type.lower():
-                has_calc_fields = any([
-                    self.plasma_design_programming_time,
-                    self.plasma_cutting_time, 
-                    self.plasma_material_cost
-                ])
-            elif 'laser' in service_type.lower():
-                has_calc_fields = any([
-                    self.laser_design_programming_time,
-                    self.laser_cutting_time,
-                    self.laser_material_cost
-                ])
-            elif any(x in service_type.lower() for x in ['3d', 'printing', 'resin']):
-                has_calc_fields = any([
-                    self.printing_design_programming_time,
-                    self.printing_time,
-                    self.printing_material_used
-                ])
-            
-            if has_calc_fields:
-                calculated_price = self.calculate_service_price()
-                self.final_unit_price = calculated_price
-            
-            # Set estimated price only if not set
-            if not self.estimated_unit_price:
-                self.estimated_unit_price = self.calculate_service_price()
+            self.apply_calculated_price(self.calculate_service_price())
+    
+    #* Batch version of calculate_prices for unsaved items (bulk creation paths)
+    @staticmethod
+    def calculate_prices_in_batch(items):
+        """Price a list of unsaved items (service set) with one vectorized pass"""
+        from .pricing import price_unsaved_items
+        for item, price in zip(items, price_unsaved_items(items)):
+            item.apply_calculated_price(price)
+    
+    #* Order totals bookkeeping - each item knows what it last added to its order
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_totals()
+        instance.snapshot_design_blob()
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.snapshot_totals()
+        self.snapshot_design_blob()
+    
+    def get_totals_contribution(self):
+        """(estimated, final) this item adds to the order totals, same rules as get_item_total_expression"""
+        design = as_price(self.custom_design_price) if self.needs_custom_design else Decimal('0.00')
+        return (
+            as_price(self.estimated_unit_price) * self.quantity + design,
+            as_price(self.final_unit_price) * self.quantity + design,
+        )
+    
+    def snapshot_totals(self):
+        """Remember the persisted contribution so the next save only applies the difference"""
+        self._loaded_totals = (self.order_id, *self.get_totals_contribution())
+    
+    def get_order_for_totals(self, order_id):
+        """The cached order instance (kept in sync in memory) or a queryset for the row"""
+        if order_id == self.order_id and OrderItem.order.is_cached(self):
+            return self.order
+        return Order.objects.filter(pk=order_id)
+    
+    def update_order_totals(self, deleted=False):
+        """Apply this item's change to its order totals with one UPDATE per affected order"""
+        if deleted and not hasattr(self, '_loaded_totals'):
+            #* Instance built by hand: assume its current values are the stored ones
+            self.snapshot_totals()
+        old_order_id, old_estimated, old_final = getattr(
+            self, '_loaded_totals', (None, Decimal('0.00'), Decimal('0.00'))
+        )
+        new_estimated, new_final = (Decimal('0.00'), Decimal('0.00')) if deleted else self.get_totals_contribution()
+        
+        if old_order_id is not None and old_order_id != self.order_id:
+            #* Item moved to another order
+            self.get_order_for_totals(old_order_id).add_to_totals(-old_estimated, -old_final)
+            old_estimated = old_final = Decimal('0.00')
+        
+        estimated, final = new_estimated - old_estimated, new_final - old_final
+        if self.order_id is not None and (estimated or final):
+            self.get_order_for_totals(self.order_id).add_to_totals(estimated, final)
+        
+        self.snapshot_totals()
+    
+    #* Design blob bookkeeping - the blob reference count follows the item's design file
+    def snapshot_design_blob(self):
+        """Remember the stored file and blob (read from __dict__ so deferred fields stay deferred)"""
+        design_file = self.__dict__.get('design_file')
+        self._loaded_design_file_name = getattr(design_file, 'name', design_file) or None
+        self._loaded_design_blob_id = self.__dict__.get('design_blob_id')
+    
+    @staticmethod
+    def attach_design_blobs(items):
+        """
+        Store new design files (deduplicated by content) and point each item at its blob
+        One lookup for the whole list; files with a legacy, non content-addressed name get no blob
+        """
+        names = []
+        for item in items:
+            if item.design_file and not item.design_file._committed:
+                item.design_file.save(item.design_file.name, item.design_file.file, save=False)
+            if item.design_file:
+                names.append(item.design_file.name)
+        
+        blobs = DesignBlob.objects.for_file_names(names)
+        for item in items:
+            item.design_blob = blobs.get(item.design_file.name) if item.design_file else None
+            #* Files analyzed before (e.g. a reorder) pre-fill the item right away
+            if item.design_blob is not None and item.service_id:
+                item.apply_design_analysis(item.design_blob)
+    
+    def update_design_blob_references(self):
+        old_blob_id = getattr(self, '_loaded_design_blob_id', None)
+        if old_blob_id != self.design_blob_id:
+            DesignBlob.objects.add_references({old_blob_id: -1, self.design_blob_id: 1})
+        self.snapshot_design_blob()
+    
+    #* Method to save and auto-calculate prices - SOLUCION PROBLEMA 5
+    def save(self, *args, update_order_totals=True, **kwargs):
+        #* Only resolve the blob when the file changed
+        if (self.design_file and not self.design_file._committed) or \
+                (self.design_file.name or None) != getattr(self, '_loaded_design_file_name', None):
+            OrderItem.attach_design_blobs([self])
+        
+        self.calculate_prices()
         
         super().save(*args, **kwargs)
         
-        # Update order totals after saving item
-        if self.order:
-            self.order.estimaded_price = self.order.get_estimated_total_price()
-            self.order.final_price = self.order.get_final_total_price()
-            self.order.save(update_fields=['estimaded_price', 'final_price'])
\ No newline at end of file
+        # Apply the price difference to the order totals (skip when the caller updates them once for a batch)
+        if update_order_totals:
+            self.update_order_totals()
+        else:
+            self.snapshot_totals()
+        self.update_design_blob_references()
+
+#? <|--------------Email Outbox Model--------------|>
+class EmailOutbox(models.Model):
+    """
+    Persistent queue of outgoing emails
+    Rows are written in the same transaction as the change that triggers them
+    and delivered later by the `send_queued_emails` management command
+    """
+    
+    #* Delivery status choices
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    #* Message fields
+    subject = models.CharField(
+        max_length=255,
+        help_text="Email subject"
+    )
+    
+    body = models.TextField(
+        blank=True,
+        help_text="Plain text body"
+    )
+    
+    html_body = models.TextField(
+        blank=True,
+        help_text="HTML body (optional)"
+    )
+    
+    from_email = models.CharField(
+        max_length=255,
+        help_text="Sender address"
+    )
+    
+    recipients = models.JSONField(
+        default=list,
+        help_text="List of recipient addresses"
+    )
+    
+    #* Delivery tracking fields
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        help_text="Delivery status"
+    )
+    
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of failed delivery attempts"
+    )
+    
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time for the next delivery attempt"
+    )
+    
+    last_error = models.TextField(
+        blank=True,
+        help_text="Error from the last failed attempt"
+    )
+    
+    #* Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Queued Email"
+        verbose_name_plural = "Email Outbox"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+    
+    #* Method to build the Django email message for delivery
+    def build_message(self, connection=None):
+        from django.core.mail import EmailMultiAlternatives
+        
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.recipients,
+            connection=connection,
+        )
+        if self.html_body:
+            message.attach_alternative(self.html_body, 'text/html')
+        return message
+    
+    #* Method to mark the email as delivered
+    def mark_sent(self):
+        self.status = 'sent'
+        self.sent_at = timezone.now()
+        self.last_error = ''
+        self.save(update_fields=['status', 'sent_at', 'last_error'])
+    
+    #* Method to record a failed attempt with exponential backoff
+    def mark_failed(self, error):
+        max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        retry_base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)
+        
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= max_attempts:
+            self.status = 'failed'
+        else:
+            self.next_attempt_at = timezone.now() + timedelta(seconds=retry_base * 2 ** (self.attempts - 1))
+        self.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+
+#? <|--------------Design Upload Model--------------|>
+class DesignUpload(models.Model):
+    """
+    Design file uploaded in chunks before the order exists
+    Chunks are streamed into a part file outside MEDIA_ROOT; once complete the file is
+    moved into storage and order items reference it by this upload's id
+    """
+    
+    #* Upload status choices
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+    
+    #* Public, unguessable reference used by the order create call
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    
+    filename = models.CharField(
+        max_length=255,
+        help_text="Original file name"
+    )
+    
+    size = models.PositiveBigIntegerField(
+        help_text="Total size in bytes declared when the upload started"
+    )
+    
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Number of bytes received so far"
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='uploading',
+        help_text="Upload status"
+    )
+    
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="SHA-256 (hex) of the whole file declared by the client, checked on completion"
+    )
+    
+    file = models.FileField(
+        upload_to='order_files/',
+        storage=get_design_file_storage,
+        null=True,
+        blank=True,
+        help_text="Assembled file, set when the upload completes"
+    )
+    
+    #* Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    attached_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When an order item started using this file"
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Design Upload"
+        verbose_name_plural = "Design Uploads"
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes, {self.status})"
+    
+    #* Method to get the path of the part file that receives the chunks
+    def get_part_path(self):
+        return os.path.join(settings.DESIGN_UPLOAD_TEMP_DIR, f'{self.pk}.part')
+
+
+#? <|--------------Design Blob Model--------------|>
+class DesignBlobQuerySet(models.QuerySet):
+    
+    def for_file_names(self, names):
+        """
+        {file name: blob} for content-addressed file names, creating the missing blobs
+        Touches updated_at so the garbage collector leaves blobs that were just reused alone
+        """
+        digests = {name: get_content_digest(name) for name in set(names)}
+        digests = {name: digest for name, digest in digests.items() if digest}
+        if not digests:
+            return {}
+        
+        self.bulk_create(
+            [DesignBlob(digest=digest, file=name) for name, digest in digests.items()],
+            ignore_conflicts=True
+        )
+        self.filter(file__in=digests).update(updated_at=timezone.now())
+        return {blob.file.name: blob for blob in self.filter(file__in=digests)}
+    
+    def add_references(self, deltas):
+        """Apply {blob id: delta} to the reference counts, one UPDATE per blob (None ids are ignored)"""
+        for blob_id, delta in deltas.items():
+            if blob_id is not None and delta:
+                self.filter(pk=blob_id).update(ref_count=F('ref_count') + delta, updated_at=timezone.now())
+
+
+class DesignBlob(models.Model):
+    """
+    One stored design file, shared by every order item (and upload) with the same content
+    ref_count counts the order items using it; `gc_design_blobs` deletes unused blobs
+    """
+    
+    digest = models.CharField(
+        max_length=64,
+        db_index=True,
+        help_text="SHA-256 (hex) of the file content"
+    )
+    
+    file = models.FileField(
+        upload_to='order_files/',
+        storage=get_design_file_storage,
+        max_length=255,
+        unique=True,
+        help_text="Content-addressed file in storage"
+    )
+    
+    #* Kept up to date with F() deltas when items are saved or deleted
+    ref_count = models.IntegerField(
+        default=0,
+        help_text="Number of order items using this file"
+    )
+    
+    #* Preview status choices (rendered by the `generate_design_previews` worker)
+    PREVIEW_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('rendering', 'Rendering'),
+        ('ready', 'Ready'),
+        ('unsupported', 'Unsupported'),
+        ('failed', 'Failed'),
+    ]
+    
+    preview_status = models.CharField(
+        max_length=12,
+        choices=PREVIEW_STATUS_CHOICES,
+        default='pending',
+        db_index=True,
+        help_text="Thumbnail generation status"
+    )
+    
+    preview = models.FileField(
+        upload_to='design_previews/',
+        blank=True,
+        help_text="Small PNG preview of the file"
+    )
+    
+    preview_metadata = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Page count, pixel dimensions or vector bounding box"
+    )
+    
+    preview_error = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text="Why the preview could not be generated"
+    )
+    
+    #* DXF/SVG only: path length, pierce count and bounding box used to pre-fill cutting fields
+    vector_analysis = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Cut analysis of vector files"
+    )
+    
+    #* STL/OBJ/3MF only: volume, surface area and bounding box used to pre-fill printing fields
+    mesh_analysis = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Volume and area analysis of 3D meshes"
+    )
+    
+    #* Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = DesignBlobQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Design Blob"
+        verbose_name_plural = "Design Blobs"
+    
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.ref_count} items)"
+
@@ -0,0 +1,81 @@
+#? Transactional email outbox for the services app
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import EmailOutbox
+from .mail_dispatch import get_dispatcher
+
+
+#* A claimed email is not due again for this long (seconds), so a worker that dies mid-send
+#* only delays it; a normal send or failure overwrites the lease right away
+CLAIM_TIMEOUT = 300
+
+
+#? <|--------------Queueing--------------|>
+
+def queue_email(subject, message, recipient_list, html_message=None, from_email=None):
+    """
+    Drop-in replacement for send_mail that only inserts an outbox row
+    The row joins the caller's transaction, so it is discarded if that transaction rolls back
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+#? <|--------------Delivery--------------|>
+
+def get_due_emails(batch_size=50):
+    """Pending emails whose next attempt time has passed, oldest first"""
+    return list(
+        EmailOutbox.objects.filter(
+            status='pending',
+            next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at', 'id')[:batch_size]
+    )
+
+
+def claim_due_emails(batch_size=50):
+    """
+    Due emails claimed by this worker: each row's next_attempt_at is moved to a lease with a
+    conditional UPDATE, so when several workers read the same rows only one wins each of them
+    """
+    lease_until = timezone.now() + timedelta(seconds=CLAIM_TIMEOUT)
+    claimed = []
+    for email in get_due_emails(batch_size):
+        won = EmailOutbox.objects.filter(
+            pk=email.pk, status='pending', next_attempt_at=email.next_attempt_at
+        ).update(next_attempt_at=lease_until)
+        if won:
+            email.next_attempt_at = lease_until
+            claimed.append(email)
+    return claimed
+
+
+def process_outbox(batch_size=50, dispatcher=None):
+    """
+    Deliver one batch of due emails over the worker's pooled connection
+    Emails are claimed first, so concurrent workers never send the same one twice
+    Returns a (sent, failed) tuple of counts for this batch
+    """
+    dispatcher = dispatcher or get_dispatcher()
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    messages = [email.build_message() for email in emails]
+
+    for email, (message, error) in zip(emails, dispatcher.send_messages(messages)):
+        if error is None:
+            email.mark_sent()
+            sent += 1
+        else:
+            email.mark_failed(error)
+            failed += 1
+
+    return sent, failed
@@ -0,0 +1,69 @@
+#? Keyset (cursor) pagination for the services app
+import base64
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+#? <|--------------Keyset Pagination--------------|>
+class KeysetPagination:
+    """
+    Cursor pagination keyed on (created_at, id), newest first
+    Each page is a single indexed range scan, so latency does not grow with the table
+    """
+
+    default_page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    max_page_size = 100
+
+    def __init__(self):
+        self.next_cursor = None
+        self.has_more = False
+
+    #* Cursor helpers
+    @staticmethod
+    def encode_cursor(obj):
+        raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, pk = raw.rsplit('|', 1)
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError
+            return created_at, int(pk)
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get('page_size')
+        if not page_size:
+            return self.default_page_size
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            raise ValueError('page_size must be an integer')
+        if page_size <= 0:
+            raise ValueError('page_size must be greater than 0')
+        return min(page_size, self.max_page_size)
+
+    #* Main method - returns the list of objects for the requested page
+    def paginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-created_at', '-id')
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+        #* Fetch one extra row to know if there is a next page without a COUNT query
+        page = list(queryset[:page_size + 1])
+        self.has_more = len(page) > page_size
+        page = page[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_more else None
+        return page
@@ -0,0 +1,276 @@
+#? Background thumbnail and metadata generation for stored design files
+import io
+import os
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import DesignBlob, OrderItem, as_price
+from .vector_files import iter_dxf_paths, iter_svg_paths, analyze_paths, get_dxf_scale
+from .mesh_files import read_mesh, analyze_mesh
+
+
+#* Longest side of a preview image, in pixels
+PREVIEW_SIZE = 256
+
+#* Previews are derived from the blob content, so the digest is a stable cache key
+PREVIEW_DIR = 'design_previews'
+
+#* A blob claimed by a worker that died is picked up again after this many seconds
+RENDER_CLAIM_TIMEOUT = 600
+
+#* Error kept on blobs requeued after a render process crashed
+WORKER_CRASHED = 'Render process crashed'
+
+
+#? <|--------------Renderers (worker processes, no database access)--------------|>
+
+def to_png(image):
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def render_image(path):
+    """Pixel dimensions and a thumbnail; draft() lets JPEG decode at a reduced scale"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        metadata = {'format': image.format, 'width': image.width, 'height': image.height}
+        image.draft('RGB', (PREVIEW_SIZE, PREVIEW_SIZE))
+        image.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGBA')
+        return to_png(image), metadata
+
+
+def render_pdf(path):
+    """Page count, first page size (points) and a render of the first page (needs PyMuPDF)"""
+    import pymupdf
+
+    with pymupdf.open(path) as document:
+        page = document[0]
+        metadata = {
+            'page_count': document.page_count,
+            'page_width': round(page.rect.width, 2),
+            'page_height': round(page.rect.height, 2),
+        }
+        zoom = PREVIEW_SIZE / max(page.rect.width, page.rect.height, 1)
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+        return pixmap.tobytes('png'), metadata
+
+
+def render_vector(path, iter_paths):
+    """
+    Cut analysis (path length, pierces, bounding box) and a line drawing of a vector file
+    The file is streamed twice (analysis, then drawing) so memory does not grow with the drawing
+    """
+    from PIL import Image, ImageDraw
+
+    header = {}
+    with open(path, 'rb') as source:
+        #* DXF units are only known once the header was read, SVG paths are already in mm
+        analysis = analyze_paths(
+            iter_paths(source, header=header),
+            unit_mm=lambda: header.get('unit_mm') or get_dxf_scale(header)
+        )
+
+    min_x, min_y, max_x, max_y = analysis['bounding_box']
+    metadata = {
+        'path_count': analysis['path_count'],
+        'bounding_box': analysis['bounding_box'],
+        'width_mm': analysis['bbox_width_mm'],
+        'height_mm': analysis['bbox_height_mm'],
+        'vector_analysis': analysis,
+    }
+
+    margin = 8
+    scale = (PREVIEW_SIZE - 2 * margin) / max(max_x - min_x, max_y - min_y, 1e-9)
+    size = (max(1, round((max_x - min_x) * scale) + 2 * margin), max(1, round((max_y - min_y) * scale) + 2 * margin))
+    image = Image.new('L', size, 255)
+    draw = ImageDraw.Draw(image)
+    with open(path, 'rb') as source:
+        for points, _ in iter_paths(source):
+            #* Drawing y grows upwards, image y grows downwards
+            draw.line(
+                [(margin + (x - min_x) * scale, size[1] - margin - (y - min_y) * scale) for x, y in points],
+                fill=0
+            )
+    return to_png(image), metadata
+
+
+def render_dxf(path):
+    return render_vector(path, iter_dxf_paths)
+
+
+def render_svg(path):
+    return render_vector(path, iter_svg_paths)
+
+
+def render_mesh(path):
+    """Volume, surface area and bounding box of a 3D mesh; no image is rendered for meshes"""
+    analysis = analyze_mesh(*read_mesh(path))
+    metadata = {
+        'triangle_count': analysis['triangle_count'],
+        'width_mm': analysis['bbox_width_mm'],
+        'depth_mm': analysis['bbox_depth_mm'],
+        'height_mm': analysis['bbox_height_mm'],
+        'mesh_analysis': analysis,
+    }
+    return None, metadata
+
+
+RENDERERS = {
+    '.png': render_image,
+    '.jpg': render_image,
+    '.jpeg': render_image,
+    '.pdf': render_pdf,
+    '.svg': render_svg,
+    '.dxf': render_dxf,
+    '.stl': render_mesh,
+    '.obj': render_mesh,
+    '.3mf': render_mesh,
+}
+
+
+def render_preview(path):
+    """(png bytes or None, metadata) for a file on disk; picklable so it can run in a process pool"""
+    renderer = RENDERERS[os.path.splitext(path)[1].lower()]
+    return renderer(path)
+
+
+#? <|--------------Queue--------------|>
+
+def get_pending_blobs(batch_size=20):
+    """Pending blobs, and blobs whose render claim expired, oldest first"""
+    stale = timezone.now() - timedelta(seconds=RENDER_CLAIM_TIMEOUT)
+    return list(DesignBlob.objects.filter(
+        Q(preview_status='pending') | Q(preview_status='rendering', updated_at__lt=stale)
+    ).order_by('created_at')[:batch_size])
+
+
+def claim_pending_blobs(batch_size=20):
+    """
+    Pending blobs claimed by this worker (status 'rendering') with a conditional UPDATE,
+    so when several workers read the same rows only one renders each of them
+    """
+    claimed = []
+    now = timezone.now()
+    for blob in get_pending_blobs(batch_size):
+        won = DesignBlob.objects.filter(
+            pk=blob.pk, preview_status=blob.preview_status, updated_at=blob.updated_at
+        ).update(preview_status='rendering', updated_at=now)
+        if won:
+            blob.preview_status, blob.updated_at = 'rendering', now
+            claimed.append(blob)
+    return claimed
+
+
+def get_preview_name(blob):
+    return f'{PREVIEW_DIR}/{blob.digest[:2]}/{blob.digest}.png'
+
+
+def save_preview(blob, png, metadata):
+    """
+    Store the rendered preview (reusing one already on disk) and mark the blob ready
+    Vector/mesh analysis is kept on the blob and pre-fills the items already using it
+    """
+    if png is not None:
+        name = get_preview_name(blob)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(png))
+        blob.preview.name = name
+    blob.vector_analysis = metadata.pop('vector_analysis', {})
+    blob.mesh_analysis = metadata.pop('mesh_analysis', {})
+    blob.preview_metadata = metadata
+    blob.preview_status = 'ready'
+    blob.preview_error = ''
+    blob.save(update_fields=[
+        'preview', 'preview_metadata', 'vector_analysis', 'mesh_analysis', 'preview_status', 'preview_error'
+    ])
+    if blob.vector_analysis or blob.mesh_analysis:
+        apply_analysis_to_items(blob)
+
+
+def apply_analysis_to_items(blob):
+    """
+    Pre-fill the cutting/printing fields of items of pending orders that use this file
+    An estimate that was calculated from the defaults is recalculated from the measured values
+    """
+    items = OrderItem.objects.filter(design_blob=blob, order__state='pending').select_related('service', 'order')
+    for item in items:
+        default_price = as_price(item.calculate_service_price())
+        if item.apply_design_analysis(blob):
+            if as_price(item.estimated_unit_price) == default_price:
+                item.estimated_unit_price = None
+            item.save()
+
+
+def mark_preview_failed(blob, status, error):
+    blob.preview_status = status
+    blob.preview_error = str(error)[:500]
+    blob.save(update_fields=['preview_status', 'preview_error'])
+
+
+def requeue_after_crash(blobs):
+    """
+    Put the blobs of a crashed pool back in the queue; the crash can't be pinned on one file,
+    so a blob already requeued once is failed instead, and a file that kills the renderer
+    can't crash every pool after it
+    """
+    for blob in blobs:
+        if blob.preview_error == WORKER_CRASHED:
+            mark_preview_failed(blob, 'failed', WORKER_CRASHED)
+        else:
+            blob.preview_status = 'pending'
+            blob.preview_error = WORKER_CRASHED
+            blob.save(update_fields=['preview_status', 'preview_error'])
+
+
+def process_previews(batch_size=20, executor=None):
+    """
+    Render one batch of pending previews, in `executor` (a process pool) when given
+    Workers only read files and return bytes; all database writes happen here
+    Returns a (ready, failed) tuple of counts for this batch
+    Raises BrokenProcessPool (after requeueing the unfinished blobs) when a render process died;
+    the pool is then unusable and the caller has to create a new one
+    """
+    ready = failed = 0
+    jobs = []
+    for blob in claim_pending_blobs(batch_size):
+        extension = os.path.splitext(blob.file.name)[1].lower()
+        if extension not in RENDERERS:
+            mark_preview_failed(blob, 'unsupported', f'No preview for {extension or "files without extension"}')
+            continue
+        jobs.append((blob, blob.file.path))
+
+    try:
+        if executor:
+            jobs = [(blob, executor.submit(render_preview, path)) for blob, path in jobs]
+        for blob, job in jobs:
+            try:
+                png, metadata = job.result() if executor else render_preview(job)
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                mark_preview_failed(blob, 'failed', e)
+                failed += 1
+            else:
+                try:
+                    #* The blob and its pre-filled items are saved together, or neither is
+                    with transaction.atomic():
+                        save_preview(blob, png, metadata)
+                except Exception as e:
+                    mark_preview_failed(blob, 'failed', e)
+                    failed += 1
+                else:
+                    ready += 1
+    except BrokenProcessPool:
+        #* Blobs already saved or failed are done, the rest is rendered again by the next pool
+        requeue_after_crash([blob for blob, _ in jobs if blob.preview_status == 'rendering'])
+        raise
+
+    return ready, failed
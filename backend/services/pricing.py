@@ -0,0 +1,330 @@
+#? Batch pricing engine for the services app
+import math
+from functools import lru_cache
+import numpy as np
+
+
+#? <|--------------Column Definitions--------------|>
+
+#* Columns loaded from OrderItem to price a batch of items
+PRICING_COLUMNS = [
+    'id',
+    'service__type',
+    'service__base_price',
+    'length_dimensions',
+    'width_dimensions',
+
+    #* Plasma cutting fields
+    'plasma_design_programming_time',
+    'plasma_cutting_time',
+    'plasma_post_process_time',
+    'plasma_material_cost',
+    'plasma_consumables',
+
+    #* Laser cutting/engraving fields
+    'laser_design_programming_time',
+    'laser_cutting_time',
+    'laser_post_process_time',
+    'laser_material_cost',
+    'laser_consumables',
+
+    #* 3D printing fields
+    'printing_design_programming_time',
+    'printing_time',
+    'printing_material_used',
+    'printing_post_process_time',
+    'printing_material_cost',
+    'printing_consumables',
+]
+
+
+#? <|--------------Column Helpers--------------|>
+
+def _as_float_array(values):
+    """Convert a column of ints/Decimals/None to float64, None becomes 0"""
+    return np.array([float(v) if v else 0.0 for v in values], dtype=np.float64)
+
+
+def _or_default(column, default):
+    """Vectorized `value or default` - zero and missing values take the default"""
+    return np.where(column != 0, column, default)
+
+
+def build_columns(rows):
+    """
+    Build a columnar dict of float arrays from an iterable of dicts
+    (e.g. `queryset.values(*PRICING_COLUMNS)`)
+    """
+    rows = list(rows)
+    columns = {}
+    for name in PRICING_COLUMNS:
+        if name == 'service__type':
+            columns[name] = np.array([(row.get(name) or '').lower() for row in rows], dtype=object)
+        elif name == 'id':
+            columns[name] = np.array([row.get(name) for row in rows], dtype=object)
+        else:
+            columns[name] = _as_float_array(row.get(name) for row in rows)
+    return columns
+
+
+def get_area_square_inches(columns):
+    """Vectorized OrderItem.get_area_square_inches"""
+    length = columns['length_dimensions']
+    width = columns['width_dimensions']
+    return np.where((length != 0) & (width != 0), length * width, 0.0)
+
+
+#? <|--------------Vectorized Formulas--------------|>
+
+def calculate_plasma_prices(columns):
+    """Vectorized OrderItem.calculate_plasma_price"""
+    A = _or_default(columns['plasma_design_programming_time'], 60)
+    B = _or_default(columns['plasma_cutting_time'], 30)
+    C = _or_default(columns['plasma_post_process_time'], 60)
+    D = 0.09524 * B
+    E = columns['plasma_material_cost']
+    F = get_area_square_inches(columns)
+    G = _or_default(columns['plasma_consumables'], 162.30)
+
+    subtotal = ((A * 3.33) + (B * 16.5) + (C * 1.5) + (D * 0.03211) + (((E * F) / 4608) * 2) + G) * 1.3
+    return subtotal * 1.08
+
+
+def calculate_laser_prices(columns):
+    """Vectorized OrderItem.calculate_laser_price"""
+    A = _or_default(columns['laser_design_programming_time'], 30)
+    B = _or_default(columns['laser_cutting_time'], 10)
+    C = _or_default(columns['laser_post_process_time'], 10)
+    D = 0.09524 * B
+    E = columns['laser_material_cost']
+    F = get_area_square_inches(columns)
+    G = _or_default(columns['laser_consumables'], 30.00)
+
+    subtotal = ((A * 1.2) + (B * 1.7) + (C * 1) + (D * 0.03211) + (((E * F) / 4608) * 2) + G) * 1.3
+    return subtotal * 1.08
+
+
+def calculate_printing_prices(columns):
+    """Vectorized OrderItem.calculate_printing_price"""
+    A = _or_default(columns['printing_design_programming_time'], 60)
+    B = _or_default(columns['printing_time'], 30)
+    C = columns['printing_material_used']
+    D = _or_default(columns['printing_post_process_time'], 60)
+    F = _or_default(columns['printing_material_cost'], 350.00)
+    G = _or_default(columns['printing_consumables'], 30.00)
+
+    subtotal = ((A * 2.7) + (B * 1.9) + (C / 1000) * F + (D * 1.5) + G) * 1.3
+    return subtotal * 1.08
+
+
+def calculate_service_prices(columns):
+    """
+    Vectorized OrderItem.calculate_service_price
+    Dispatches each row to its formula using the same service type rules
+    """
+    service_types = columns['service__type']
+    is_plasma = np.array(['plasma' in t for t in service_types], dtype=bool)
+    is_laser = np.array(['laser' in t for t in service_types], dtype=bool)
+    is_printing = np.array([any(x in t for x in ['3d', 'printing', 'resin']) for t in service_types], dtype=bool)
+
+    #* Rows without a formula fall back to the service base price
+    prices = columns['service__base_price'].copy()
+    prices = np.where(is_printing, calculate_printing_prices(columns), prices)
+    prices = np.where(is_laser, calculate_laser_prices(columns), prices)
+    prices = np.where(is_plasma, calculate_plasma_prices(columns), prices)
+    return prices
+
+
+#? <|--------------Scalar Formulas--------------|>
+
+#* PRICING_COLUMNS a caller can provide for one item (the service columns come from the catalog)
+PRICING_INPUTS = [name for name in PRICING_COLUMNS if name != 'id' and not name.startswith('service__')]
+
+
+def _input(row, name, default=0.0):
+    """Scalar `value or default` for one pricing input (None and zero take the default)"""
+    value = row.get(name)
+    return float(value) if value else default
+
+
+def calculate_area_square_inches(row):
+    """OrderItem.get_area_square_inches for one PRICING_COLUMNS row"""
+    length = _input(row, 'length_dimensions')
+    width = _input(row, 'width_dimensions')
+    return length * width if length and width else 0
+
+
+def calculate_plasma_price(row):
+    A = _input(row, 'plasma_design_programming_time', 60)
+    B = _input(row, 'plasma_cutting_time', 30)
+    C = _input(row, 'plasma_post_process_time', 60)
+    D = 0.09524 * B
+    E = _input(row, 'plasma_material_cost')
+    F = calculate_area_square_inches(row)
+    G = _input(row, 'plasma_consumables', 162.30)
+
+    subtotal = ((A * 3.33) + (B * 16.5) + (C * 1.5) + (D * 0.03211) + (((E * F) / 4608) * 2) + G) * 1.3
+    return subtotal * 1.08
+
+
+def calculate_laser_price(row):
+    A = _input(row, 'laser_design_programming_time', 30)
+    B = _input(row, 'laser_cutting_time', 10)
+    C = _input(row, 'laser_post_process_time', 10)
+    D = 0.09524 * B
+    E = _input(row, 'laser_material_cost')
+    F = calculate_area_square_inches(row)
+    G = _input(row, 'laser_consumables', 30.00)
+
+    subtotal = ((A * 1.2) + (B * 1.7) + (C * 1) + (D * 0.03211) + (((E * F) / 4608) * 2) + G) * 1.3
+    return subtotal * 1.08
+
+
+def calculate_printing_price(row):
+    A = _input(row, 'printing_design_programming_time', 60)
+    B = _input(row, 'printing_time', 30)
+    C = _input(row, 'printing_material_used')
+    D = _input(row, 'printing_post_process_time', 60)
+    F = _input(row, 'printing_material_cost', 350.00)
+    G = _input(row, 'printing_consumables', 30.00)
+
+    subtotal = ((A * 2.7) + (B * 1.9) + (C / 1000) * F + (D * 1.5) + G) * 1.3
+    return subtotal * 1.08
+
+
+def calculate_service_price(row):
+    """
+    Unit price of one PRICING_COLUMNS row (OrderItem.calculate_service_price)
+    Pure function: no model instances or database access needed
+    """
+    service_type = (row.get('service__type') or '').lower()
+
+    if 'plasma' in service_type:
+        return calculate_plasma_price(row)
+    elif 'laser' in service_type:
+        return calculate_laser_price(row)
+    elif any(x in service_type for x in ['3d', 'printing', 'resin']):
+        return calculate_printing_price(row)
+    else:
+        return _input(row, 'service__base_price')
+
+
+#? <|--------------Quote Preview--------------|>
+
+#* Distinct inputs remembered per process; a cart edit usually re-prices the same few items
+QUOTE_MEMO_SIZE = 1024
+
+
+def normalize_pricing_row(row):
+    """
+    Hashable key for a pricing row: floats for every input, missing/zero inputs as 0.0
+    (the formulas treat them alike), so equivalent carts share one memo entry
+    """
+    key = [
+        ('service__type', (row.get('service__type') or '').lower()),
+        ('service__base_price', _input(row, 'service__base_price')),
+    ]
+    for name in PRICING_INPUTS:
+        value = _input(row, name)
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f'{name} must be a non-negative number')
+        key.append((name, round(value, 4)))
+    return tuple(key)
+
+
+@lru_cache(maxsize=QUOTE_MEMO_SIZE)
+def _quote_normalized_row(key):
+    return calculate_service_price(dict(key))
+
+
+def quote_unit_price(row):
+    """Memoized calculate_service_price for untrusted rows (raises ValueError on bad inputs)"""
+    return _quote_normalized_row(normalize_pricing_row(row))
+
+
+#? <|--------------Cut Time Estimates--------------|>
+
+#* Typical feed rate (mm/min) and seconds per pierce used to turn a vector analysis into minutes
+CUTTING_RATES = {
+    'plasma': {'feed_mm_per_min': 2000.0, 'pierce_seconds': 1.5},
+    'laser': {'feed_mm_per_min': 1200.0, 'pierce_seconds': 0.5},
+}
+
+
+def estimate_cutting_minutes(analysis, process):
+    """Cutting minutes for a vector analysis (path length + pierces) on 'plasma' or 'laser'"""
+    rates = CUTTING_RATES[process]
+    return (
+        analysis['path_length_mm'] / rates['feed_mm_per_min']
+        + analysis['pierce_count'] * rates['pierce_seconds'] / 60
+    )
+
+
+#? <|--------------Print Estimates--------------|>
+
+#* Slicer-style assumptions used to turn a mesh analysis into grams and minutes
+PRINTING_PROFILES = {
+    #* FDM: solid walls, sparse infill inside, limited by the volumetric flow of the nozzle
+    'fdm': {
+        'density_g_cm3': 1.24,
+        'wall_mm': 1.2,
+        'infill': 0.2,
+        'flow_mm3_per_s': 8.0,
+        'setup_minutes': 10,
+    },
+    #* Resin: solid part, every layer takes the same time whatever its area
+    'resin': {
+        'density_g_cm3': 1.1,
+        'layer_mm': 0.05,
+        'layer_seconds': 8.0,
+        'setup_minutes': 10,
+    },
+}
+
+
+def estimate_printing(analysis, process):
+    """(material grams, print minutes) for a mesh analysis on 'fdm' or 'resin'"""
+    profile = PRINTING_PROFILES[process]
+    volume = analysis['volume_mm3']
+
+    if process == 'resin':
+        material = volume
+        minutes = math.ceil(analysis['bbox_height_mm'] / profile['layer_mm']) * profile['layer_seconds'] / 60
+    else:
+        shell = min(volume, analysis['surface_area_mm2'] * profile['wall_mm'])
+        material = shell + (volume - shell) * profile['infill']
+        minutes = material / profile['flow_mm3_per_s'] / 60
+
+    grams = material / 1000 * profile['density_g_cm3']
+    return grams, minutes + profile['setup_minutes']
+
+
+#? <|--------------Queryset Entry Points--------------|>
+
+def price_order_items(queryset):
+    """
+    Price every item of an OrderItem queryset in one pass
+    Returns a dict of {item_id: price}
+    """
+    columns = build_columns(queryset.values(*PRICING_COLUMNS))
+    prices = calculate_service_prices(columns)
+    return {item_id: float(price) for item_id, price in zip(columns['id'], prices)}
+
+
+def get_item_pricing_row(item):
+    """PRICING_COLUMNS row for an OrderItem instance (it does not need to be saved)"""
+    row = {name: getattr(item, name) for name in PRICING_COLUMNS if '__' not in name}
+    row['service__type'] = item.service.type
+    row['service__base_price'] = item.service.base_price
+    return row
+
+
+def price_unsaved_items(items):
+    """
+    Price a list of OrderItem instances in one pass, e.g. before bulk_create
+    Returns a list of prices in the same order as the items
+    """
+    if not items:
+        return []
+    columns = build_columns(get_item_pricing_row(item) for item in items)
+    return [float(price) for price in calculate_service_prices(columns)]
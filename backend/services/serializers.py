@@ -169,6 +169,10 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only=True
     )
     
+    #* Thumbnail and metadata rendered in the background (None until ready)
+    design_preview = serializers.SerializerMethodField()
+    design_metadata = serializers.SerializerMethodField()
+    
     class Meta:
         model = OrderItem
         fields = [
@@ -178,6 +182,8 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'service_type',
             'description',
             'design_file',
+            'design_preview',
+            'design_metadata',
             'quantity',
             'length_dimensions',
             'width_dimensions',
@@ -220,7 +226,24 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'estimated_total_price',
             'final_total_price',
             'formatted_total_price',
+            'design_preview',
+            'design_metadata',
         ]
+    
+    def get_ready_design_blob(self, obj):
+        blob = obj.design_blob if obj.design_blob_id else None
+        return blob if blob is not None and blob.preview_status == 'ready' else None
+    
+    def get_design_preview(self, obj):
+        blob = self.get_ready_design_blob(obj)
+        if blob is None or not blob.preview:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(blob.preview.url) if request else blob.preview.url
+    
+    def get_design_metadata(self, obj):
+        blob = self.get_ready_design_blob(obj)
+        return blob.preview_metadata if blob is not None else None
 
 
 #? <|--------------Order Create Serializer--------------|>
@@ -244,13 +267,9 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-        
-        #* Create each order item
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
         
-        return order
+        #* Create the order and all its items in bulk
+        return Order.create_with_items(items_data, **validated_data)
 
 
 #? <|--------------Order Detail Serializer--------------|>
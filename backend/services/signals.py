@@ -1,39 +1,51 @@
 #? Signal handlers for order state changes and email notifications
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
-from .models import Order
+from .models import Order, OrderItem, TypeService, CompanyConfiguration, DesignBlob
+from .outbox import queue_email
+from .catalog_cache import invalidate_catalog
 
 #? <|--------------Email Signal Handlers--------------|>
 
 @receiver(pre_save, sender=Order)
-def track_order_state_changes(sender, instance, **kwargs):
+def track_order_state_changes(sender, instance, update_fields=None, **kwargs):
     """
     Track when order state changes to send appropriate emails
+    Compares against the values snapshotted when the order was loaded, so no extra query is needed
     """
-    if instance.pk:  #* Only for existing orders
-        try:
-            old_order = Order.objects.get(pk=instance.pk)
-            
-            #* Check if state changed
-            if old_order.state != instance.state:
-                instance._state_changed = True
-                instance._old_state = old_order.state
-            else:
-                instance._state_changed = False
-                
-            #* Check if final price was just set
-            if not old_order.final_price and instance.final_price:
-                instance._final_price_set = True
-            else:
-                instance._final_price_set = False
-                
-        except Order.DoesNotExist:
-            instance._state_changed = False
-            instance._final_price_set = False
+    instance._state_changed = False
+    instance._final_price_set = False
+    
+    if not instance.pk:  #* Only for existing orders
+        return
+    
+    #* Saves that don't write state or final price can't trigger emails
+    if update_fields is not None and not set(Order.TRACKED_FIELDS) & set(update_fields):
+        return
+    
+    loaded_values = getattr(instance, '_loaded_values', {})
+    if all(field in loaded_values for field in Order.TRACKED_FIELDS):
+        old_state = loaded_values['state']
+        old_final_price = loaded_values['final_price']
+    else:
+        #* Fallback for instances built by hand or loaded with deferred fields
+        old_values = Order.objects.filter(pk=instance.pk).values_list('state', 'final_price').first()
+        if old_values is None:
+            return
+        old_state, old_final_price = old_values
+    
+    #* Check if state changed (only when this save writes it)
+    if (update_fields is None or 'state' in update_fields) and old_state != instance.state:
+        instance._state_changed = True
+        instance._old_state = old_state
+    
+    #* Check if final price was just set
+    if (update_fields is None or 'final_price' in update_fields) and not old_final_price and instance.final_price:
+        instance._final_price_set = True
 
 @receiver(post_save, sender=Order)
 def send_order_emails(sender, instance, created, **kwargs):
@@ -73,6 +85,46 @@ def send_order_emails(sender, instance, created, **kwargs):
         elif instance.state == 'canceled':
             send_cancellation_email(instance)
 
+#? <|--------------Order Totals Maintenance--------------|>
+
+@receiver(post_delete, sender=OrderItem)
+def remove_item_from_order_totals(sender, instance, origin=None, **kwargs):
+    """Subtract a deleted item from its order totals (also covers queryset and inline deletes)"""
+    #* Nothing to update when the whole order is being deleted
+    if isinstance(origin, Order) or getattr(origin, 'model', None) is Order:
+        return
+    instance.update_order_totals(deleted=True)
+
+@receiver(post_delete, sender=OrderItem)
+def release_design_blob(sender, instance, **kwargs):
+    """Drop the deleted item's reference to its design blob (also when the whole order is deleted)"""
+    if instance.design_blob_id:
+        DesignBlob.objects.add_references({instance.design_blob_id: -1})
+
+#? <|--------------Catalog Cache Invalidation--------------|>
+
+@receiver(post_save, sender=TypeService)
+@receiver(post_delete, sender=TypeService)
+@receiver(post_save, sender=CompanyConfiguration)
+@receiver(post_delete, sender=CompanyConfiguration)
+def invalidate_catalog_on_change(sender, **kwargs):
+    """
+    Drop cached catalog payloads whenever a service or the company configuration changes
+    Only after the commit: a miss before it would cache the old data under the new version
+    """
+    transaction.on_commit(invalidate_catalog)
+
+@receiver(post_save, sender=Order)
+def invalidate_homepage_stats(sender, instance, **kwargs):
+    """The homepage stats count completed orders, so refresh them when that count changes"""
+    if getattr(instance, '_state_changed', False) and 'completed' in (instance.state, instance._old_state):
+        transaction.on_commit(invalidate_catalog)
+
+@receiver(post_delete, sender=Order)
+def invalidate_homepage_stats_on_delete(sender, instance, **kwargs):
+    if instance.state == 'completed':
+        transaction.on_commit(invalidate_catalog)
+
 #? <|--------------Email Helper Functions--------------|>
 
 def send_order_confirmation_email(order):
@@ -90,20 +142,19 @@ def send_order_confirmation_email(order):
         html_message = render_to_string('emails/welcome_email.html', context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=f"¡Pedido Recibido! - {order.order_number} | AGAH Solutions",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        print(f"Welcome/confirmation email sent for order {order.order_number}")
+        print(f"Welcome/confirmation email queued for order {order.order_number}")
         return True
         
     except Exception as e:
-        print(f"Error sending confirmation email: {e}")
+        print(f"Error queueing confirmation email: {e}")
         return False
 
 def send_estimate_email(order):
@@ -125,20 +176,19 @@ def send_estimate_email(order):
         html_message = render_to_string('emails/order_estimate.html', context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=f"Cotización Lista - {order.order_number} | AGAH Solutions",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        print(f"Estimate email sent for order {order.order_number}")
+        print(f"Estimate email queued for order {order.order_number}")
         return True
         
     except Exception as e:
-        print(f"Error sending estimate email: {e}")
+        print(f"Error queueing estimate email: {e}")
         return False
 
 def send_final_price_email(order):
@@ -157,20 +207,19 @@ def send_final_price_email(order):
         html_message = render_to_string('emails/order_final_price.html', context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=f"Precio Final - {order.order_number} | AGAH Solutions",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        print(f"Final price email sent for order {order.order_number}")
+        print(f"Final price email queued for order {order.order_number}")
         return True
         
     except Exception as e:
-        print(f"Error sending final price email: {e}")
+        print(f"Error queueing final price email: {e}")
         return False
 
 def send_confirmed_email(order):
@@ -189,20 +238,19 @@ def send_confirmed_email(order):
         html_message = render_to_string('emails/order_confirmation.html', context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=f"¡Pedido Confirmado! - {order.order_number} | AGAH Solutions",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        print(f"Order confirmed email sent for order {order.order_number}")
+        print(f"Order confirmed email queued for order {order.order_number}")
         return True
         
     except Exception as e:
-        print(f"Error sending confirmed email: {e}")
+        print(f"Error queueing confirmed email: {e}")
         return False
 
 def send_in_progress_email(order):
@@ -220,20 +268,19 @@ def send_in_progress_email(order):
         html_message = render_to_string('emails/order_in_progres.html', context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=f"En Producción - {order.order_number} | AGAH Solutions",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        print(f"In progress email sent for order {order.order_number}")
+        print(f"In progress email queued for order {order.order_number}")
         return True
         
     except Exception as e:
-        print(f"Error sending in progress email: {e}")
+        print(f"Error queueing in progress email: {e}")
         return False
 
 def send_completion_email(order):
@@ -250,20 +297,19 @@ def send_completion_email(order):
         html_message = render_to_string('emails/order_completed.html', context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=f"¡Pedido Completado! - {order.order_number} | AGAH Solutions",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        print(f"Completion email sent for order {order.order_number}")
+        print(f"Completion email queued for order {order.order_number}")
         return True
         
     except Exception as e:
-        print(f"Error sending completion email: {e}")
+        print(f"Error queueing completion email: {e}")
         return False
 
 def send_cancellation_email(order):
@@ -280,18 +326,17 @@ def send_cancellation_email(order):
         html_message = render_to_string('emails/order_canceld.html', context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=f"Pedido Cancelado - {order.order_number} | AGAH Solutions",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        print(f"Cancellation email sent for order {order.order_number}")
+        print(f"Cancellation email queued for order {order.order_number}")
         return True
         
     except Exception as e:
-        print(f"Error sending cancellation email: {e}")
+        print(f"Error queueing cancellation email: {e}")
         return False
\ No newline at end of file
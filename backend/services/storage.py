@@ -0,0 +1,104 @@
+#? Content-addressed file storage for design files
+import hashlib
+import os
+import re
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+try:
+    import fcntl
+except ImportError:  #* Windows
+    fcntl = None
+    import msvcrt
+
+
+#* Stored files live under <upload_to>/sha256/<first 2 digest chars>/<digest><ext>
+CONTENT_DIR = 'sha256'
+CONTENT_NAME_RE = re.compile(r'(?:^|/)' + CONTENT_DIR + r'/[0-9a-f]{2}/([0-9a-f]{64})(?:\.[^/.]+)?$')
+
+HASH_BUFFER_SIZE = 64 * 1024
+
+
+def get_content_digest(name):
+    """SHA-256 hex digest encoded in a content-addressed file name, None for other names"""
+    match = CONTENT_NAME_RE.search(name or '')
+    return match.group(1) if match else None
+
+
+def hash_content(content):
+    """SHA-256 hex digest of a File, read from its temporary file when it has one"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'temporary_file_path'):
+        with open(content.temporary_file_path(), 'rb') as source:
+            for block in iter(lambda: source.read(HASH_BUFFER_SIZE), b''):
+                digest.update(block)
+    else:
+        for block in content.chunks(HASH_BUFFER_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def lock_file(file, blocking=True):
+    """
+    Exclusive lock on an open file, released when the file is closed
+    Returns False when blocking=False and another process holds it
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+@contextmanager
+def content_lock(digest):
+    """
+    Lock held while stored content is reused (storage) or deleted (garbage collector)
+    Striped by the first digest byte, so there are at most 256 lock files
+    """
+    lock_dir = os.path.join(settings.DESIGN_UPLOAD_TEMP_DIR, 'locks')
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, digest[:2] + '.lock'), 'a+b') as lock:
+        lock_file(lock)
+        yield
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names files by the SHA-256 of their content
+    Saving bytes that are already stored returns the existing name without writing anything
+    (only touching its mtime); callers that already know the digest can set it as
+    `content.sha256` to skip hashing
+    """
+
+    def get_content_name(self, name, digest):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, CONTENT_DIR, digest[:2], digest + extension).replace('\\', '/')
+
+    def _save(self, name, content):
+        digest = getattr(content, 'sha256', None) or hash_content(content)
+        name = self.get_content_name(name, digest)
+        with content_lock(digest):
+            if self.exists(name):
+                #* A fresh mtime tells the garbage collector the file is wanted again
+                os.utime(self.path(name))
+                return name
+
+            saved_name = super()._save(name, content)
+        if saved_name != name:
+            #* Another request stored the same bytes meanwhile, keep a single copy
+            self.delete(saved_name)
+        return name
+
+
+design_file_storage = ContentAddressedStorage()
+
+
+def get_design_file_storage():
+    """Storage for design files (callable so migrations don't serialize the instance)"""
+    return design_file_storage
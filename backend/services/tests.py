@@ -1,3 +1,1557 @@
-from django.test import TestCase
+#? Tests for the services app
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+import csv
+import base64
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import mock
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from .models import TypeService, Order, OrderItem, EmailOutbox, CompanyConfiguration, DesignUpload, DesignBlob, as_price
+from .pricing import price_order_items, estimate_printing
+from .mesh_files import STL_TRIANGLE_DTYPE
+from .outbox import queue_email, process_outbox, get_due_emails, claim_due_emails
+from .mail_dispatch import EmailDispatcher
+from .db_router import ReplicaRouter, ReplicaReadMixin, use_database_for_reads
+from .catalog_cache import get_cached_payload
+from .imports import import_orders, ImportReadError
+from .previews import process_previews, claim_pending_blobs
+from .uploads import UploadError, create_upload, append_chunk, complete_upload
+from .storage import lock_file
+from .management.commands.gc_design_blobs import Command as CollectDesignBlobsCommand
+from .serializers import OrderItemSerializer
 
-# Create your tests here.
+
+#? <|--------------Batch Pricing Engine Tests--------------|>
+class BatchPricingTests(TestCase):
+
+    def setUp(self):
+        self.plasma = TypeService.objects.create(name='Plasma Cutting', type='plasma')
+        self.laser = TypeService.objects.create(name='Laser Cutting', type='laser_cutting')
+        self.printing = TypeService.objects.create(name='3D Printing', type='3D_printing')
+        self.other = TypeService.objects.create(name='Welding', type='welding', base_price=Decimal('125.50'))
+        self.order = Order.objects.create(customer_name='Test', customer_email='test@example.com')
+
+    def test_batch_prices_match_per_item_methods(self):
+        OrderItem.objects.create(order=self.order, service=self.plasma)
+        OrderItem.objects.create(
+            order=self.order, service=self.plasma,
+            length_dimensions=Decimal('12.50'), width_dimensions=Decimal('8.25'),
+            plasma_cutting_time=45, plasma_material_cost=Decimal('1899.99'), plasma_consumables=None
+        )
+        OrderItem.objects.create(
+            order=self.order, service=self.laser,
+            length_dimensions=Decimal('4.00'), width_dimensions=Decimal('0'),
+            laser_design_programming_time=0, laser_material_cost=Decimal('310.40')
+        )
+        OrderItem.objects.create(
+            order=self.order, service=self.printing,
+            printing_material_used=Decimal('87.35'), printing_time=None, printing_material_cost=Decimal('420.00')
+        )
+        OrderItem.objects.create(order=self.order, service=self.other)
+
+        batch_prices = price_order_items(OrderItem.objects.all())
+
+        for item in OrderItem.objects.select_related('service'):
+            self.assertEqual(batch_prices[item.id], item.calculate_service_price())
+
+
+#? <|--------------Bulk Order Creation Tests--------------|>
+class BulkOrderCreationTests(TestCase):
+
+    def setUp(self):
+        self.laser = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+
+    def test_create_with_items_computes_totals_once(self):
+        items_data = [
+            {'service': self.laser, 'quantity': index + 1, 'needs_custom_design': index % 2 == 0,
+             'custom_design_price': Decimal('150.00')}
+            for index in range(10)
+        ]
+
+        order = Order.create_with_items(items_data, customer_name='Bulk', customer_email='bulk@example.com')
+
+        order.refresh_from_db()
+        self.assertEqual(order.items.count(), 10)
+        self.assertAlmostEqual(float(order.estimaded_price), order.get_estimated_total_price(), places=2)
+        self.assertAlmostEqual(float(order.final_price), order.get_final_total_price(), places=2)
+
+    def test_item_save_can_defer_order_totals(self):
+        order = Order.objects.create(customer_name='Deferred', customer_email='deferred@example.com')
+
+        OrderItem(order=order, service=self.laser).save(update_order_totals=False)
+
+        order.refresh_from_db()
+        self.assertIsNone(order.estimaded_price)
+        order.update_totals()
+        self.assertAlmostEqual(float(order.estimaded_price), order.get_estimated_total_price(), places=2)
+
+
+#? <|--------------Order List Query Count Tests--------------|>
+class OrderListQueryCountTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            email='staff@example.com', password='secret123', is_staff=True, user_type='staff'
+        )
+        self.services = [
+            TypeService.objects.create(name='Plasma Cutting', type='plasma'),
+            TypeService.objects.create(name='Resin Printing', type='resin_printing'),
+        ]
+
+    def create_orders(self, count):
+        for index in range(count):
+            Order.create_with_items(
+                [{'service': service, 'quantity': 2} for service in self.services],
+                customer_name=f'Customer {index}',
+                customer_email='customer@example.com',
+            )
+
+    def test_admin_order_list_runs_constant_queries(self):
+        self.create_orders(25)
+        self.client.force_authenticate(self.staff)
+
+        #* Orders + items + services, regardless of how many orders exist
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/admin/orders/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 20)
+
+    #* Count on the primary even when a replica is configured
+    @override_settings(REPLICA_DATABASE_ALIAS=None)
+    def test_customer_order_list_runs_constant_queries(self):
+        self.create_orders(25)
+
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/orders/customer/', {'email': 'customer@example.com'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']), 25)
+
+
+#? <|--------------Admin Order List Pagination Tests--------------|>
+class AdminOrderListPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            email='admin@example.com', password='secret123', is_staff=True, user_type='admin'
+        )
+        self.client.force_authenticate(self.staff)
+        for index in range(7):
+            Order.objects.create(
+                customer_name=f'Customer {index}',
+                customer_email='First@Example.com' if index % 2 else 'second@example.com',
+                state='completed' if index < 3 else 'pending',
+            )
+
+    def test_cursor_walks_every_order_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 3}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.client.get('/api/admin/orders/', params).json()
+            seen.extend(order['id'] for order in body['data'])
+            cursor = body['next_cursor']
+            if not body['has_more']:
+                break
+
+        expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_server_side_filters(self):
+        body = self.client.get('/api/admin/orders/', {'state': 'completed'}).json()
+        self.assertEqual(body['count'], 3)
+
+        body = self.client.get('/api/admin/orders/', {'customer_email': 'first@example.com'}).json()
+        self.assertEqual(body['count'], 3)
+
+        body = self.client.get('/api/admin/orders/', {'created_before': '2000-01-01'}).json()
+        self.assertEqual(body['count'], 0)
+
+    def test_invalid_filter_returns_400(self):
+        response = self.client.get('/api/admin/orders/', {'state': 'unknown'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/admin/orders/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+#? <|--------------Email Outbox Tests--------------|>
+class EmailOutboxTests(TestCase):
+
+    def test_order_emails_are_queued_not_sent(self):
+        order = Order.objects.create(customer_name='Queued', customer_email='queued@example.com')
+        order.state = 'canceled'
+        order.save()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(EmailOutbox.objects.filter(recipients=['queued@example.com'], status='pending').exists())
+
+    def test_worker_delivers_pending_emails(self):
+        queue_email('Hello', 'Plain body', ['customer@example.com'], html_message='<p>Hello</p>')
+
+        call_command('send_queued_emails', stdout=mock.Mock())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], '<p>Hello</p>')
+        self.assertEqual(EmailOutbox.objects.get().status, 'sent')
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        email = queue_email('Hello', 'Plain body', ['customer@example.com'])
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('SMTP down')):
+            self.assertEqual(process_outbox(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        #* Not due yet, so the next pass skips it
+        self.assertEqual(process_outbox(), (0, 0))
+
+    def test_each_email_is_claimed_by_one_worker(self):
+        queue_email('Hello', 'Plain body', ['customer@example.com'])
+        #* Rows a second worker read before the first one claimed them
+        stale_rows = get_due_emails()
+
+        self.assertEqual(len(claim_due_emails()), 1)
+        with mock.patch('services.outbox.get_due_emails', return_value=stale_rows):
+            self.assertEqual(process_outbox(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_confirmation_email_is_queued_with_the_order(self):
+        from django.db import DatabaseError
+        service = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+        payload = {
+            'customer_name': 'Ana',
+            'customer_email': 'ana@example.com',
+            'customer_phone': '555-0100',
+            'items': json.dumps([{'service': service.id, 'quantity': 1, 'description': 'Plate'}]),
+        }
+
+        with mock.patch('services.views.render_to_string', return_value='<p>Order</p>'):
+            self.assertEqual(APIClient().post('/api/orders/create/', payload).status_code, 201)
+            self.assertTrue(EmailOutbox.objects.filter(recipients=['ana@example.com']).exists())
+
+            with mock.patch('services.views.queue_email', side_effect=DatabaseError('disk full')):
+                self.assertEqual(APIClient().post('/api/orders/create/', payload).status_code, 500)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+#? <|--------------Email Dispatcher Tests--------------|>
+class EmailDispatcherTests(TestCase):
+
+    def test_batch_reuses_one_connection(self):
+        for index in range(5):
+            queue_email(f'Email {index}', 'Body', ['customer@example.com'])
+        dispatcher = EmailDispatcher()
+
+        with mock.patch('services.mail_dispatch.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(process_outbox(dispatcher=dispatcher), (5, 0))
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_reconnects_after_dropped_connection(self):
+        import smtplib
+        queue_email('Hello', 'Body', ['customer@example.com'])
+        dispatcher = EmailDispatcher()
+        original = mail.backends.locmem.EmailBackend.send_messages
+        calls = []
+
+        def flaky_send(backend, messages):
+            calls.append(backend)
+            if len(calls) == 1:
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            return original(backend, messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', flaky_send):
+            self.assertEqual(process_outbox(dispatcher=dispatcher), (1, 0))
+
+        self.assertIsNot(calls[0], calls[1])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_unreachable_server_fails_the_batch_with_backoff(self):
+        import smtplib
+        for index in range(2):
+            queue_email(f'Email {index}', 'Body', ['customer@example.com'])
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            side_effect=smtplib.SMTPAuthenticationError(535, b'Authentication failed')
+        ):
+            self.assertEqual(process_outbox(dispatcher=EmailDispatcher()), (0, 2))
+
+        for email in EmailOutbox.objects.all():
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertIn('Authentication failed', email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+
+
+#? <|--------------Order State Tracking Tests--------------|>
+class OrderStateTrackingTests(TestCase):
+
+    def setUp(self):
+        Order.objects.create(customer_name='Tracked', customer_email='tracked@example.com')
+        self.order = Order.objects.get()
+        EmailOutbox.objects.all().delete()
+
+    def order_selects(self, queries):
+        return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and '"services_order"' in q['sql']]
+
+    def test_state_change_detected_without_select(self):
+        self.order.state = 'completed'
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.order.save()
+
+        self.assertTrue(self.order._state_changed)
+        self.assertEqual(self.order._old_state, 'pending')
+        self.assertEqual(self.order_selects(ctx.captured_queries), [])
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_totals_save_skips_tracking(self):
+        with self.assertNumQueries(1):
+            self.order.save(update_fields=['estimaded_price'])
+
+        self.assertFalse(self.order._state_changed)
+
+    def test_saving_same_state_twice_sends_one_email(self):
+        self.order.state = 'completed'
+        self.order.save()
+        self.order.save()
+
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+
+#? <|--------------Catalog Cache Tests--------------|>
+class CatalogCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.service = TypeService.objects.create(name='Laser Cutting', type='laser_cutting', is_featured=True)
+        CompanyConfiguration.objects.create()
+
+    def test_warm_requests_run_zero_queries(self):
+        urls = ['/api/services/', f'/api/services/{self.service.pk}/', '/api/company/', '/api/homepage/']
+        for url in urls:
+            self.client.get(url)
+
+        for url in urls:
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_model_changes_invalidate_cache(self):
+        self.client.get('/api/services/')
+
+        #* Until the change commits, requests keep getting (and caching) the old version
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.service.name = 'Fiber Laser Cutting'
+            self.service.save()
+            self.assertEqual(self.client.get('/api/services/').json()['data'][0]['name'], 'Laser Cutting')
+        self.assertEqual(len(callbacks), 1)
+
+        response = self.client.get('/api/services/')
+        self.assertEqual(response.json()['data'][0]['name'], 'Fiber Laser Cutting')
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=None)
+    def test_local_memory_cache_always_expires(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.client.get('/api/services/')
+
+        self.assertTrue(cache_set.called)
+        for call in cache_set.call_args_list:
+            self.assertEqual(call.kwargs['timeout'], 60)
+
+    def test_featured_admin_action_invalidates_cache(self):
+        from django.contrib.admin.sites import site
+        from .admin import TypeServiceAdmin
+
+        self.client.get('/api/homepage/')
+        admin = TypeServiceAdmin(TypeService, site)
+        with mock.patch.object(admin, 'message_user'), self.captureOnCommitCallbacks(execute=True):
+            admin.mark_as_not_featured(None, TypeService.objects.all())
+
+        response = self.client.get('/api/homepage/')
+        self.assertEqual(response.json()['data']['featured_services'], [])
+
+
+#? <|--------------Conditional GET Tests--------------|>
+class ConditionalCatalogResponseTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.service = TypeService.objects.create(name='Plasma Cutting', type='plasma')
+        CompanyConfiguration.objects.create()
+
+    def test_unchanged_resources_return_304(self):
+        for url in ['/api/services/', '/api/company/', '/api/homepage/']:
+            response = self.client.get(url)
+            self.assertIn('ETag', response)
+            self.assertIn('Last-Modified', response)
+
+            with self.assertNumQueries(0):
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, 304)
+
+            cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(cached.status_code, 304)
+
+    def test_cold_cache_never_validates_earlier_responses(self):
+        response = self.client.get('/api/homepage/')
+
+        #* A queryset update leaves no trace in the row timestamps the cache could rebuild from
+        TypeService.objects.update(is_featured=True)
+        cache.clear()
+        with mock.patch('services.catalog_cache._now_ms', return_value=(int(time.time()) + 5) * 1000):
+            by_etag = self.client.get('/api/homepage/', HTTP_IF_NONE_MATCH=response['ETag'])
+            by_date = self.client.get('/api/homepage/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual((by_etag.status_code, by_date.status_code), (200, 200))
+        self.assertEqual(len(by_etag.json()['data']['featured_services']), 1)
+
+    def test_changed_catalog_returns_new_body(self):
+        etag = self.client.get('/api/services/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.short_description = 'Now with bevel cuts'
+            self.service.save()
+
+        response = self.client.get('/api/services/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+#? <|--------------Bootstrap Endpoint Tests--------------|>
+class BootstrapViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        TypeService.objects.create(name='Resin Printing', type='resin_printing', is_featured=True)
+        TypeService.objects.create(name='Old Service', type='old_service', active=False)
+        CompanyConfiguration.objects.create(company_name='AGAH Solutions')
+
+    def test_returns_all_sections_in_one_cached_response(self):
+        response = self.client.get('/api/bootstrap/')
+        data = response.json()['data']
+
+        self.assertEqual(set(data), {'homepage', 'services', 'company'})
+        self.assertEqual([service['name'] for service in data['services']], ['Resin Printing'])
+        self.assertEqual(data['company']['company_name'], 'AGAH Solutions')
+        self.assertEqual(len(data['homepage']['featured_services']), 1)
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/bootstrap/')
+
+    def test_fields_selection(self):
+        response = self.client.get('/api/bootstrap/', {'fields': 'company, services'})
+        self.assertEqual(list(response.json()['data']), ['services', 'company'])
+
+        response = self.client.get('/api/bootstrap/', {'fields': 'orders'})
+        self.assertEqual(response.status_code, 400)
+
+
+#? <|--------------Order Lookup Index Tests--------------|>
+class OrderLookupIndexTests(TestCase):
+
+    def setUp(self):
+        self.order = Order.objects.create(customer_name='Test', customer_email='Buyer@Example.com')
+        Order.objects.create(customer_name='Other', customer_email='other@example.com')
+
+    def test_for_customer_email_ignores_case(self):
+        orders = Order.objects.for_customer_email(' buyer@EXAMPLE.com ')
+        self.assertEqual(list(orders), [self.order])
+
+    def test_customer_lookup_uses_lower_email_index(self):
+        #* PostgreSQL prefers a sequential scan on tables this small
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan assertion is SQLite specific')
+        plan = Order.objects.for_customer_email('buyer@example.com').order_by('-created_at').explain()
+        self.assertIn('order_email_lower_created_idx', plan)
+
+    def test_explain_command_prints_every_query(self):
+        out = StringIO()
+        call_command('explain_order_queries', email='buyer@example.com', stdout=out)
+        self.assertIn('Customer orders (CustomerOrdersView)', out.getvalue())
+        self.assertIn('Orders per service (reports)', out.getvalue())
+
+
+#? <|--------------SQLite Concurrency Tests--------------|>
+class ConcurrentOrderCreationTests(TransactionTestCase):
+    """Many guest checkouts at once must not fail with 'database is locked'"""
+
+    workers = 16
+
+    def setUp(self):
+        #* Shared in-memory SQLite uses table locks that ignore busy_timeout
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs an on-disk SQLite test database (set SQLITE_TEST_NAME)')
+        self.service = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+
+    def submit_order(self, index, barrier, results):
+        client = APIClient()
+        barrier.wait()
+        try:
+            response = client.post('/api/orders/create/', {
+                'customer_name': f'Customer {index}',
+                'customer_email': f'customer{index}@example.com',
+                'customer_phone': '555-0100',
+                'items': json.dumps([{'service': self.service.id, 'quantity': 2, 'description': 'Engraved plate'}]),
+            })
+            results[index] = (response.status_code, response.data.get('error'))
+        finally:
+            connection.close()
+
+    def test_parallel_public_order_posts(self):
+        barrier = threading.Barrier(self.workers)
+        results = [None] * self.workers
+        threads = [
+            threading.Thread(target=self.submit_order, args=(index, barrier, results))
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([status for status, _ in results], [201] * self.workers, results)
+        self.assertEqual(Order.objects.count(), self.workers)
+        self.assertEqual(OrderItem.objects.count(), self.workers)
+
+
+#? <|--------------Read Replica Routing Tests--------------|>
+class ReadAliasView(ReplicaReadMixin, APIView):
+    """Reports where Order reads would be routed while the view runs"""
+
+    def get(self, request):
+        return Response({'alias': ReplicaRouter().db_for_read(Order)})
+
+    def post(self, request):
+        return Response({'alias': ReplicaRouter().db_for_read(Order)})
+
+
+@override_settings(REPLICA_DATABASE_ALIAS='replica')
+class ReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = ReadAliasView.as_view()
+
+    def test_reads_use_replica_only_inside_replica_views(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(Order))
+        self.assertEqual(self.view(self.factory.get('/')).data['alias'], 'replica')
+        self.assertIsNone(self.view(self.factory.post('/')).data['alias'])
+        self.assertIsNone(ReplicaRouter().db_for_read(Order))
+
+    def test_writes_always_use_primary(self):
+        with use_database_for_reads('replica'):
+            self.assertEqual(ReplicaRouter().db_for_write(Order), 'default')
+
+    def test_recent_writer_is_pinned_to_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_STICKY_COOKIE] = str(int(timezone.now().timestamp()) + 5)
+        self.assertIsNone(self.view(request).data['alias'])
+
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_STICKY_COOKIE] = str(int(timezone.now().timestamp()) - 1)
+        self.assertEqual(self.view(request).data['alias'], 'replica')
+
+    def test_order_creation_sets_sticky_cookie(self):
+        service = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+        response = APIClient().post('/api/orders/create/', {
+            'customer_name': 'Sticky',
+            'customer_email': 'sticky@example.com',
+            'customer_phone': '555-0100',
+            'items': json.dumps([{'service': service.id, 'quantity': 1, 'description': 'Plate'}]),
+        })
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+        request = self.factory.get('/', HTTP_X_PRIMARY_UNTIL=response['X-Primary-Until'])
+        self.assertIsNone(self.view(request).data['alias'])
+
+    def test_catalog_rebuild_reads_from_primary(self):
+        cache.clear()
+        aliases = []
+        with use_database_for_reads('replica'):
+            get_cached_payload('probe', lambda: aliases.append(ReplicaRouter().db_for_read(TypeService)) or {})
+        self.assertEqual(aliases, [None])
+
+
+#? <|--------------Incremental Order Totals Tests--------------|>
+class IncrementalOrderTotalsTests(TestCase):
+
+    def setUp(self):
+        self.laser = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+        self.order = Order.objects.create(customer_name='Totals', customer_email='totals@example.com')
+
+    def assertTotalsMatchItems(self, order):
+        stored = Order.objects.get(pk=order.pk)
+        expected = Order.objects.get(pk=order.pk)
+        expected.update_totals(save=False)
+        self.assertEqual(stored.estimaded_price, expected.estimaded_price)
+        self.assertEqual(stored.final_price, expected.final_price)
+
+    def test_insert_update_delete_apply_deltas(self):
+        item = OrderItem.objects.create(order=self.order, service=self.laser, quantity=2,
+                                        needs_custom_design=True, custom_design_price=Decimal('99.90'))
+        OrderItem.objects.create(order=self.order, service=self.laser, quantity=1)
+        self.assertTotalsMatchItems(self.order)
+
+        item = OrderItem.objects.select_related('service').get(pk=item.pk)
+        item.quantity = 5
+        #* One UPDATE for the item, one F() UPDATE for the order, no re-read of the other items
+        with self.assertNumQueries(2):
+            item.save()
+        self.assertTotalsMatchItems(self.order)
+
+        item.delete()
+        self.assertTotalsMatchItems(self.order)
+
+        OrderItem.objects.filter(order=self.order).delete()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.estimaded_price, Decimal('0.00'))
+        self.assertEqual(self.order.final_price, Decimal('0.00'))
+
+    def test_unchanged_item_save_skips_order_update(self):
+        item = OrderItem.objects.create(order=self.order, service=self.laser)
+        item = OrderItem.objects.select_related('service').get(pk=item.pk)
+
+        with self.assertNumQueries(1):
+            item.save()
+
+    def test_moving_item_updates_both_orders(self):
+        other = Order.objects.create(customer_name='Other', customer_email='other@example.com')
+        item = OrderItem.objects.create(order=self.order, service=self.laser, quantity=3)
+
+        item.order = other
+        item.save()
+
+        self.assertTotalsMatchItems(self.order)
+        self.assertTotalsMatchItems(other)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).estimaded_price, Decimal('0.00'))
+
+    def test_cached_order_instance_stays_in_sync(self):
+        item = OrderItem(order=self.order, service=self.laser, quantity=2)
+        item.save()
+
+        self.assertEqual(self.order.estimaded_price, Order.objects.get(pk=self.order.pk).estimaded_price)
+
+    def test_recompute_command_repairs_drift(self):
+        OrderItem.objects.create(order=self.order, service=self.laser, quantity=2)
+        clean = Order.objects.create(customer_name='Clean', customer_email='clean@example.com')
+        OrderItem.objects.create(order=clean, service=self.laser)
+        Order.objects.filter(pk=self.order.pk).update(estimaded_price=Decimal('1.00'), final_price=None)
+
+        out = StringIO()
+        call_command('recompute_order_totals', dry_run=True, stdout=out)
+        self.assertIn('1 orders would be fixed', out.getvalue())
+        self.assertEqual(Order.objects.get(pk=self.order.pk).estimaded_price, Decimal('1.00'))
+
+        call_command('recompute_order_totals', stdout=StringIO())
+        self.assertTotalsMatchItems(self.order)
+        self.assertTotalsMatchItems(clean)
+
+
+#? <|--------------Admin Changelist Query Tests--------------|>
+class AdminChangelistQueryTests(TestCase):
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email='root@example.com', password='secret123', user_type='admin'
+        )
+        self.client.force_login(self.admin)
+        self.service = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+
+    def create_orders(self, count):
+        for index in range(count):
+            Order.create_with_items(
+                [{'service': self.service, 'quantity': 2}, {'service': self.service, 'needs_custom_design': True,
+                                                            'custom_design_price': Decimal('50.00')}],
+                customer_name=f'Customer {index}', customer_email=f'c{index}@example.com'
+            )
+
+    def count_changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelists_run_constant_queries(self):
+        self.create_orders(2)
+        order_queries, _ = self.count_changelist_queries('/admin/services/order/')
+        item_queries, _ = self.count_changelist_queries('/admin/services/orderitem/')
+
+        self.create_orders(20)
+        self.assertEqual(self.count_changelist_queries('/admin/services/order/')[0], order_queries)
+        self.assertEqual(self.count_changelist_queries('/admin/services/orderitem/')[0], item_queries)
+
+    def test_order_changelist_shows_sql_totals(self):
+        self.create_orders(1)
+        order = Order.objects.get()
+
+        _, response = self.count_changelist_queries('/admin/services/order/')
+
+        self.assertContains(response, f"${order.get_final_total_price():,.2f} MXN")
+
+
+#? <|--------------Order Export Tests--------------|>
+class OrderExportTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            email='export@example.com', password='secret123', is_staff=True, user_type='staff'
+        )
+        self.service = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+        self.order = Order.create_with_items(
+            [{'service': self.service, 'quantity': 2}, {'service': self.service, 'quantity': 3}],
+            customer_name='Export', customer_email='buyer@example.com'
+        )
+        self.empty_order = Order.objects.create(customer_name='Empty', customer_email='empty@example.com',
+                                                state='completed')
+
+    def read_csv(self, response):
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(StringIO(content)))
+
+    def test_csv_streams_one_row_per_item(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get('/api/admin/orders/export/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][:2], ['Order Number', 'Created At'])
+        #* Two item rows plus one row for the order without items
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(sorted(row[12] for row in rows[1:] if row[0] == self.order.order_number), ['2', '3'])
+
+    def test_csv_uses_admin_list_filters(self):
+        self.client.force_authenticate(self.staff)
+
+        rows = self.read_csv(self.client.get('/api/admin/orders/export/', {'customer_email': 'BUYER@example.com'}))
+
+        self.assertEqual({row[0] for row in rows[1:]}, {self.order.order_number})
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get('/api/admin/orders/export/', {'export_format': 'xlsx'})
+
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)['Orders']
+        self.assertEqual(len(list(sheet.rows)), 4)
+
+    def test_formula_like_text_is_escaped(self):
+        from openpyxl import load_workbook
+        Order.objects.filter(pk=self.empty_order.pk).update(customer_name='=HYPERLINK("http://x")', customer_phone='+1 555')
+        self.client.force_authenticate(self.staff)
+
+        rows = self.read_csv(self.client.get('/api/admin/orders/export/'))
+        row = next(row for row in rows if row[0] == self.empty_order.order_number)
+        self.assertEqual((row[3], row[5]), ('\'=HYPERLINK("http://x")', "'+1 555"))
+
+        response = self.client.get('/api/admin/orders/export/', {'export_format': 'xlsx'})
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)['Orders']
+        self.assertIn('\'=HYPERLINK("http://x")', [row[3] for row in sheet.iter_rows(values_only=True)])
+
+    def test_rejects_invalid_format_and_non_staff(self):
+        customer = get_user_model().objects.create_user(
+            email='customer@example.com', password='secret123', user_type='customer'
+        )
+        self.client.force_authenticate(customer)
+        self.assertEqual(self.client.get('/api/admin/orders/export/').status_code, 403)
+
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get('/api/admin/orders/export/', {'export_format': 'pdf'}).status_code, 400)
+
+    def test_admin_action_exports_selected_orders(self):
+        admin_user = get_user_model().objects.create_superuser(
+            email='root@example.com', password='secret123', user_type='admin'
+        )
+        self.client.force_login(admin_user)
+
+        response = self.client.post('/admin/services/order/', {
+            'action': 'export_as_csv',
+            '_selected_action': [self.empty_order.pk],
+        })
+
+        rows = self.read_csv(response)
+        self.assertEqual([row[0] for row in rows[1:]], [self.empty_order.order_number])
+
+
+#? <|--------------Bulk Order Import Tests--------------|>
+class BulkOrderImportTests(TestCase):
+
+    CSV_HEADER = 'order_ref,customer_name,customer_email,customer_phone,service,quantity,description,' \
+                 'length_dimensions,width_dimensions,needs_custom_design,custom_design_price,plasma_material_cost\n'
+
+    def setUp(self):
+        self.plasma = TypeService.objects.create(name='Plasma Cutting', type='plasma')
+        self.laser = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+
+    def build_csv(self, rows):
+        return BytesIO((self.CSV_HEADER + ''.join(row + '\n' for row in rows)).encode())
+
+    def test_csv_import_prices_items_like_single_saves(self):
+        csv_file = self.build_csv([
+            'A,Ana,ana@example.com,555,plasma,3,Plate,12.5,8,true,150,1899.99',
+            'A,Ana,ana@example.com,555,laser_engraving,300,Plaque,,,false,,',
+            'B,Beto,beto@example.com,,Laser Engraving,1,Sign,4,4,no,,',
+        ])
+
+        report = import_orders(csv_file, 'csv', chunk_size=2)
+
+        self.assertEqual((report['orders_created'], report['items_created'], report['error_count']), (2, 3, 0))
+        for item in OrderItem.objects.select_related('service'):
+            expected = OrderItem(**{
+                field.attname: getattr(item, field.attname)
+                for field in OrderItem._meta.concrete_fields
+                if field.attname not in ('id', 'estimated_unit_price', 'final_unit_price')
+            })
+            expected.calculate_prices()
+            self.assertEqual(item.estimated_unit_price, as_price(expected.estimated_unit_price))
+            self.assertEqual(item.final_unit_price, as_price(expected.final_unit_price))
+
+        for order in Order.objects.all():
+            expected = Order.objects.get(pk=order.pk)
+            expected.update_totals(save=False)
+            self.assertEqual((order.estimaded_price, order.final_price),
+                             (expected.estimaded_price, expected.final_price))
+            self.assertTrue(order.order_number)
+
+    def test_invalid_rows_are_reported_and_their_order_skipped(self):
+        csv_file = self.build_csv([
+            'A,Ana,ana@example.com,555,plasma,2,Plate,,,false,,',
+            'A,Ana,ana@example.com,555,welding,1,Plate,,,false,,',
+            'B,Beto,not-an-email,,plasma,1,Plate,,,false,,',
+            'C,Caro,caro@example.com,,plasma,abc,Plate,,,maybe,,',
+            'D,Dani,dani@example.com,,plasma,1,Plate,,,false,,',
+        ])
+
+        report = import_orders(csv_file, 'csv')
+
+        self.assertEqual(report['orders_created'], 1)
+        self.assertEqual(report['orders_skipped'], 3)
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4, 5])
+        self.assertIn('Unknown service', report['errors'][0]['error'])
+        self.assertEqual(list(Order.objects.values_list('customer_name', flat=True)), ['Dani'])
+
+    def test_json_import_and_dry_run(self):
+        payload = json.dumps([
+            {'customer_name': 'Ana', 'customer_email': 'ana@example.com',
+             'items': [{'service': self.laser.pk, 'quantity': 300}, {'service': 'plasma'}]},
+        ]).encode()
+
+        report = import_orders(BytesIO(payload), 'json', dry_run=True)
+        self.assertEqual((report['orders_created'], report['items_created']), (1, 2))
+        self.assertFalse(Order.objects.exists())
+
+        import_orders(BytesIO(payload), 'json')
+        self.assertEqual(OrderItem.objects.filter(order__customer_email='ana@example.com').count(), 2)
+
+    def test_json_scalars_and_malformed_records_are_row_errors(self):
+        payload = json.dumps([
+            {'customer_name': 'Ana', 'customer_email': 'ana@example.com', 'customer_phone': 5551234,
+             'order_ref': 7, 'items': [{'service': 'plasma', 'quantity': 2}]},
+            'not an order',
+            {'customer_name': 'Beto', 'customer_email': 'beto@example.com', 'items': [{'service': 'plasma'}, 3]},
+            {'customer_name': 'Caro', 'customer_email': 'caro@example.com', 'items': {'service': 'plasma'}},
+        ]).encode()
+
+        with mock.patch('services.imports.JSON_READ_SIZE', 7):
+            report = import_orders(BytesIO(payload), 'json')
+
+        self.assertEqual((report['orders_created'], report['orders_skipped']), (1, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 4, 5])
+        self.assertEqual(Order.objects.get().customer_phone, '5551234')
+
+    def test_invalid_json_is_rejected(self):
+        for payload in [b'{"orders": []}', b'[{"customer_name": "Ana"', b'[{} {}]']:
+            with self.assertRaises(ValueError):
+                import_orders(BytesIO(payload), 'json')
+
+    def test_read_error_reports_what_was_already_imported(self):
+        order = {'customer_name': 'Ana', 'customer_email': 'ana@example.com', 'items': [{'service': 'plasma'}]}
+        payload = json.dumps([order, {**order, 'customer_email': 'beto@example.com'}]).encode()[:-1] + b', {"broken"'
+
+        with self.assertRaises(ImportReadError) as error:
+            import_orders(BytesIO(payload), 'json', chunk_size=1)
+
+        #* Only orders of completed chunks were committed, the next one was still buffered
+        self.assertEqual((error.exception.report['orders_created'], error.exception.report['last_imported_row']), (1, 1))
+        self.assertIn('up to row 1 were imported', str(error.exception))
+        self.assertEqual(Order.objects.count(), 1)
+
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(
+            email='import@example.com', password='secret123', is_staff=True, user_type='staff'
+        ))
+        with mock.patch('services.views.import_orders', side_effect=error.exception):
+            response = client.post('/api/admin/orders/import/', {'file': SimpleUploadedFile('orders.json', payload)})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['data']['orders_created'], 1)
+
+    def test_import_endpoint_is_staff_only(self):
+        client = APIClient()
+        staff = get_user_model().objects.create_user(
+            email='import@example.com', password='secret123', is_staff=True, user_type='staff'
+        )
+        csv_file = self.build_csv(['A,Ana,ana@example.com,555,plasma,2,Plate,,,false,,'])
+        csv_file.name = 'orders.csv'
+
+        self.assertEqual(client.post('/api/admin/orders/import/', {'file': csv_file}).status_code, 401)
+
+        client.force_authenticate(staff)
+        csv_file.seek(0)
+        response = client.post('/api/admin/orders/import/', {'file': csv_file})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['items_created'], 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+#? <|--------------Chunked Design Upload Tests--------------|>
+class ChunkedDesignUploadTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root,
+            DESIGN_UPLOAD_TEMP_DIR=os.path.join(self.media_root, 'parts'),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.client = APIClient()
+        self.laser = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+
+    def checksum(self, content):
+        return 'sha256 ' + base64.b64encode(hashlib.sha256(content).digest()).decode()
+
+    def start_upload(self, filename='plate.dxf', size=10, **extra):
+        return self.client.post('/api/uploads/', {'filename': filename, 'size': size, **extra}, format='json')
+
+    def send_chunk(self, upload_id, chunk, offset, **headers):
+        return self.client.generic(
+            'PATCH', f'/api/uploads/{upload_id}/', chunk,
+            content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': str(offset), **headers},
+        )
+
+    def upload_file(self, content, filename='plate.dxf'):
+        upload_id = self.start_upload(filename, len(content), checksum=self.checksum(content)).data['data']['id']
+        for start in range(0, len(content), 4):
+            chunk = content[start:start + 4]
+            self.send_chunk(upload_id, chunk, start, **{'Upload-Checksum': self.checksum(chunk)})
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        return upload_id
+
+    def test_concurrent_chunks_at_the_same_offset_write_once(self):
+        upload = create_upload('plate.dxf', 10)
+        #* Both requests loaded the upload (and passed the offset check) before either wrote
+        first, second = DesignUpload.objects.get(pk=upload.pk), DesignUpload.objects.get(pk=upload.pk)
+
+        with open(upload.get_part_path(), 'wb') as part:
+            self.assertTrue(lock_file(part, blocking=False))
+            with self.assertRaises(UploadError) as busy:
+                append_chunk(second, BytesIO(b'zzzz'), 0)
+        self.assertEqual(busy.exception.status, 409)
+
+        append_chunk(first, BytesIO(b'0123'), 0)
+        with self.assertRaises(UploadError) as stale:
+            append_chunk(second, BytesIO(b'zzzzzz'), 0)
+        self.assertEqual(stale.exception.status, 409)
+
+        with open(upload.get_part_path(), 'rb') as part:
+            self.assertEqual(part.read(), b'0123')
+        self.assertEqual(DesignUpload.objects.get(pk=upload.pk).offset, 4)
+
+    def test_concurrent_completes_return_the_completed_upload(self):
+        upload = create_upload('plate.dxf', 4)
+        append_chunk(upload, BytesIO(b'0123'), 0)
+        #* A client retry loaded the upload before the first request completed it
+        first, retry = DesignUpload.objects.get(pk=upload.pk), DesignUpload.objects.get(pk=upload.pk)
+
+        complete_upload(first)
+        self.assertEqual(complete_upload(retry).file.name, first.file.name)
+
+        self.assertEqual(retry.status, 'complete')
+        self.assertEqual(DesignBlob.objects.filter(file=first.file.name).count(), 1)
+        with first.file.open('rb') as design_file:
+            self.assertEqual(design_file.read(), b'0123')
+
+    def test_chunks_are_assembled_and_attached_to_the_order_item(self):
+        content = b'0123456789'
+        upload_id = self.upload_file(content)
+
+        upload = DesignUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.status, 'complete')
+        self.assertFalse(os.path.exists(upload.get_part_path()))
+
+        response = self.client.post('/api/orders/create/', {
+            'customer_name': 'Ana',
+            'customer_email': 'ana@example.com',
+            'customer_phone': '555',
+            'items': json.dumps([{'service': self.laser.pk, 'description': 'Plate', 'quantity': 1,
+                                  'design_upload_id': upload_id}]),
+        })
+
+        self.assertEqual(response.status_code, 201)
+        item = OrderItem.objects.get()
+        self.assertEqual(item.design_file.name, upload.file.name)
+        with item.design_file.open('rb') as design_file:
+            self.assertEqual(design_file.read(), content)
+
+        #* The same upload can't be attached to a second order
+        response = self.client.post('/api/orders/create/', {
+            'customer_name': 'Beto',
+            'customer_email': 'beto@example.com',
+            'customer_phone': '555',
+            'items': json.dumps([{'service': self.laser.pk, 'description': 'Plate', 'quantity': 1,
+                                  'design_upload_id': upload_id}]),
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_invalid_uploads_are_rejected(self):
+        self.assertEqual(self.start_upload('virus.exe').status_code, 400)
+        self.assertEqual(self.start_upload(size=30 * 1024 * 1024).status_code, 400)
+
+        upload_id = self.start_upload(size=4).data['data']['id']
+        self.assertEqual(self.send_chunk(upload_id, b'0123456789', 0).status_code, 413)
+        self.assertEqual(DesignUpload.objects.get(pk=upload_id).offset, 0)
+
+        self.send_chunk(upload_id, b'01', 0)
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').data['data']['offset'], 2)
+
+    def test_resume_sends_only_missing_bytes_from_the_server_offset(self):
+        content = b'0123456789'
+        upload_id = self.start_upload(size=len(content)).data['data']['id']
+        self.send_chunk(upload_id, content[:6], 0)
+
+        #* A retry of a chunk the server already has is refused with the real offset
+        response = self.send_chunk(upload_id, content[:6], 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '6')
+        self.assertEqual(self.send_chunk(upload_id, content[6:], 6, **{'Upload-Offset': ''}).status_code, 400)
+
+        response = self.client.head(f'/api/uploads/{upload_id}/')
+        self.assertEqual((response['Upload-Offset'], response['Upload-Length']), ('6', '10'))
+
+        self.send_chunk(upload_id, content[6:], int(response['Upload-Offset']))
+        self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/complete/').status_code, 200)
+        with DesignUpload.objects.get(pk=upload_id).file.open('rb') as design_file:
+            self.assertEqual(design_file.read(), content)
+
+    def test_checksum_mismatches_are_rolled_back(self):
+        content = b'0123456789'
+        upload_id = self.start_upload(size=len(content), checksum=self.checksum(b'something else')).data['data']['id']
+
+        response = self.send_chunk(upload_id, content[:4], 0, **{'Upload-Checksum': self.checksum(b'0124')})
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(response['Upload-Offset'], '0')
+        self.assertEqual(os.path.getsize(DesignUpload.objects.get(pk=upload_id).get_part_path()), 0)
+
+        self.send_chunk(upload_id, content, 0, **{'Upload-Checksum': self.checksum(content)})
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 460)
+        upload = DesignUpload.objects.get(pk=upload_id)
+        self.assertEqual((upload.offset, upload.status), (0, 'uploading'))
+
+    def test_cleanup_command_removes_stale_uploads(self):
+        attached = DesignUpload.objects.get(pk=self.upload_file(b'attached'))
+        DesignUpload.objects.filter(pk=attached.pk).update(attached_at=timezone.now())
+        unattached = DesignUpload.objects.get(pk=self.upload_file(b'unused'))
+        abandoned_id = self.start_upload(size=10).data['data']['id']
+        self.send_chunk(abandoned_id, b'0123', 0)
+        fresh_id = self.start_upload(size=10).data['data']['id']
+        self.send_chunk(fresh_id, b'0123', 0)
+        orphan_path = os.path.join(settings.DESIGN_UPLOAD_TEMP_DIR, '00000000-0000-0000-0000-000000000000.part')
+        with open(orphan_path, 'wb') as orphan:
+            orphan.write(b'left behind')
+        os.utime(orphan_path, (0, 0))
+
+        old = timezone.now() - timedelta(days=5)
+        DesignUpload.objects.exclude(pk=fresh_id).update(updated_at=old)
+        abandoned_part = DesignUpload.objects.get(pk=abandoned_id).get_part_path()
+
+        out = StringIO()
+        call_command('cleanup_design_uploads', stdout=out)
+
+        self.assertIn('2 uploads and 1 orphan part files deleted', out.getvalue())
+        self.assertEqual(
+            set(DesignUpload.objects.values_list('pk', flat=True)),
+            {attached.pk, DesignUpload.objects.get(pk=fresh_id).pk}
+        )
+        self.assertFalse(os.path.exists(abandoned_part))
+        self.assertFalse(os.path.exists(orphan_path))
+
+        #* Stored files are shared, so they go with the blob garbage collection
+        call_command('gc_design_blobs', '--grace-hours', '0', stdout=StringIO())
+        self.assertFalse(unattached.file.storage.exists(unattached.file.name))
+        self.assertTrue(attached.file.storage.exists(attached.file.name))
+
+
+#? <|--------------Deduplicated Design Storage Tests--------------|>
+class DesignBlobStorageTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, DESIGN_UPLOAD_TEMP_DIR=self.temp_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.laser = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+
+    def create_order(self, content, filename='logo.svg'):
+        return Order.create_with_items(
+            [{'service': self.laser, 'description': 'Logo', 'design_file': SimpleUploadedFile(filename, content)}],
+            customer_name='Ana', customer_email='ana@example.com'
+        )
+
+    def count_stored_files(self):
+        return sum(len(files) for _, _, files in os.walk(self.media_root))
+
+    def test_identical_files_are_stored_once_and_counted(self):
+        first = self.create_order(b'<svg>logo</svg>')
+        second = self.create_order(b'<svg>logo</svg>', filename='logo-copy.SVG')
+        self.create_order(b'<svg>other</svg>')
+
+        first_item, second_item = first.items.get(), second.items.get()
+        self.assertEqual(first_item.design_file.name, second_item.design_file.name)
+        self.assertTrue(first_item.design_file.name.startswith('order_files/sha256/'))
+        self.assertEqual(self.count_stored_files(), 2)
+
+        blob = first_item.design_blob
+        self.assertEqual(blob.pk, second_item.design_blob_id)
+        self.assertEqual(blob.ref_count, 2)
+
+        #* Changing a file through save() moves the reference
+        second_item.design_file = SimpleUploadedFile('new.svg', b'<svg>other</svg>')
+        second_item.save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertEqual(DesignBlob.objects.get(pk=second_item.design_blob_id).ref_count, 2)
+
+    def test_unreferenced_blobs_are_collected(self):
+        kept = self.create_order(b'<svg>kept</svg>')
+        deleted = self.create_order(b'<svg>deleted</svg>')
+        deleted_name = deleted.items.get().design_file.name
+
+        deleted.delete()
+
+        blob = DesignBlob.objects.get(file=deleted_name)
+        self.assertEqual(blob.ref_count, 0)
+        out = StringIO()
+        call_command('gc_design_blobs', '--grace-hours', '0', stdout=out)
+        self.assertIn('1 blobs deleted', out.getvalue())
+        self.assertFalse(DesignBlob.objects.filter(file=deleted_name).exists())
+        self.assertEqual(self.count_stored_files(), 1)
+        with kept.items.get().design_file.open('rb') as design_file:
+            self.assertEqual(design_file.read(), b'<svg>kept</svg>')
+
+    def test_collector_keeps_files_reused_during_collection(self):
+        order = self.create_order(b'<svg>reordered</svg>')
+        name = order.items.get().design_file.name
+        order.delete()
+        DesignBlob.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        blob = DesignBlob.objects.get(file=name)
+
+        #* A reorder stores the same bytes after the collector picked the blob, before its row is touched
+        storage = blob.file.storage
+        self.assertEqual(storage.save('order_files/logo.svg', ContentFile(b'<svg>reordered</svg>')), name)
+
+        self.assertTrue(CollectDesignBlobsCommand().delete_blob(blob))
+
+        self.assertFalse(DesignBlob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(storage.exists(name))
+        self.assertIn(name, DesignBlob.objects.for_file_names([name]))
+
+    def test_recount_repairs_drifted_reference_counts(self):
+        order = self.create_order(b'<svg>logo</svg>')
+        DesignBlob.objects.update(ref_count=0)
+
+        call_command('gc_design_blobs', '--recount', '--grace-hours', '0', stdout=StringIO())
+
+        self.assertEqual(DesignBlob.objects.get().ref_count, 1)
+        self.assertTrue(order.items.get().design_file.storage.exists(order.items.get().design_file.name))
+
+
+#? <|--------------Design Preview Tests--------------|>
+class DesignPreviewTests(TestCase):
+
+    DXF = (
+        '0\nSECTION\n2\nHEADER\n9\n$INSUNITS\n70\n4\n0\nENDSEC\n'
+        '0\nSECTION\n2\nENTITIES\n'
+        '0\nLINE\n8\n0\n10\n0\n20\n0\n11\n100\n21\n0\n'
+        '0\nCIRCLE\n8\n0\n10\n50\n20\n25\n40\n10\n'
+        '0\nLWPOLYLINE\n90\n4\n70\n1\n10\n0\n20\n0\n10\n100\n20\n0\n10\n100\n20\n50\n10\n0\n20\n50\n'
+        '0\nENDSEC\n0\nEOF\n'
+    )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, DESIGN_UPLOAD_TEMP_DIR=self.temp_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.laser = TypeService.objects.create(name='Laser Engraving', type='laser_engraving')
+
+    def create_item(self, filename, content):
+        order = Order.create_with_items(
+            [{'service': self.laser, 'description': 'Design', 'design_file': SimpleUploadedFile(filename, content)}],
+            customer_name='Ana', customer_email='ana@example.com'
+        )
+        return order.items.get()
+
+    def build_png(self, size):
+        from PIL import Image
+        output = BytesIO()
+        Image.new('RGB', size, 'red').save(output, format='PNG')
+        return output.getvalue()
+
+    def test_previews_are_rendered_outside_the_upload(self):
+        item = self.create_item('photo.png', self.build_png((1200, 600)))
+        self.assertEqual(item.design_blob.preview_status, 'pending')
+        self.assertIsNone(OrderItemSerializer(item).data['design_preview'])
+
+        self.assertEqual(process_previews(), (1, 0))
+
+        item = OrderItem.objects.select_related('design_blob').get(pk=item.pk)
+        data = OrderItemSerializer(item).data
+        self.assertEqual(data['design_metadata'], {'format': 'PNG', 'width': 1200, 'height': 600})
+        self.assertTrue(data['design_preview'].endswith(f'{item.design_blob.digest}.png'))
+        from PIL import Image
+        with Image.open(item.design_blob.preview.path) as preview:
+            self.assertEqual(preview.size, (256, 128))
+
+    def test_dxf_bounding_box_and_unsupported_files(self):
+        dxf_item = self.create_item('plate.dxf', self.DXF.encode())
+        other_item = self.create_item('logo.ai', b'%!PS-Adobe')
+
+        self.assertEqual(process_previews(), (1, 0))
+
+        dxf_blob = DesignBlob.objects.get(pk=dxf_item.design_blob_id)
+        self.assertEqual(dxf_blob.preview_metadata['bounding_box'], [0, 0, 100, 50])
+        self.assertEqual(dxf_blob.preview_metadata['path_count'], 3)
+        self.assertTrue(dxf_blob.preview)
+        self.assertEqual(DesignBlob.objects.get(pk=other_item.design_blob_id).preview_status, 'unsupported')
+
+    def test_dxf_cut_length_pierces_and_area(self):
+        item = self.create_item('plate.dxf', self.DXF.encode())
+
+        process_previews()
+
+        analysis = DesignBlob.objects.get(pk=item.design_blob_id).vector_analysis
+        #* Line 100 + circle 2*pi*10 + rectangle 300, each a separate pierce
+        self.assertAlmostEqual(analysis['path_length_mm'], 400 + 20 * math.pi, delta=0.1)
+        self.assertEqual(analysis['pierce_count'], 3)
+        self.assertAlmostEqual(analysis['bbox_area_in2'], 100 * 50 / 645.16, places=3)
+        self.assertFalse(analysis['units_assumed'])
+
+    def test_svg_paths_are_measured_in_millimetres(self):
+        svg = (
+            '<svg xmlns="http://www.w3.org/2000/svg" width="100mm" height="50mm" viewBox="0 0 200 100">'
+            '<g transform="translate(10 10)"><rect width="100" height="40"/></g>'
+            '<path d="M 150 50 a 20 20 0 1 0 40 0 a 20 20 0 1 0 -40 0 Z"/>'
+            '<g style="display:none"><line x1="0" y1="0" x2="200" y2="0"/></g>'
+            '</svg>'
+        )
+        item = self.create_item('logo.svg', svg.encode())
+
+        process_previews()
+
+        analysis = DesignBlob.objects.get(pk=item.design_blob_id).vector_analysis
+        #* viewBox units are half a millimetre: rectangle 140mm, circle of radius 10mm
+        self.assertAlmostEqual(analysis['path_length_mm'], 140 + 20 * math.pi, delta=0.5)
+        self.assertEqual(analysis['pierce_count'], 2)
+        self.assertAlmostEqual(analysis['bbox_width_mm'], 90, places=3)
+        self.assertAlmostEqual(analysis['bbox_height_mm'], 30, places=3)
+
+    def test_analysis_prefills_cutting_fields(self):
+        plasma = TypeService.objects.create(name='Plasma Cutting', type='plasma_cutting')
+        #* 100 m of cut: 50 minutes of feed plus one pierce
+        long_dxf = (
+            '0\nSECTION\n2\nHEADER\n9\n$INSUNITS\n70\n4\n0\nENDSEC\n'
+            '0\nSECTION\n2\nENTITIES\n0\nLINE\n8\n0\n10\n0\n20\n0\n11\n100000\n21\n0\n0\nENDSEC\n0\nEOF\n'
+        )
+        order = Order.create_with_items(
+            [{'service': plasma, 'description': 'Plate', 'design_file': SimpleUploadedFile('plate.dxf', self.DXF.encode())},
+             {'service': plasma, 'description': 'Rail', 'design_file': SimpleUploadedFile('rail.dxf', long_dxf.encode())}],
+            customer_name='Ana', customer_email='ana@example.com'
+        )
+        small_item, long_item = order.items.order_by('id')
+        default_estimate = long_item.estimated_unit_price
+
+        process_previews()
+
+        #* Short cuts are charged the minimum, longer ones their estimate
+        small_item.refresh_from_db()
+        self.assertEqual(small_item.plasma_cutting_time, 30)
+        self.assertEqual((small_item.length_dimensions, small_item.width_dimensions), (Decimal('3.94'), Decimal('1.97')))
+        long_item.refresh_from_db()
+        self.assertEqual(long_item.plasma_cutting_time, 51)
+        self.assertGreater(long_item.estimated_unit_price, default_estimate)
+        self.assertEqual(long_item.estimated_unit_price, as_price(long_item.calculate_service_price()))
+
+        #* Values entered by hand are kept, and a reorder of the same file is pre-filled right away
+        reorder = Order.create_with_items(
+            [{'service': plasma, 'description': 'Plate', 'design_file': SimpleUploadedFile('copy.dxf', self.DXF.encode()),
+              'plasma_cutting_time': 45}],
+            customer_name='Ana', customer_email='ana@example.com'
+        )
+        reordered = reorder.items.get()
+        self.assertEqual(reordered.plasma_cutting_time, 45)
+        self.assertEqual(reordered.length_dimensions, Decimal('3.94'))
+
+    def test_out_of_range_analysis_is_not_prefilled(self):
+        plasma = TypeService.objects.create(name='Plasma Cutting', type='plasma_cutting')
+        #* A stray point a thousand kilometres away: the bounding box doesn't fit the dimension fields
+        stray_dxf = (
+            '0\nSECTION\n2\nENTITIES\n0\nLINE\n8\n0\n10\n0\n20\n0\n11\n1e9\n21\n1e9\n0\nENDSEC\n0\nEOF\n'
+        )
+        create_item = lambda: Order.create_with_items(
+            [{'service': plasma, 'description': 'Plate', 'design_file': SimpleUploadedFile('stray.dxf', stray_dxf.encode())}],
+            customer_name='Ana', customer_email='ana@example.com'
+        ).items.get()
+        item = create_item()
+
+        self.assertEqual(process_previews(), (1, 0))
+
+        item.refresh_from_db()
+        self.assertEqual(item.plasma_cutting_time, 30)
+        self.assertIsNone(item.length_dimensions)
+        #* Reorders of the file don't fail either
+        self.assertIsNone(create_item().length_dimensions)
+
+    def test_failed_save_marks_the_blob_failed(self):
+        first = self.create_item('first.dxf', self.DXF.encode())
+        second = self.create_item('second.dxf', self.DXF.replace('100', '200').encode())
+
+        with mock.patch('services.previews.apply_analysis_to_items', side_effect=[RuntimeError('boom'), None]):
+            self.assertEqual(process_previews(), (1, 1))
+
+        first_blob = DesignBlob.objects.get(pk=first.design_blob_id)
+        self.assertEqual((first_blob.preview_status, first_blob.preview_error), ('failed', 'boom'))
+        self.assertEqual(first_blob.vector_analysis, {})
+        self.assertEqual(DesignBlob.objects.get(pk=second.design_blob_id).preview_status, 'ready')
+
+    CUBE_VERTICES = [(0, 0, 0), (10, 0, 0), (10, 10, 0), (0, 10, 0), (0, 0, 10), (10, 0, 10), (10, 10, 10), (0, 10, 10)]
+    CUBE_QUADS = [(1, 4, 3, 2), (5, 6, 7, 8), (1, 2, 6, 5), (2, 3, 7, 6), (3, 4, 8, 7), (4, 1, 5, 8)]
+
+    def build_cube_stl(self):
+        triangles = [
+            [self.CUBE_VERTICES[index - 1] for index in triangle]
+            for a, b, c, d in self.CUBE_QUADS for triangle in ((a, b, c), (a, c, d))
+        ]
+        records = np.zeros(len(triangles), dtype=STL_TRIANGLE_DTYPE)
+        records['vertices'] = triangles
+        return b'solid cube'.ljust(80, b' ') + np.uint32(len(triangles)).tobytes() + records.tobytes()
+
+    def test_meshes_are_measured_in_every_format(self):
+        obj = '\n'.join(
+            [f'v {x} {y} {z}' for x, y, z in self.CUBE_VERTICES]
+            + [f'f {a}/1 {b}/1 {c}/1 {d}/1' for a, b, c, d in self.CUBE_QUADS]
+        )
+        three_mf = BytesIO()
+        with zipfile.ZipFile(three_mf, 'w') as package:
+            package.writestr('3D/3dmodel.model', (
+                '<model xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02" unit="centimeter">'
+                '<resources><object id="1" type="model"><mesh><vertices>'
+                + ''.join(f'<vertex x="{x / 10}" y="{y / 10}" z="{z / 10}"/>' for x, y, z in self.CUBE_VERTICES)
+                + '</vertices><triangles>'
+                + ''.join(
+                    f'<triangle v1="{a - 1}" v2="{b - 1}" v3="{c - 1}"/><triangle v1="{a - 1}" v2="{c - 1}" v3="{d - 1}"/>'
+                    for a, b, c, d in self.CUBE_QUADS
+                )
+                + '</triangles></mesh></object></resources><build><item objectid="1"/></build></model>'
+            ))
+
+        items = [
+            self.create_item('cube.stl', self.build_cube_stl()),
+            self.create_item('cube.obj', obj.encode()),
+            self.create_item('cube.3mf', three_mf.getvalue()),
+        ]
+        self.assertEqual(process_previews(), (3, 0))
+
+        for item in items:
+            analysis = DesignBlob.objects.get(pk=item.design_blob_id).mesh_analysis
+            self.assertEqual(analysis['triangle_count'], 12)
+            self.assertAlmostEqual(analysis['volume_mm3'], 1000, places=2)
+            self.assertAlmostEqual(analysis['surface_area_mm2'], 600, places=2)
+            self.assertEqual([analysis['bbox_width_mm'], analysis['bbox_depth_mm'], analysis['bbox_height_mm']], [10, 10, 10])
+        self.assertFalse(DesignBlob.objects.get(pk=items[2].design_blob_id).mesh_analysis['units_assumed'])
+
+    def test_mesh_analysis_prefills_printing_fields(self):
+        printing = TypeService.objects.create(name='3D Printing', type='3d_printing')
+        order = Order.create_with_items(
+            [{'service': printing, 'description': 'Cube', 'design_file': SimpleUploadedFile('cube.stl', self.build_cube_stl())}],
+            customer_name='Ana', customer_email='ana@example.com'
+        )
+        item = order.items.get()
+        self.assertIsNone(item.printing_material_used)
+
+        process_previews()
+
+        item.refresh_from_db()
+        grams, minutes = estimate_printing(DesignBlob.objects.get(pk=item.design_blob_id).mesh_analysis, 'fdm')
+        self.assertEqual(item.printing_material_used, as_price(grams))
+        self.assertEqual(item.printing_time, max(30, math.ceil(minutes)))
+        self.assertEqual(item.height_dimensions, Decimal('0.39'))
+        self.assertEqual(item.estimated_unit_price, as_price(item.calculate_service_price()))
+
+    def test_pdf_page_count_and_first_page_render(self):
+        import pymupdf
+        document = pymupdf.open()
+        document.new_page(width=595, height=842)
+        document.new_page()
+        item = self.create_item('quote.pdf', document.tobytes())
+
+        process_previews()
+
+        blob = DesignBlob.objects.get(pk=item.design_blob_id)
+        self.assertEqual(blob.preview_metadata, {'page_count': 2, 'page_width': 595.0, 'page_height': 842.0})
+        self.assertTrue(blob.preview)
+
+    def test_broken_files_are_marked_failed(self):
+        item = self.create_item('broken.png', b'not a png')
+
+        self.assertEqual(process_previews(), (0, 1))
+
+        blob = DesignBlob.objects.get(pk=item.design_blob_id)
+        self.assertEqual(blob.preview_status, 'failed')
+        self.assertTrue(blob.preview_error)
+
+    def test_each_blob_is_claimed_by_one_worker(self):
+        item = self.create_item('photo.png', self.build_png((10, 10)))
+
+        self.assertEqual(len(claim_pending_blobs()), 1)
+        self.assertEqual(claim_pending_blobs(), [])
+        self.assertEqual(process_previews(), (0, 0))
+
+        #* The claim of a worker that died expires
+        DesignBlob.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(process_previews(), (1, 0))
+        self.assertEqual(DesignBlob.objects.get(pk=item.design_blob_id).preview_status, 'ready')
+
+    def test_crashed_pool_requeues_its_batch(self):
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+
+        class CrashedPool:
+            def submit(self, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool('A process in the process pool was terminated abruptly'))
+                return future
+
+        item = self.create_item('plate.dxf', self.DXF.encode())
+
+        with self.assertRaises(BrokenProcessPool):
+            process_previews(executor=CrashedPool())
+        blob = DesignBlob.objects.get(pk=item.design_blob_id)
+        self.assertEqual(blob.preview_status, 'pending')
+
+        #* A second crash with the same file gives up on it instead of crashing every new pool
+        with self.assertRaises(BrokenProcessPool):
+            process_previews(executor=CrashedPool())
+        self.assertEqual(DesignBlob.objects.get(pk=item.design_blob_id).preview_status, 'failed')
+
+    def test_worker_command_renders_in_a_process_pool(self):
+        item = self.create_item('plate.dxf', self.DXF.encode())
+
+        out = StringIO()
+        call_command('generate_design_previews', '--workers', '1', stdout=out)
+
+        self.assertIn('Rendered 1 previews, 0 failed', out.getvalue())
+        self.assertEqual(DesignBlob.objects.get(pk=item.design_blob_id).preview_status, 'ready')
+
+
+
+#? <|--------------Quote Preview Tests--------------|>
+class QuotePreviewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.plasma = TypeService.objects.create(name='Plasma Cutting', type='plasma')
+        self.welding = TypeService.objects.create(name='Welding', type='welding', base_price=Decimal('125.50'))
+
+    def quote(self, items):
+        return self.client.post('/api/quote/preview/', {'items': items}, format='json')
+
+    def test_preview_matches_saved_item_prices_without_queries(self):
+        inputs = {'length_dimensions': '12.5', 'width_dimensions': 8.25, 'plasma_cutting_time': 45,
+                  'plasma_material_cost': '1899.99'}
+        self.quote([{'service': self.plasma.id}])
+
+        with self.assertNumQueries(0):
+            response = self.quote([
+                {'service': self.plasma.id, 'quantity': 2, **inputs},
+                {'service': self.welding.id},
+            ])
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        order = Order.create_with_items(
+            [{'service': self.plasma, 'quantity': 2, **inputs}, {'service': self.welding}],
+            customer_name='Ana', customer_email='ana@example.com'
+        )
+        plasma_item, welding_item = order.items.order_by('id')
+        self.assertEqual(data['items'][0]['estimated_unit_price'], str(plasma_item.estimated_unit_price))
+        self.assertEqual(data['items'][1]['estimated_unit_price'], '125.50')
+        self.assertEqual(Decimal(data['estimated_total']), plasma_item.estimated_unit_price * 2 + Decimal('125.50'))
+
+    def test_invalid_items_are_rejected(self):
+        self.assertEqual(self.quote([]).status_code, 400)
+        self.assertEqual(self.quote([{'service': 9999}]).status_code, 400)
+
+        response = self.quote([{'service': self.plasma.id}, {'service': self.plasma.id, 'plasma_cutting_time': -5}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Item 2', response.json()['error'])
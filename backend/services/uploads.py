@@ -0,0 +1,294 @@
+#? Chunked design-file uploads for the services app
+import base64
+import binascii
+import hashlib
+import os
+import uuid
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+from .models import DesignUpload, DesignBlob, DESIGN_FILE_MAX_SIZE, validate_design_file_name
+from .storage import lock_file
+
+
+#* Bytes copied per read, the only part of an upload held in memory
+COPY_BUFFER_SIZE = 64 * 1024
+
+#* Status tus uses when a checksum does not match the received bytes
+CHECKSUM_MISMATCH_STATUS = 460
+
+SUPPORTED_CHECKSUM_ALGORITHMS = ['sha256']
+
+
+class UploadError(Exception):
+    """Invalid upload request; status is the HTTP status the view should answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class PartFile(File):
+    """
+    Finished part file; exposing temporary_file_path lets FileSystemStorage move it
+    into place instead of copying it, and sha256 spares the storage a second hash
+    """
+
+    def __init__(self, file, name=None, sha256=None):
+        super().__init__(file, name=name)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.name
+
+
+def parse_checksum(value):
+    """
+    Parse a tus style checksum ("sha256 <base64 digest>") and return the digest bytes
+    Returns None when no checksum was sent
+    """
+    if not value:
+        return None
+    algorithm, _, encoded = str(value).strip().partition(' ')
+    if algorithm.lower() not in SUPPORTED_CHECKSUM_ALGORITHMS:
+        raise UploadError(f'Unsupported checksum algorithm. Allowed: {", ".join(SUPPORTED_CHECKSUM_ALGORITHMS)}')
+    try:
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        digest = b''
+    if len(digest) != hashlib.sha256().digest_size:
+        raise UploadError('Checksum must be "sha256 <base64 digest>"')
+    return digest
+
+
+def hash_file(path):
+    """SHA-256 of a file on disk, read in COPY_BUFFER_SIZE blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest
+
+
+#? <|--------------Upload Lifecycle--------------|>
+
+def create_upload(filename, size, checksum=None):
+    """
+    Validate the file name/size announced by the client and start an upload
+    checksum is the optional whole-file checksum, verified when the upload completes
+    """
+    filename = os.path.basename(str(filename or '').strip())
+    if not filename:
+        raise UploadError('filename is required')
+    try:
+        validate_design_file_name(filename)
+    except ValidationError as e:
+        raise UploadError(' '.join(e.messages))
+
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be the file size in bytes')
+    if size <= 0 or size > DESIGN_FILE_MAX_SIZE:
+        raise UploadError('File size must be between 1 byte and 25MB')
+
+    digest = parse_checksum(checksum)
+
+    os.makedirs(settings.DESIGN_UPLOAD_TEMP_DIR, exist_ok=True)
+    return DesignUpload.objects.create(
+        filename=filename,
+        size=size,
+        sha256=digest.hex() if digest else '',
+    )
+
+
+def append_chunk(upload, stream, offset, checksum=None):
+    """
+    Stream a request body into the part file at `offset`, which must match the bytes
+    already received, so a retry only sends what is missing
+    Concurrent requests for one upload are serialized by a lock on the part file
+    Only COPY_BUFFER_SIZE bytes are in memory at a time; returns the new offset
+    """
+    if upload.status != 'uploading':
+        raise UploadError('Upload is already complete', status=409)
+    if offset != upload.offset:
+        raise UploadError(f'Upload-Offset {offset} does not match the current offset {upload.offset}', status=409)
+
+    expected_digest = parse_checksum(checksum)
+    digest = hashlib.sha256()
+    remaining = upload.size - offset
+    part_path = upload.get_part_path()
+
+    #* Opened without truncating: the lock must be held before anything is written
+    with os.fdopen(os.open(part_path, os.O_RDWR | os.O_CREAT, 0o600), 'r+b') as part:
+        if not lock_file(part, blocking=False):
+            raise UploadError('Another request is writing this upload, retry from the current offset', status=409)
+
+        #* Requests that passed the offset check together are decided here, under the lock
+        current_offset = DesignUpload.objects.filter(pk=upload.pk).values_list('offset', flat=True).first()
+        if current_offset != offset:
+            raise UploadError(f'Upload-Offset {offset} does not match the current offset {current_offset}', status=409)
+
+        #* Drop bytes past the confirmed offset (left by an interrupted request)
+        part.seek(offset)
+        part.truncate()
+
+        received = 0
+        while True:
+            block = stream.read(COPY_BUFFER_SIZE)
+            if not block:
+                break
+            received += len(block)
+            if received > remaining:
+                part.truncate(offset)
+                raise UploadError('Chunk goes past the declared file size', status=413)
+            digest.update(block)
+            part.write(block)
+
+        if expected_digest is not None and digest.digest() != expected_digest:
+            part.truncate(offset)
+            raise UploadError('Chunk checksum mismatch, resend it from the same offset', status=CHECKSUM_MISMATCH_STATUS)
+
+        #* Still under the lock, so the next request reads the new offset
+        updated = DesignUpload.objects.filter(pk=upload.pk, offset=offset).update(
+            offset=offset + received, updated_at=timezone.now()
+        )
+        if not updated:
+            part.truncate(offset)
+            raise UploadError('Upload was modified by another request, retry from the current offset', status=409)
+
+    upload.offset = offset + received
+    return upload.offset
+
+
+def complete_upload(upload):
+    """
+    Move the fully received part file into storage and mark the upload complete
+    Concurrent calls (client retries) are serialized by the part file lock; the ones that
+    get it after the upload was completed just return the completed upload
+    """
+    if upload.status == 'complete':
+        return upload
+    if upload.offset != upload.size:
+        raise UploadError(f'Upload incomplete: received {upload.offset} of {upload.size} bytes', status=409)
+
+    part_path = upload.get_part_path()
+    try:
+        part = open(part_path, 'r+b')
+    except FileNotFoundError:
+        #* Already moved into storage by another request, which may still be finishing
+        upload.refresh_from_db()
+        if upload.status == 'complete':
+            return upload
+        raise UploadError('Upload is being completed by another request, retry', status=409)
+
+    with part:
+        lock_file(part)
+        upload.refresh_from_db()
+        if upload.status == 'complete':
+            return upload
+        if upload.offset != upload.size:
+            raise UploadError(f'Upload incomplete: received {upload.offset} of {upload.size} bytes', status=409)
+
+        sha256 = hash_file(part_path).hexdigest()
+        if upload.sha256 and sha256 != upload.sha256:
+            #* Something got corrupted on the way; the client has to send the file again
+            part.truncate(0)
+            DesignUpload.objects.filter(pk=upload.pk).update(offset=0, updated_at=timezone.now())
+            upload.offset = 0
+            raise UploadError('File checksum mismatch, upload the file again', status=CHECKSUM_MISMATCH_STATUS)
+
+        #* Identical content already in storage is reused, the part file is then just dropped
+        upload.file.save(upload.filename, PartFile(part, name=part_path, sha256=sha256), save=False)
+        DesignBlob.objects.for_file_names([upload.file.name])
+
+        #* Marked complete before the lock is released, so waiting requests return right away
+        upload.status = 'complete'
+        upload.save(update_fields=['file', 'status', 'updated_at'])
+
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    return upload
+
+
+def claim_uploads(upload_ids):
+    """
+    Mark completed uploads as used by an order item, each upload can be used once
+    Call inside the transaction that creates the items; returns the uploads in the given order
+    """
+    if not upload_ids:
+        return []
+    try:
+        upload_ids = [uuid.UUID(str(upload_id)) for upload_id in upload_ids]
+    except ValueError:
+        raise UploadError('Invalid design upload id')
+
+    uploads = DesignUpload.objects.in_bulk(upload_ids)
+    for upload_id in upload_ids:
+        upload = uploads.get(upload_id)
+        if upload is None or upload.status != 'complete':
+            raise UploadError(f'Design upload {upload_id} not found or not complete')
+
+    if len(set(upload_ids)) != len(upload_ids):
+        raise UploadError('Each design upload can only be used by one item')
+
+    claimed = DesignUpload.objects.filter(
+        pk__in=upload_ids, status='complete', attached_at__isnull=True
+    ).update(attached_at=timezone.now())
+    if claimed != len(upload_ids):
+        raise UploadError('A design upload is already used by another order', status=409)
+    return [uploads[upload_id] for upload_id in upload_ids]
+
+
+#? <|--------------Cleanup--------------|>
+
+def delete_upload(upload):
+    """
+    Delete an unclaimed upload with its part file; the stored file may be shared with other
+    uploads and items, so it is left to the blob garbage collector
+    Skipped (returns False) when a chunk arrived or an order claimed it since it was loaded
+    """
+    deleted, _ = DesignUpload.objects.filter(
+        pk=upload.pk, updated_at=upload.updated_at, attached_at__isnull=True
+    ).delete()
+    if not deleted:
+        return False
+
+    part_path = upload.get_part_path()
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    return True
+
+
+def get_stale_uploads(abandoned_before, unattached_before):
+    """
+    Uploads that were never finished (no chunk since abandoned_before) and finished
+    uploads no order claimed since unattached_before
+    """
+    return DesignUpload.objects.filter(
+        Q(status='uploading', updated_at__lt=abandoned_before)
+        | Q(status='complete', attached_at__isnull=True, updated_at__lt=unattached_before)
+    )
+
+
+def get_orphan_part_files(older_than):
+    """Part files in DESIGN_UPLOAD_TEMP_DIR without an upload row, last written before older_than"""
+    temp_dir = settings.DESIGN_UPLOAD_TEMP_DIR
+    if not os.path.isdir(temp_dir):
+        return []
+
+    part_files = {}
+    for entry in os.scandir(temp_dir):
+        name, ext = os.path.splitext(entry.name)
+        if ext != '.part' or not entry.is_file() or entry.stat().st_mtime >= older_than.timestamp():
+            continue
+        try:
+            part_files[uuid.UUID(name)] = entry.path
+        except ValueError:
+            continue
+
+    existing = set(DesignUpload.objects.filter(pk__in=part_files).values_list('pk', flat=True))
+    return [path for upload_id, path in part_files.items() if upload_id not in existing]
+
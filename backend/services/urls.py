@@ -6,12 +6,17 @@ from django.conf.urls.static import static
 from .views import (
     #* Public Views
     HomepageView,
+    BootstrapView,
     TypeServiceListView,
     TypeServiceDetailView,
     CompanyConfigurationView,
     ContactFormView,
     OrderTrackingView,
     PublicOrderCreateView,
+    DesignUploadCreateView,
+    DesignUploadDetailView,
+    DesignUploadCompleteView,
+    QuotePreviewView,
     CustomerOrdersView,
     ConfirmOrderView, 
     CancelOrderView,
@@ -23,6 +28,8 @@ from .views import (
     
     #* Admin Views (Staff/Admin Only)
     AdminOrderListView,
+    AdminOrderExportView,
+    AdminOrderImportView,
     AdminOrderDetailView,
 )
 
@@ -40,6 +47,9 @@ urlpatterns = [
     #* Homepage endpoint
     path('api/homepage/', HomepageView.as_view(), name='homepage-data'),
     
+    #* Startup endpoint (homepage + services + company in one request)
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap-data'),
+    
     #* Services endpoints
     path('api/services/', TypeServiceListView.as_view(), name='service-list'),
     path('api/services/<int:pk>/', TypeServiceDetailView.as_view(), name='service-detail'),
@@ -55,6 +65,14 @@ urlpatterns = [
     
     path('api/orders/create/', PublicOrderCreateView.as_view(), name='public-order-create'),
     
+    #* Instant price preview for cart items (stateless)
+    path('api/quote/preview/', QuotePreviewView.as_view(), name='quote-preview'),
+    
+    #* Chunked design-file uploads (start, send chunks / progress, finish)
+    path('api/uploads/', DesignUploadCreateView.as_view(), name='design-upload-create'),
+    path('api/uploads/<uuid:pk>/', DesignUploadDetailView.as_view(), name='design-upload-detail'),
+    path('api/uploads/<uuid:pk>/complete/', DesignUploadCompleteView.as_view(), name='design-upload-complete'),
+    
     
     #? <|--------------Protected API Endpoints (Authentication Required)--------------|>
     
@@ -70,6 +88,8 @@ path('api/orders/create-auth/', OrderCreateView.as_view(), name='order-create-au
     
     #* Admin order management
     path('api/admin/orders/', AdminOrderListView.as_view(), name='admin-orders-list'),
+    path('api/admin/orders/export/', AdminOrderExportView.as_view(), name='admin-orders-export'),
+    path('api/admin/orders/import/', AdminOrderImportView.as_view(), name='admin-orders-import'),
     path('api/admin/orders/<int:pk>/', AdminOrderDetailView.as_view(), name='admin-order-detail'),
 ]
 
@@ -0,0 +1,617 @@
+#? Streaming readers for vector design files (DXF / SVG) used by previews and analysis
+import io
+import math
+import re
+from xml.etree import ElementTree
+
+
+#* Segments used to approximate a full circle; arcs get a proportional share
+CIRCLE_SEGMENTS = 72
+
+#* Curve segments used for each Bezier segment of an SVG path
+BEZIER_SEGMENTS = 16
+
+#* Drawings without units are assumed to be in millimetres
+DEFAULT_UNIT_MM = 1.0
+
+#* Endpoints closer than this (drawing units) continue the same cut, without a new pierce
+CHAIN_TOLERANCE = 1e-4
+
+#* $INSUNITS codes -> millimetres per drawing unit
+DXF_UNITS_TO_MM = {
+    1: 25.4,      #* inches
+    2: 304.8,     #* feet
+    4: 1.0,       #* millimetres
+    5: 10.0,      #* centimetres
+    6: 1000.0,    #* metres
+}
+
+
+#? <|--------------DXF Reader--------------|>
+
+def iter_dxf_pairs(file):
+    """
+    Yield (group code, value) pairs from an ASCII DXF, one line pair at a time
+    Accepts a binary or text file object; never loads the whole drawing
+    """
+    if isinstance(file.read(0), bytes):
+        file = io.TextIOWrapper(file, encoding='utf-8', errors='replace')
+
+    while True:
+        code = file.readline()
+        value = file.readline()
+        if not code or not value:
+            return
+        code = code.strip()
+        if code.startswith('AutoCAD Binary DXF'):
+            raise ValueError('Binary DXF files are not supported')
+        try:
+            yield int(code), value.strip()
+        except ValueError:
+            raise ValueError(f'Invalid DXF group code "{code[:20]}"')
+
+
+def iter_dxf_entities(file, header=None):
+    """
+    Yield (entity type, [(code, value), ...]) for every entity of the ENTITIES section
+    Header variables ($INSUNITS, $EXTMIN...) are stored in `header` when a dict is given
+    """
+    section = None
+    variable = None
+    entity_type = None
+    entity = []
+
+    for code, value in iter_dxf_pairs(file):
+        if code == 0:
+            if entity_type is not None:
+                yield entity_type, entity
+                entity_type, entity = None, []
+            if value == 'SECTION':
+                section = 'pending'
+            elif value == 'ENDSEC':
+                section = None
+            elif value == 'EOF':
+                return
+            elif section == 'ENTITIES':
+                entity_type = value
+            continue
+
+        if section == 'pending' and code == 2:
+            section = value
+        elif section == 'HEADER' and header is not None:
+            if code == 9:
+                variable = value
+            elif variable is not None:
+                header.setdefault(variable, {})[code] = value
+        elif entity_type is not None:
+            entity.append((code, value))
+
+    if entity_type is not None:
+        yield entity_type, entity
+
+
+def get_dxf_scale(header):
+    """Millimetres per drawing unit from the header, None when the drawing has no units"""
+    try:
+        return DXF_UNITS_TO_MM.get(int(header.get('$INSUNITS', {}).get(70)))
+    except (TypeError, ValueError):
+        return None
+
+
+#? <|--------------DXF Geometry--------------|>
+
+def get_values(entity, code, cast=float):
+    return [cast(value) for entity_code, value in entity if entity_code == code]
+
+
+def get_value(entity, code, default=0.0):
+    values = get_values(entity, code)
+    return values[0] if values else default
+
+
+def arc_points(cx, cy, radius, start_angle, end_angle):
+    """Points along a counter-clockwise arc (angles in degrees)"""
+    sweep = (end_angle - start_angle) % 360 or 360
+    segments = max(2, math.ceil(CIRCLE_SEGMENTS * sweep / 360))
+    return [
+        (cx + radius * math.cos(math.radians(start_angle + sweep * step / segments)),
+         cy + radius * math.sin(math.radians(start_angle + sweep * step / segments)))
+        for step in range(segments + 1)
+    ]
+
+
+def bulge_points(start, end, bulge):
+    """Points of a polyline segment with a bulge (tan of a quarter of the arc angle)"""
+    if not bulge:
+        return [start, end]
+    chord = math.dist(start, end)
+    if chord == 0:
+        return [start, end]
+    angle = 4 * math.atan(bulge)
+    radius = chord / (2 * math.sin(angle / 2))
+    #* Centre sits on the chord's perpendicular bisector
+    mx, my = (start[0] + end[0]) / 2, (start[1] + end[1]) / 2
+    offset = radius * math.cos(angle / 2)
+    nx, ny = -(end[1] - start[1]) / chord, (end[0] - start[0]) / chord
+    cx, cy = mx + nx * offset, my + ny * offset
+    start_angle = math.atan2(start[1] - cy, start[0] - cx)
+    segments = max(2, math.ceil(CIRCLE_SEGMENTS * abs(angle) / (2 * math.pi)))
+    radius = abs(radius)
+    return [
+        (cx + radius * math.cos(start_angle + angle * step / segments),
+         cy + radius * math.sin(start_angle + angle * step / segments))
+        for step in range(segments + 1)
+    ]
+
+
+def polyline_points(vertices, bulges, closed):
+    if closed and vertices:
+        vertices = vertices + [vertices[0]]
+    points = vertices[:1]
+    for index in range(len(vertices) - 1):
+        bulge = bulges[index] if index < len(bulges) else 0.0
+        points.extend(bulge_points(vertices[index], vertices[index + 1], bulge)[1:])
+    return points
+
+
+def get_lwpolyline_vertices(entity):
+    """(vertices, bulges) in file order; a bulge (42) belongs to the vertex before it"""
+    vertices, bulges = [], []
+    x = None
+    for code, value in entity:
+        if code == 10:
+            x = float(value)
+        elif code == 20 and x is not None:
+            vertices.append((x, float(value)))
+            bulges.append(0.0)
+            x = None
+        elif code == 42 and bulges:
+            bulges[-1] = float(value)
+    return vertices, bulges
+
+
+def iter_dxf_paths(file, header=None):
+    """
+    Yield (points, closed) for every drawable entity, arcs approximated by short segments
+    Supports LINE, LWPOLYLINE, POLYLINE/VERTEX, CIRCLE, ARC, ELLIPSE and SPLINE
+    (splines follow their fit points, or their control points when there are none)
+    """
+    polyline = None
+
+    for entity_type, entity in iter_dxf_entities(file, header=header):
+        if polyline is not None:
+            #* Old style POLYLINE: VERTEX entities until SEQEND
+            if entity_type == 'VERTEX':
+                polyline['vertices'].append((get_value(entity, 10), get_value(entity, 20)))
+                polyline['bulges'].append(get_value(entity, 42))
+                continue
+            closed = polyline['closed']
+            yield polyline_points(polyline['vertices'], polyline['bulges'], closed), closed
+            polyline = None
+            if entity_type == 'SEQEND':
+                continue
+
+        if entity_type == 'LINE':
+            yield [(get_value(entity, 10), get_value(entity, 20)),
+                   (get_value(entity, 11), get_value(entity, 21))], False
+
+        elif entity_type == 'LWPOLYLINE':
+            vertices, bulges = get_lwpolyline_vertices(entity)
+            closed = bool(int(get_value(entity, 70)) & 1)
+            if vertices:
+                yield polyline_points(vertices, bulges, closed), closed
+
+        elif entity_type == 'POLYLINE':
+            polyline = {'vertices': [], 'bulges': [], 'closed': bool(int(get_value(entity, 70)) & 1)}
+
+        elif entity_type == 'CIRCLE':
+            yield arc_points(get_value(entity, 10), get_value(entity, 20), get_value(entity, 40), 0, 360), True
+
+        elif entity_type == 'ARC':
+            yield arc_points(
+                get_value(entity, 10), get_value(entity, 20), get_value(entity, 40),
+                get_value(entity, 50), get_value(entity, 51)
+            ), False
+
+        elif entity_type == 'ELLIPSE':
+            cx, cy = get_value(entity, 10), get_value(entity, 20)
+            mx, my = get_value(entity, 11), get_value(entity, 21)
+            ratio = get_value(entity, 40, 1.0)
+            start, end = get_value(entity, 41), get_value(entity, 42, 2 * math.pi)
+            sweep = (end - start) % (2 * math.pi) or 2 * math.pi
+            segments = max(2, math.ceil(CIRCLE_SEGMENTS * sweep / (2 * math.pi)))
+            points = []
+            for step in range(segments + 1):
+                t = start + sweep * step / segments
+                points.append((cx + mx * math.cos(t) - my * ratio * math.sin(t),
+                               cy + my * math.cos(t) + mx * ratio * math.sin(t)))
+            yield points, math.isclose(sweep, 2 * math.pi)
+
+        elif entity_type == 'SPLINE':
+            fit_x, fit_y = get_values(entity, 11), get_values(entity, 21)
+            points = list(zip(fit_x, fit_y)) or list(zip(get_values(entity, 10), get_values(entity, 20)))
+            closed = bool(int(get_value(entity, 70)) & 1)
+            if points:
+                yield (points + points[:1] if closed else points), closed
+
+    if polyline is not None:
+        yield polyline_points(polyline['vertices'], polyline['bulges'], polyline['closed']), polyline['closed']
+
+
+#? <|--------------SVG Reader--------------|>
+
+#* CSS units -> millimetres (user units are CSS pixels, 96 per inch)
+SVG_UNITS_TO_MM = {'': 25.4 / 96, 'px': 25.4 / 96, 'mm': 1.0, 'cm': 10.0, 'in': 25.4, 'pt': 25.4 / 72, 'pc': 25.4 / 6}
+
+#* Containers whose content is never drawn directly
+SVG_HIDDEN_TAGS = {'defs', 'clipPath', 'mask', 'pattern', 'marker', 'symbol', 'metadata', 'style', 'title', 'desc'}
+
+SVG_HIDDEN_STYLE_RE = re.compile(r'display\s*:\s*none', re.IGNORECASE)
+
+NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+PATH_TOKEN_RE = re.compile(r'[MmLlHhVvCcSsQqTtAaZz]|' + NUMBER_RE.pattern)
+LENGTH_RE = re.compile(r'^\s*(' + NUMBER_RE.pattern + r')\s*([a-z]*)\s*$')
+TRANSFORM_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def multiply(first, second):
+    """Affine (a, b, c, d, e, f) product: apply `second`, then `first`"""
+    a1, b1, c1, d1, e1, f1 = first
+    a2, b2, c2, d2, e2, f2 = second
+    return (
+        a1 * a2 + c1 * b2, b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2, b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1, b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def parse_transform(value):
+    matrix = IDENTITY
+    for name, arguments in TRANSFORM_RE.findall(value or ''):
+        values = [float(number) for number in NUMBER_RE.findall(arguments)]
+        if name == 'matrix' and len(values) == 6:
+            step = tuple(values)
+        elif name == 'translate' and values:
+            step = (1, 0, 0, 1, values[0], values[1] if len(values) > 1 else 0)
+        elif name == 'scale' and values:
+            step = (values[0], 0, 0, values[1] if len(values) > 1 else values[0], 0, 0)
+        elif name == 'rotate' and values:
+            angle = math.radians(values[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            step = (cos, sin, -sin, cos, 0, 0)
+            if len(values) == 3:
+                cx, cy = values[1], values[2]
+                step = multiply(multiply((1, 0, 0, 1, cx, cy), step), (1, 0, 0, 1, -cx, -cy))
+        elif name == 'skewX' and values:
+            step = (1, 0, math.tan(math.radians(values[0])), 1, 0, 0)
+        elif name == 'skewY' and values:
+            step = (1, math.tan(math.radians(values[0])), 0, 1, 0, 0)
+        else:
+            continue
+        matrix = multiply(matrix, step)
+    return matrix
+
+
+def apply_matrix(matrix, points):
+    a, b, c, d, e, f = matrix
+    return [(a * x + c * y + e, b * x + d * y + f) for x, y in points]
+
+
+def parse_length(value, reference=None):
+    """Length in millimetres, None for missing values (percentages use `reference`)"""
+    if not value:
+        return None
+    if value.strip().endswith('%'):
+        return reference * float(value.strip()[:-1]) / 100 if reference else None
+    match = LENGTH_RE.match(value)
+    if not match or match.group(2) not in SVG_UNITS_TO_MM:
+        return None
+    return float(match.group(1)) * SVG_UNITS_TO_MM[match.group(2)]
+
+
+def get_root_matrix(element):
+    """
+    User units -> millimetres with y pointing up (like DXF), from width/height and viewBox
+    Without a viewBox user units are CSS pixels
+    """
+    view_box = [float(number) for number in NUMBER_RE.findall(element.get('viewBox') or '')]
+    width = parse_length(element.get('width'))
+    scale = SVG_UNITS_TO_MM['px']
+    offset_x = offset_y = 0.0
+    if len(view_box) == 4 and view_box[2] > 0:
+        offset_x, offset_y = view_box[0], view_box[1]
+        scale = width / view_box[2] if width else scale
+    return (scale, 0.0, 0.0, -scale, -offset_x * scale, offset_y * scale)
+
+
+def bezier_points(points):
+    """Sample a quadratic (3 points) or cubic (4 points) Bezier segment, first point excluded"""
+    samples = []
+    for step in range(1, BEZIER_SEGMENTS + 1):
+        t = step / BEZIER_SEGMENTS
+        current = list(points)
+        while len(current) > 1:
+            current = [
+                ((1 - t) * x0 + t * x1, (1 - t) * y0 + t * y1)
+                for (x0, y0), (x1, y1) in zip(current, current[1:])
+            ]
+        samples.append(current[0])
+    return samples
+
+
+def svg_arc_points(start, rx, ry, rotation, large_arc, sweep, end):
+    """Sample an SVG elliptical arc (endpoint parameterization), first point excluded"""
+    if start == end:
+        return []
+    rx, ry = abs(rx), abs(ry)
+    if not rx or not ry:
+        return [end]
+
+    phi = math.radians(rotation)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx, dy = (start[0] - end[0]) / 2, (start[1] - end[1]) / 2
+    x1 = cos_phi * dx + sin_phi * dy
+    y1 = -sin_phi * dx + cos_phi * dy
+
+    #* Radii too small to reach the end point are scaled up (SVG spec F.6.6)
+    radii_check = x1 ** 2 / rx ** 2 + y1 ** 2 / ry ** 2
+    if radii_check > 1:
+        rx, ry = rx * math.sqrt(radii_check), ry * math.sqrt(radii_check)
+
+    numerator = rx ** 2 * ry ** 2 - rx ** 2 * y1 ** 2 - ry ** 2 * x1 ** 2
+    denominator = rx ** 2 * y1 ** 2 + ry ** 2 * x1 ** 2
+    factor = math.sqrt(max(0.0, numerator / denominator)) if denominator else 0.0
+    if large_arc == sweep:
+        factor = -factor
+    cx1, cy1 = factor * rx * y1 / ry, -factor * ry * x1 / rx
+    cx = cos_phi * cx1 - sin_phi * cy1 + (start[0] + end[0]) / 2
+    cy = sin_phi * cx1 + cos_phi * cy1 + (start[1] + end[1]) / 2
+
+    start_angle = math.atan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    end_angle = math.atan2((-y1 - cy1) / ry, (-x1 - cx1) / rx)
+    delta = end_angle - start_angle
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+
+    segments = max(2, math.ceil(CIRCLE_SEGMENTS * abs(delta) / (2 * math.pi)))
+    points = []
+    for step in range(1, segments + 1):
+        angle = start_angle + delta * step / segments
+        x, y = rx * math.cos(angle), ry * math.sin(angle)
+        points.append((cos_phi * x - sin_phi * y + cx, sin_phi * x + cos_phi * y + cy))
+    return points
+
+
+def parse_path_data(data):
+    """Yield (points, closed) for every subpath of an SVG path `d` attribute"""
+    tokens = PATH_TOKEN_RE.findall(data or '')
+    index = 0
+    command = None
+    current = start = (0.0, 0.0)
+    last_control = None
+    points = []
+
+    def number():
+        nonlocal index
+        value = float(tokens[index])
+        index += 1
+        return value
+
+    def flag():
+        #* Arc flags may be written without separators ("a1 1 0 00 1 1")
+        nonlocal index
+        token = tokens[index]
+        if len(token) > 1 and token[0] in '01':
+            tokens[index] = token[1:]
+            return token[0] == '1'
+        index += 1
+        return token == '1'
+
+    while index < len(tokens):
+        if tokens[index].isalpha():
+            command = tokens[index]
+            index += 1
+        elif command is None:
+            raise ValueError('SVG path data must start with a command')
+
+        relative = command.islower()
+        base = current if relative else (0.0, 0.0)
+        name = command.upper()
+
+        if name == 'Z':
+            if len(points) > 1:
+                yield points + [start], True
+            points = []
+            current = start
+            last_control = None
+            #* Numbers can't follow a closepath without a new command
+            command = None
+            continue
+
+        if name == 'M':
+            if len(points) > 1:
+                yield points, False
+            current = start = (base[0] + number(), base[1] + number())
+            points = [current]
+            #* Extra pairs after a moveto are implicit linetos
+            command = 'l' if relative else 'L'
+            last_control = None
+            continue
+
+        if not points:
+            points = [current]
+            start = current
+
+        if name == 'L':
+            current = (base[0] + number(), base[1] + number())
+            points.append(current)
+        elif name == 'H':
+            current = ((current[0] if relative else 0.0) + number(), current[1])
+            points.append(current)
+        elif name == 'V':
+            current = (current[0], (current[1] if relative else 0.0) + number())
+            points.append(current)
+        elif name in ('C', 'S'):
+            if name == 'C':
+                control1 = (base[0] + number(), base[1] + number())
+            elif last_control and last_control[0] == 'C':
+                control1 = (2 * current[0] - last_control[1][0], 2 * current[1] - last_control[1][1])
+            else:
+                control1 = current
+            control2 = (base[0] + number(), base[1] + number())
+            end = (base[0] + number(), base[1] + number())
+            points.extend(bezier_points([current, control1, control2, end]))
+            last_control = ('C', control2)
+            current = end
+            continue
+        elif name in ('Q', 'T'):
+            if name == 'Q':
+                control = (base[0] + number(), base[1] + number())
+            elif last_control and last_control[0] == 'Q':
+                control = (2 * current[0] - last_control[1][0], 2 * current[1] - last_control[1][1])
+            else:
+                control = current
+            end = (base[0] + number(), base[1] + number())
+            points.extend(bezier_points([current, control, end]))
+            last_control = ('Q', control)
+            current = end
+            continue
+        elif name == 'A':
+            rx, ry, rotation = number(), number(), number()
+            large_arc, sweep = flag(), flag()
+            end = (base[0] + number(), base[1] + number())
+            points.extend(svg_arc_points(current, rx, ry, rotation, large_arc, sweep, end))
+            current = end
+        else:
+            raise ValueError(f'Unsupported SVG path command "{command}"')
+        last_control = None
+
+    if len(points) > 1:
+        yield points, False
+
+
+def get_float(element, name, default=0.0):
+    try:
+        return float(NUMBER_RE.findall(element.get(name) or '')[0])
+    except IndexError:
+        return default
+
+
+def iter_svg_shape_paths(tag, element):
+    """(points, closed) in user units for one basic shape or path element"""
+    if tag == 'path':
+        yield from parse_path_data(element.get('d'))
+    elif tag == 'line':
+        yield [(get_float(element, 'x1'), get_float(element, 'y1')),
+               (get_float(element, 'x2'), get_float(element, 'y2'))], False
+    elif tag in ('polyline', 'polygon'):
+        values = [float(number) for number in NUMBER_RE.findall(element.get('points') or '')]
+        points = list(zip(values[0::2], values[1::2]))
+        if len(points) > 1:
+            closed = tag == 'polygon'
+            yield (points + points[:1] if closed else points), closed
+    elif tag == 'rect':
+        x, y = get_float(element, 'x'), get_float(element, 'y')
+        width, height = get_float(element, 'width'), get_float(element, 'height')
+        if width > 0 and height > 0:
+            yield [(x, y), (x + width, y), (x + width, y + height), (x, y + height), (x, y)], True
+    elif tag in ('circle', 'ellipse'):
+        cx, cy = get_float(element, 'cx'), get_float(element, 'cy')
+        rx = get_float(element, 'r') if tag == 'circle' else get_float(element, 'rx')
+        ry = get_float(element, 'r') if tag == 'circle' else get_float(element, 'ry')
+        if rx > 0 and ry > 0:
+            yield [
+                (cx + rx * math.cos(2 * math.pi * step / CIRCLE_SEGMENTS),
+                 cy + ry * math.sin(2 * math.pi * step / CIRCLE_SEGMENTS))
+                for step in range(CIRCLE_SEGMENTS + 1)
+            ], True
+
+
+def iter_svg_paths(file, header=None):
+    """
+    Yield (points in millimetres, y up, closed) for every drawn shape of an SVG file
+    Elements are parsed as they stream in and cleared once closed, so memory stays flat
+    Nested transforms are applied; <use> references and text are not followed
+    """
+    matrices = []
+    hidden = []
+
+    for event, element in ElementTree.iterparse(file, events=('start', 'end')):
+        tag = element.tag.rsplit('}', 1)[-1]
+
+        if event == 'end':
+            matrices.pop()
+            hidden.pop()
+            element.clear()
+            continue
+
+        if not matrices:
+            root_matrix = get_root_matrix(element)
+            if header is not None:
+                header['unit_mm'] = 1.0
+            matrices.append(multiply(root_matrix, parse_transform(element.get('transform'))))
+            hidden.append(False)
+            continue
+
+        matrix = multiply(matrices[-1], parse_transform(element.get('transform')))
+        matrices.append(matrix)
+        #* Content of definitions and of display:none elements is never cut
+        hidden.append(
+            hidden[-1] or tag in SVG_HIDDEN_TAGS or element.get('display') == 'none'
+            or bool(SVG_HIDDEN_STYLE_RE.search(element.get('style') or ''))
+        )
+        if hidden[-1]:
+            continue
+
+        for points, closed in iter_svg_shape_paths(tag, element):
+            yield apply_matrix(matrix, points), closed
+
+
+#? <|--------------Analysis--------------|>
+
+def analyze_paths(paths, unit_mm=None):
+    """
+    Cut metrics from a stream of (points, closed) paths, without keeping the paths
+    A pierce is counted whenever a path does not start where the previous one ended
+    `unit_mm` may be a callable, read after the paths are consumed (DXF units come from the header)
+    """
+    length = 0.0
+    path_count = pierce_count = 0
+    previous_end = None
+    min_x = min_y = float('inf')
+    max_x = max_y = float('-inf')
+
+    for points, _ in paths:
+        if not points:
+            continue
+        path_count += 1
+        if previous_end is None or math.dist(points[0], previous_end) > CHAIN_TOLERANCE:
+            pierce_count += 1
+        previous_end = points[-1]
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            length += math.hypot(x1 - x0, y1 - y0)
+        for x, y in points:
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+
+    if not path_count:
+        raise ValueError('No drawable geometry found')
+
+    unit_mm = unit_mm() if callable(unit_mm) else unit_mm
+    scale = unit_mm or DEFAULT_UNIT_MM
+    width_mm, height_mm = (max_x - min_x) * scale, (max_y - min_y) * scale
+    return {
+        'path_count': path_count,
+        'pierce_count': pierce_count,
+        'path_length_mm': round(length * scale, 2),
+        'bbox_width_mm': round(width_mm, 2),
+        'bbox_height_mm': round(height_mm, 2),
+        'bbox_area_in2': round(width_mm * height_mm / 25.4 ** 2, 2),
+        'units_assumed': unit_mm is None,
+        'bounding_box': [round(value, 4) for value in (min_x, min_y, max_x, max_y)],
+    }
+
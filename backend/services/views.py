@@ -3,12 +3,24 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.utils import timezone
-from .models import TypeService, Order, OrderItem, CompanyConfiguration
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db import transaction
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from .models import TypeService, Order, OrderItem, CompanyConfiguration, as_price
+from .pricing import PRICING_INPUTS, quote_unit_price
+from .pagination import KeysetPagination
+from .outbox import queue_email
+from .catalog_cache import get_cached_payload, get_not_modified_response, add_catalog_validators
+from .db_router import ReplicaReadMixin, stick_to_primary
+from .exports import EXPORTERS
+from .imports import import_orders, ImportReadError, RECORD_READERS
+from .uploads import UploadError, create_upload, append_chunk, complete_upload, claim_uploads
+from .models import DesignUpload
 import json
 import re
 from django.core.files.storage import default_storage
@@ -23,79 +35,26 @@ from .serializers import (
 
 
 #? <|------------------Homepage View------------------|>
-class HomepageView(APIView):
+class HomepageView(ReplicaReadMixin, APIView):
 
     permission_classes = [permissions.AllowAny]
     
     def get(self, request):
         try:
-            print("Starting homepage view...")
+            #* Unchanged catalog - answer 304 without building anything
+            not_modified = get_not_modified_response(request, 'homepage')
+            if not_modified:
+                return not_modified
             
-            #* Get company configuration (opcional)
-            company_config = None
-            try:
-                company_config = CompanyConfiguration.objects.first()
-                print(f"Company config: {company_config is not None}")
-            except Exception as e:
-                print(f"No company config: {e}")
-            
-            #* Get featured services
-            try:
-                featured_services = TypeService.objects.filter(
-                    active=True,
-                    is_featured=True
-                ).order_by('order_display')
-                
-                print(f"Found {featured_services.count()} featured services")
-                for service in featured_services:
-                    print(f"   - {service.name} (featured: {service.is_featured}, active: {service.active})")
-                    
-            except Exception as e:
-                print(f"Error getting featured services: {e}")
-                featured_services = TypeService.objects.none()  
-            
-            #* Calculate basic stats
-            try:
-                total_orders = Order.objects.count()
-                completed_orders = Order.objects.filter(state='completed').count()  
-                print(f"Orders - Total: {total_orders}, Completed: {completed_orders}")
-            except Exception as e:
-                print(f"Error calculating stats: {e}")
-                total_orders = 0
-                completed_orders = 0
-            
-            #* Serialize featured services
-            try:
-                featured_services_data = TypeServiceSerializer(featured_services, many=True).data
-                print(f"Serialized {len(featured_services_data)} services")
-            except Exception as e:
-                print(f"Error serializing: {e}")
-                featured_services_data = []
-            
-            #* Prepare homepage data
-            homepage_data = {
-                'company_name': company_config.company_name if company_config and hasattr(company_config, 'company_name') else 'AGAH Solutions',
-                'hero_title': 'Welcome to',
-                'hero_description': 'Cutting-Edge Solutions, Crafted to Perfection',
-                'featured_services': featured_services_data,
-                'company_stats': {
-                    'total_projects': max(completed_orders, 50),
-                    'happy_clients': max(completed_orders - 2, 45),
-                    'years_experience': 5
-                },
-                'contact_info': {
-                    'phone': '6651272495',
-                    'email': 'Agahsolutions@gmail.com',
-                    'address': 'Tecate, Baja California'
-                }
-            }
+            #* Served from the catalog cache, rebuilt only after catalog changes
+            homepage_data = get_cached_payload('homepage', self.build_homepage_data)
             
             print(f"Returning homepage data with {len(homepage_data['featured_services'])} featured services")
             
-            return Response({
+            return add_catalog_validators(Response({
                 'success': True,
                 'data': homepage_data
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_200_OK), 'homepage')
             
         except Exception as e:
             print(f"CRITICAL ERROR: {str(e)}")
@@ -125,11 +84,77 @@ class HomepageView(APIView):
                 'data': fallback_data,
                 'message': 'Using fallback data'
             }, status=status.HTTP_200_OK)
+    
+    @staticmethod
+    def build_homepage_data():
+        """Build the homepage payload (featured services, stats, company info)"""
+        print("Starting homepage view...")
+        
+        #* Get company configuration (opcional)
+        company_config = None
+        try:
+            company_config = CompanyConfiguration.objects.first()
+            print(f"Company config: {company_config is not None}")
+        except Exception as e:
+            print(f"No company config: {e}")
+        
+        #* Get featured services
+        try:
+            featured_services = TypeService.objects.filter(
+                active=True,
+                is_featured=True
+            ).order_by('order_display')
+            
+            print(f"Found {featured_services.count()} featured services")
+            for service in featured_services:
+                print(f"   - {service.name} (featured: {service.is_featured}, active: {service.active})")
+                
+        except Exception as e:
+            print(f"Error getting featured services: {e}")
+            featured_services = TypeService.objects.none()  
+        
+        #* Calculate basic stats
+        try:
+            total_orders = Order.objects.count()
+            completed_orders = Order.objects.filter(state='completed').count()  
+            print(f"Orders - Total: {total_orders}, Completed: {completed_orders}")
+        except Exception as e:
+            print(f"Error calculating stats: {e}")
+            total_orders = 0
+            completed_orders = 0
+        
+        #* Serialize featured services
+        try:
+            featured_services_data = TypeServiceSerializer(featured_services, many=True).data
+            print(f"Serialized {len(featured_services_data)} services")
+        except Exception as e:
+            print(f"Error serializing: {e}")
+            featured_services_data = []
+        
+        #* Prepare homepage data
+        homepage_data = {
+            'company_name': company_config.company_name if company_config and hasattr(company_config, 'company_name') else 'AGAH Solutions',
+            'hero_title': 'Welcome to',
+            'hero_description': 'Cutting-Edge Solutions, Crafted to Perfection',
+            'featured_services': featured_services_data,
+            'company_stats': {
+                'total_projects': max(completed_orders, 50),
+                'happy_clients': max(completed_orders - 2, 45),
+                'years_experience': 5
+            },
+            'contact_info': {
+                'phone': '6651272495',
+                'email': 'Agahsolutions@gmail.com',
+                'address': 'Tecate, Baja California'
+            }
+        }
+        
+        return homepage_data
 
 
 #? <|--------------Public Views (No Authentication Required)--------------|>
 
-class TypeServiceListView(APIView):
+class TypeServiceListView(ReplicaReadMixin, APIView):
     """
     Public endpoint to list all active services
     MODIFICADO: Ahora retorna datos directos sin paginación y con success
@@ -138,16 +163,21 @@ class TypeServiceListView(APIView):
     
     def get(self, request):
         try:
-            #* Get all active services
-            services = TypeService.objects.filter(active=True).order_by('order_display')
-            # CORREGIDO: Pasar context con request para las URLs de imágenes
-            serializer = TypeServiceSerializer(services, many=True, context={'request': request})
+            #* Unchanged catalog - answer 304 without building anything
+            not_modified = get_not_modified_response(request, 'services', request.get_host())
+            if not_modified:
+                return not_modified
+            
+            #* Get all active services (cached per host because image URLs are absolute)
+            services_data = get_cached_payload(
+                'services', lambda: self.build_services_data(request), request.build_absolute_uri('/')
+            )
             
-            return Response({
+            return add_catalog_validators(Response({
                 'success': True,
-                'data': serializer.data,
-                'count': services.count()
-            }, status=status.HTTP_200_OK)
+                'data': services_data,
+                'count': len(services_data)
+            }, status=status.HTTP_200_OK), 'services', request.get_host())
             
         except Exception as e:
             return Response({
@@ -155,9 +185,15 @@ class TypeServiceListView(APIView):
                 'error': str(e),
                 'data': []
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @staticmethod
+    def build_services_data(request):
+        services = TypeService.objects.filter(active=True).order_by('order_display')
+        # CORREGIDO: Pasar context con request para las URLs de imágenes
+        return TypeServiceSerializer(services, many=True, context={'request': request}).data
 
 
-class TypeServiceDetailView(APIView):
+class TypeServiceDetailView(ReplicaReadMixin, APIView):
     """
     Public endpoint to get details of a specific service
     MODIFICADO: Ahora retorna datos directos con success
@@ -166,13 +202,22 @@ class TypeServiceDetailView(APIView):
     
     def get(self, request, pk):
         try:
-            service = TypeService.objects.get(pk=pk, active=True)
-            serializer = TypeServiceSerializer(service, context={'request': request})
+            #* Unchanged catalog - answer 304 without building anything
+            not_modified = get_not_modified_response(request, 'service', pk, request.get_host())
+            if not_modified:
+                return not_modified
+            
+            #* Missing services are cached too, as {'data': None}
+            payload = get_cached_payload(
+                'service', lambda: self.build_service_payload(request, pk), pk, request.build_absolute_uri('/')
+            )
+            if payload['data'] is None:
+                raise TypeService.DoesNotExist
             
-            return Response({
+            return add_catalog_validators(Response({
                 'success': True,
-                'data': serializer.data
-            }, status=status.HTTP_200_OK)
+                'data': payload['data']
+            }, status=status.HTTP_200_OK), 'service', pk, request.get_host())
             
         except TypeService.DoesNotExist:
             return Response({
@@ -186,9 +231,15 @@ class TypeServiceDetailView(APIView):
                 'error': str(e),
                 'data': None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def build_service_payload(self, request, pk):
+        service = TypeService.objects.filter(pk=pk, active=True).first()
+        if service is None:
+            return {'data': None}
+        return {'data': TypeServiceSerializer(service, context={'request': request}).data}
 
 
-class CompanyConfigurationView(APIView):
+class CompanyConfigurationView(ReplicaReadMixin, APIView):
     """
     Public endpoint to get company information
     MODIFICADO: Ahora retorna datos directos sin paginación y con success
@@ -197,15 +248,19 @@ class CompanyConfigurationView(APIView):
     
     def get(self, request):
         try:
+            #* Unchanged catalog - answer 304 without building anything
+            not_modified = get_not_modified_response(request, 'company')
+            if not_modified:
+                return not_modified
+            
             #* Get the first (and should be only) company configuration
-            company = CompanyConfiguration.objects.first()
+            payload = get_cached_payload('company', self.build_company_payload)
             
-            if company:
-                serializer = CompanyConfigurationSerializer(company)
-                return Response({
+            if payload['data']:
+                return add_catalog_validators(Response({
                     'success': True,
-                    'data': serializer.data
-                }, status=status.HTTP_200_OK)
+                    'data': payload['data']
+                }, status=status.HTTP_200_OK), 'company')
             else:
                 return Response({
                     'success': False,
@@ -219,6 +274,72 @@ class CompanyConfigurationView(APIView):
                 'error': str(e),
                 'data': None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @staticmethod
+    def build_company_payload():
+        company = CompanyConfiguration.objects.first()
+        return {'data': CompanyConfigurationSerializer(company).data if company else None}
+
+
+class BootstrapView(ReplicaReadMixin, APIView):
+    """
+    Public endpoint with everything the frontend needs on first load in one response:
+    homepage data, the active catalog and the company configuration
+    Optional ?fields=homepage,services,company selects sections
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    SECTIONS = ['homepage', 'services', 'company']
+    
+    def get(self, request):
+        #* Validate requested sections (kept in canonical order so cache keys are stable)
+        requested = request.query_params.get('fields')
+        if requested:
+            requested = {field.strip() for field in requested.split(',') if field.strip()}
+            unknown = requested - set(self.SECTIONS)
+            if unknown:
+                return Response({
+                    'success': False,
+                    'error': f'Unknown fields: {", ".join(sorted(unknown))}. Allowed: {", ".join(self.SECTIONS)}',
+                    'data': None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            fields = [field for field in self.SECTIONS if field in requested]
+        else:
+            fields = self.SECTIONS
+        fields_key = ','.join(fields)
+        
+        try:
+            #* Unchanged catalog - answer 304 without building anything
+            not_modified = get_not_modified_response(request, 'bootstrap', fields_key, request.get_host())
+            if not_modified:
+                return not_modified
+            
+            bootstrap_data = get_cached_payload(
+                'bootstrap', lambda: self.build_bootstrap_data(request, fields), fields_key, request.build_absolute_uri('/')
+            )
+            
+            return add_catalog_validators(Response({
+                'success': True,
+                'data': bootstrap_data
+            }, status=status.HTTP_200_OK), 'bootstrap', fields_key, request.get_host())
+            
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': str(e),
+                'data': None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def build_bootstrap_data(self, request, fields):
+        """Assemble the requested sections, reusing the per-endpoint cached payloads"""
+        builders = {
+            'homepage': lambda: get_cached_payload('homepage', HomepageView.build_homepage_data),
+            'services': lambda: get_cached_payload(
+                'services', lambda: TypeServiceListView.build_services_data(request), request.build_absolute_uri('/')
+            ),
+            'company': lambda: get_cached_payload('company', CompanyConfigurationView.build_company_payload)['data'],
+        }
+        return {field: builders[field]() for field in fields}
 
 
 class ContactFormView(APIView):
@@ -309,16 +430,15 @@ class ContactFormView(APIView):
             """
             
             #* Send email
-            send_mail(
+            queue_email(
                 subject=f"Nuevo Contacto: {context['subject']}",
                 message=plain_message,
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[settings.CONTACT_EMAIL],  #* Tu email de empresa
-                html_message=html_message,
-                fail_silently=True,
+                html_message=html_message
             )
             
-            print(f"Company notification sent for contact from {context['email']}")
+            print(f"Company notification queued for contact from {context['email']}")
             return True
             
         except Exception as e:
@@ -326,12 +446,14 @@ class ContactFormView(APIView):
             raise
 
 
-class OrderTrackingView(APIView):
+class OrderTrackingView(ReplicaReadMixin, APIView):
     """
     Public endpoint for order tracking by order number
     Allows tracking without login (for customer convenience)
     """
     permission_classes = [permissions.AllowAny]
+    #* POST only carries the lookup data, the view never writes
+    replica_methods = ('POST',)
     
     def post(self, request):
         order_number = request.data.get('order_number', '').strip()
@@ -345,7 +467,7 @@ class OrderTrackingView(APIView):
         
         try:
             #* Find order by number and email for security
-            order = Order.objects.get(
+            order = Order.objects.with_details().get(
                 order_number=order_number,
                 customer_email=customer_email
             )
@@ -383,19 +505,17 @@ class OrderCreateView(APIView):
         serializer = OrderDetailSerializer(data=order_data)
         
         if serializer.is_valid():
-            order = serializer.save()
-            
-            #* Send confirmation email
-            try:
+            #* The outbox row commits (or rolls back) together with the order
+            with transaction.atomic():
+                order = serializer.save()
                 self.send_order_confirmation_email(order)
-            except Exception as e:
-                print(f"Failed to send confirmation email: {e}")
             
-            return Response({
+            #* Keep this client reading from the primary until the replica has the order
+            return stick_to_primary(Response({
                 'success': True,
                 'data': serializer.data,
                 'message': 'Order created successfully'
-            }, status=status.HTTP_201_CREATED)
+            }, status=status.HTTP_201_CREATED))
         
         return Response({
             'success': False,
@@ -424,12 +544,11 @@ class OrderCreateView(APIView):
         Equipo de AGAH Solutions
         """
         
-        send_mail(
+        queue_email(
             subject=subject,
             message=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
-            fail_silently=False,
         )
 
 
@@ -443,7 +562,7 @@ class UserOrdersListView(APIView):
     def get(self, request):
         try:
             #* Get all orders for the authenticated user
-            orders = Order.objects.filter(customer_email=request.user.email).order_by('-created_at')
+            orders = Order.objects.with_details().filter(customer_email=request.user.email).order_by('-created_at')
             serializer = OrderDetailSerializer(orders, many=True)
             
             return Response({
@@ -470,7 +589,7 @@ class UserOrderDetailView(APIView):
     def get(self, request, pk):
         try:
             #* Get order only if it belongs to the authenticated user
-            order = Order.objects.get(pk=pk, customer_email=request.user.email)
+            order = Order.objects.with_details().get(pk=pk, customer_email=request.user.email)
             serializer = OrderDetailSerializer(order)
             
             return Response({
@@ -496,8 +615,9 @@ class UserOrderDetailView(APIView):
 
 class AdminOrderListView(APIView):
     """
-    Admin endpoint to list all orders
-    MODIFICADO: Ahora retorna datos directos sin paginación y con success
+    Admin endpoint to list orders with keyset (cursor) pagination
+    Query params: cursor, page_size, state, assigned_user, customer_email,
+    created_after, created_before (ISO date or datetime)
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -512,14 +632,26 @@ class AdminOrderListView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            #* Get all orders
-            orders = Order.objects.all().order_by('-created_at')
-            serializer = OrderDetailSerializer(orders, many=True)
+            #* Filter and paginate orders server-side
+            paginator = KeysetPagination()
+            try:
+                orders = self.filter_orders(Order.objects.with_details(), request.query_params)
+                page = paginator.paginate_queryset(orders, request)
+            except ValueError as e:
+                return Response({
+                    'success': False,
+                    'error': str(e),
+                    'data': []
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            serializer = OrderDetailSerializer(page, many=True)
             
             return Response({
                 'success': True,
                 'data': serializer.data,
-                'count': orders.count()
+                'count': len(page),
+                'next_cursor': paginator.next_cursor,
+                'has_more': paginator.has_more
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -528,6 +660,134 @@ class AdminOrderListView(APIView):
                 'error': str(e),
                 'data': []
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def filter_orders(self, orders, params):
+        """Apply the admin list filters, raises ValueError on invalid values"""
+        state = params.get('state')
+        if state:
+            valid_states = dict(Order.ORDER_STATES)
+            if state not in valid_states:
+                raise ValueError(f'Invalid state. Allowed: {", ".join(valid_states)}')
+            orders = orders.filter(state=state)
+        
+        assigned_user = params.get('assigned_user')
+        if assigned_user:
+            if not assigned_user.isdigit():
+                raise ValueError('assigned_user must be a user id')
+            orders = orders.filter(assigned_user_id=int(assigned_user))
+        
+        customer_email = params.get('customer_email', '').strip()
+        if customer_email:
+            orders = orders.for_customer_email(customer_email)
+        
+        created_after = params.get('created_after')
+        if created_after:
+            orders = orders.filter(created_at__gte=self.parse_date_param(created_after, 'created_after'))
+        
+        created_before = params.get('created_before')
+        if created_before:
+            #* A plain date includes the whole day
+            value = self.parse_date_param(created_before, 'created_before', end_of_day=True)
+            orders = orders.filter(created_at__lt=value)
+        
+        return orders
+    
+    def parse_date_param(self, value, name, end_of_day=False):
+        """Parse an ISO date/datetime query param into an aware datetime"""
+        parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            if parsed_date is None:
+                raise ValueError(f'{name} must be an ISO date or datetime')
+            if end_of_day:
+                parsed_date += timedelta(days=1)
+            parsed = datetime.combine(parsed_date, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+class AdminOrderExportView(AdminOrderListView):
+    """
+    Admin endpoint to download orders with their items as CSV (streamed) or XLSX
+    Query params: export_format (csv|xlsx, default csv) plus the AdminOrderListView filters
+    """
+    
+    def get(self, request):
+        #* Check if user is staff or admin
+        if not (request.user.is_staff or 
+                request.user.user_type in ['admin', 'staff']):
+            return Response({
+                'success': False,
+                'error': 'You do not have permission to access this resource'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        exporter = EXPORTERS.get(export_format)
+        if exporter is None:
+            return Response({
+                'success': False,
+                'error': f'Invalid export_format. Allowed: {", ".join(EXPORTERS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            orders = self.filter_orders(Order.objects.all(), request.query_params)
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return exporter(orders)
+
+
+class AdminOrderImportView(APIView):
+    """
+    Admin endpoint to bulk import orders with items from an uploaded CSV or JSON file
+    Form fields: file, file_format (csv|json, defaults to the file extension), dry_run
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def post(self, request):
+        #* Check if user is staff or admin
+        if not (request.user.is_staff or 
+                request.user.user_type in ['admin', 'staff']):
+            return Response({
+                'success': False,
+                'error': 'You do not have permission to access this resource'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        uploaded_file = request.FILES.get('file')
+        if not uploaded_file:
+            return Response({
+                'success': False,
+                'error': 'A CSV or JSON file is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        file_format = (request.data.get('file_format') or uploaded_file.name.rsplit('.', 1)[-1]).lower()
+        if file_format not in RECORD_READERS:
+            return Response({
+                'success': False,
+                'error': f'Invalid file_format. Allowed: {", ".join(RECORD_READERS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() in ['1', 'true', 'yes']
+        
+        try:
+            report = import_orders(uploaded_file, file_format, dry_run=dry_run)
+        except ImportReadError as e:
+            #* Earlier chunks may be committed already, the partial report tells the client
+            return Response({
+                'success': False,
+                'error': f'Could not read the file: {e}',
+                'data': e.report
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'success': report['error_count'] == 0,
+            'data': report
+        }, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
 
 
 class AdminOrderDetailView(APIView):
@@ -548,7 +808,7 @@ class AdminOrderDetailView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            order = Order.objects.get(pk=pk)
+            order = Order.objects.with_details().get(pk=pk)
             serializer = OrderDetailSerializer(order)
             
             return Response({
@@ -583,15 +843,13 @@ class AdminOrderDetailView(APIView):
             serializer = OrderDetailSerializer(order, data=request.data, partial=True)
             
             if serializer.is_valid():
-                #* Track who updated the order
-                serializer.save(assigned_user=request.user)
-                
-                #* Send status update email if state changed
-                if 'state' in request.data:
-                    try:
+                with transaction.atomic():
+                    #* Track who updated the order
+                    serializer.save(assigned_user=request.user)
+                    
+                    #* Send status update email if state changed (queued in the same transaction)
+                    if 'state' in request.data:
                         self.send_status_update_email(order)
-                    except Exception as e:
-                        print(f"Failed to send status update email: {e}")
                 
                 return Response({
                     'success': True,
@@ -646,15 +904,220 @@ class AdminOrderDetailView(APIView):
         Equipo de AGAH Solutions
         """
         
-        send_mail(
+        queue_email(
             subject=subject,
             message=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[order.customer_email],
-            fail_silently=False,
         )
         
         
+#? <|--------------Quote Preview (No Auth Required)--------------|>
+
+#* Largest cart priced in one request
+QUOTE_MAX_ITEMS = 100
+
+
+def build_quote_services():
+    """{service id: [type, base price]} of active services, cached with the catalog"""
+    return {
+        str(service_id): [service_type, str(base_price or 0)]
+        for service_id, service_type, base_price in TypeService.objects.filter(active=True).values_list(
+            'id', 'type', 'base_price'
+        )
+    }
+
+
+class QuotePreviewView(APIView):
+    """
+    Instant price preview for cart items: POST {items: [{service, quantity, <pricing fields>}]}
+    Nothing is stored; services come from the catalog cache and prices from the memoized
+    formulas in pricing.py, so a warm request runs without any database query
+    Custom design prices are quoted by staff and not included
+    """
+    permission_classes = [permissions.AllowAny]
+    #* Token/session lookups would hit the database and the preview does not need a user
+    authentication_classes = []
+    
+    def post(self, request):
+        items = request.data.get('items')
+        if not isinstance(items, list) or not items:
+            return Response({
+                'success': False,
+                'error': 'items must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > QUOTE_MAX_ITEMS:
+            return Response({
+                'success': False,
+                'error': f'A quote preview accepts up to {QUOTE_MAX_ITEMS} items'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        services = get_cached_payload('quote_services', build_quote_services)
+        quoted_items = []
+        total = Decimal('0.00')
+        
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('must be an object')
+                service = services.get(str(item.get('service')))
+                if service is None:
+                    raise ValueError('service not found or not active')
+                quantity = int(item.get('quantity') or 1)
+                if quantity < 1:
+                    raise ValueError('quantity must be at least 1')
+                
+                row = {name: item.get(name) for name in PRICING_INPUTS}
+                row['service__type'], row['service__base_price'] = service
+                unit_price = as_price(quote_unit_price(row))
+            except (TypeError, ValueError) as e:
+                return Response({
+                    'success': False,
+                    'error': f'Item {index + 1}: {e}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            item_total = unit_price * quantity
+            total += item_total
+            quoted_items.append({
+                'service': item.get('service'),
+                'quantity': quantity,
+                'estimated_unit_price': str(unit_price),
+                'estimated_total': str(item_total),
+            })
+        
+        return Response({
+            'success': True,
+            'data': {
+                'items': quoted_items,
+                'estimated_total': str(total),
+            }
+        }, status=status.HTTP_200_OK)
+
+
+#? <|--------------Chunked Design Uploads (No Auth Required)--------------|>
+
+def get_upload_data(upload):
+    return {
+        'id': str(upload.pk),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'chunk_size': settings.DESIGN_UPLOAD_CHUNK_SIZE,
+    }
+
+
+def with_upload_headers(response, upload):
+    """tus style progress headers, so HEAD is enough to know where to resume"""
+    response['Upload-Offset'] = str(upload.offset)
+    response['Upload-Length'] = str(upload.size)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def upload_error_response(error, upload=None):
+    response = Response({
+        'success': False,
+        'error': str(error)
+    }, status=error.status)
+    return with_upload_headers(response, upload) if upload is not None else response
+
+
+class DesignUploadCreateView(APIView):
+    """
+    Start a resumable design-file upload: POST {filename, size, checksum}
+    checksum ("sha256 <base64 digest>" of the whole file) is optional and checked on completion
+    The file is then sent with PATCH /api/uploads/<id>/ and finished with .../complete/
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        try:
+            upload = create_upload(
+                request.data.get('filename'),
+                request.data.get('size'),
+                checksum=request.data.get('checksum')
+            )
+        except UploadError as e:
+            return upload_error_response(e)
+        
+        return with_upload_headers(Response({
+            'success': True,
+            'data': get_upload_data(upload)
+        }, status=status.HTTP_201_CREATED), upload)
+
+
+class DesignUploadDetailView(APIView):
+    """
+    GET/HEAD return the upload progress in the Upload-Offset header (HEAD is what clients
+    call before resuming); PATCH appends the raw request body at Upload-Offset, with an
+    optional Upload-Checksum ("sha256 <base64 digest>") of the chunk
+    The body is streamed to disk without being parsed or buffered in memory
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, pk):
+        upload = DesignUpload.objects.filter(pk=pk).first()
+        if upload is None:
+            return Response({
+                'success': False,
+                'error': 'Upload not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return with_upload_headers(Response({
+            'success': True,
+            'data': get_upload_data(upload)
+        }), upload)
+    
+    def patch(self, request, pk):
+        upload = DesignUpload.objects.filter(pk=pk).first()
+        if upload is None:
+            return Response({
+                'success': False,
+                'error': 'Upload not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return upload_error_response(UploadError('Upload-Offset header is required'), upload)
+        
+        try:
+            #* Read the underlying WSGI request, request.data would load the whole body
+            append_chunk(upload, request._request, offset, checksum=request.headers.get('Upload-Checksum'))
+        except UploadError as e:
+            #* The current offset tells the client which bytes to send again
+            return upload_error_response(e, upload)
+        
+        return with_upload_headers(Response({
+            'success': True,
+            'data': get_upload_data(upload)
+        }), upload)
+
+
+class DesignUploadCompleteView(APIView):
+    """Finish a chunked upload once every byte was received"""
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request, pk):
+        upload = DesignUpload.objects.filter(pk=pk).first()
+        if upload is None:
+            return Response({
+                'success': False,
+                'error': 'Upload not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            complete_upload(upload)
+        except UploadError as e:
+            return upload_error_response(e, upload)
+        
+        return Response({
+            'success': True,
+            'data': get_upload_data(upload)
+        })
+
+
 #? <|--------------Public Order Creation (No Auth Required)--------------|>
 class PublicOrderCreateView(APIView):
     """
@@ -713,16 +1176,15 @@ class PublicOrderCreateView(APIView):
                     'error': 'El pedido debe contener al menos un artículo'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Crear la orden
-            order = Order.objects.create(
-                customer_name=customer_name,
-                customer_email=customer_email,
-                customer_phone=customer_phone,
-                additional_notes=additional_notes,
-                state='pending'
-            )
+            # Cargar todos los servicios del pedido en una sola consulta
+            services = TypeService.objects.in_bulk({
+                int(item_data['service']) for item_data in items_data
+                if str(item_data.get('service', '')).isdigit()
+            })
             
-            # Crear items con archivos
+            # Validar items y preparar sus datos antes de crear la orden
+            order_items_data = []
+            design_upload_ids = {}
             for index, item_data in enumerate(items_data):
                 try:
                     # Validar servicio
@@ -730,9 +1192,8 @@ class PublicOrderCreateView(APIView):
                     if not service_id:
                         raise ValueError(f'Item {index + 1}: ID de servicio requerido')
                     
-                    try:
-                        service = TypeService.objects.get(id=service_id)
-                    except TypeService.DoesNotExist:
+                    service = services.get(int(service_id)) if str(service_id).isdigit() else None
+                    if service is None:
                         raise ValueError(f'Item {index + 1}: Servicio no encontrado')
                     
                     # Validar campos requeridos
@@ -744,57 +1205,64 @@ class PublicOrderCreateView(APIView):
                     if not quantity or quantity <= 0:
                         raise ValueError(f'Item {index + 1}: Cantidad debe ser mayor a 0')
                     
-                    # Buscar archivo para este item
+                    # Buscar archivo para este item (subida por partes o archivo en el formulario)
                     design_file = None
                     file_key = f'item_{index}_design_file'
-                    if file_key in request.FILES:
+                    if item_data.get('design_upload_id'):
+                        design_upload_ids[index] = item_data['design_upload_id']
+                    elif file_key in request.FILES:
                         design_file = request.FILES[file_key]
                         print(f"Archivo encontrado para item {index}: {design_file.name}")
                     
-                    # Crear OrderItem
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        service=service,
-                        description=description,
-                        quantity=quantity,
-                        length_dimensions=item_data.get('length_dimensions'),
-                        width_dimensions=item_data.get('width_dimensions'),
-                        height_dimensions=item_data.get('height_dimensions'),
-                        needs_custom_design=item_data.get('needs_custom_design', False),
-                        design_file=design_file  # Django maneja la subida automáticamente
-                    )
-                    
-                    print(f"Item {index + 1} creado exitosamente")
-                    if design_file:
-                        print(f"Archivo guardado en: {order_item.design_file.url}")
+                    order_items_data.append({
+                        'service': service,
+                        'description': description,
+                        'quantity': quantity,
+                        'length_dimensions': item_data.get('length_dimensions'),
+                        'width_dimensions': item_data.get('width_dimensions'),
+                        'height_dimensions': item_data.get('height_dimensions'),
+                        'needs_custom_design': item_data.get('needs_custom_design', False),
+                        'design_file': design_file  # Django maneja la subida automáticamente
+                    })
                 
-                except Exception as item_error:
-                    # Si hay error en un item, eliminar la orden
-                    order.delete()
+                except (ValueError, TypeError) as item_error:
                     return Response({
                         'success': False,
                         'error': str(item_error)
                     }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Actualizar totales de la orden
-            order.estimaded_price = order.get_estimated_total_price()
-            order.final_price = order.get_final_total_price()
-            order.save()
-            
-            # Enviar email de confirmación
+            # Crear la orden con todos sus items y totales en bloque
             try:
-                self.send_order_confirmation_email(order)
-            except Exception as e:
-                print(f"Error enviando email: {e}")
+                with transaction.atomic():
+                    #* Files uploaded in chunks are already in storage, items only reference them
+                    uploads = claim_uploads(list(design_upload_ids.values()))
+                    for index, upload in zip(design_upload_ids, uploads):
+                        order_items_data[index]['design_file'] = upload.file.name
+                    
+                    order = Order.create_with_items(
+                        order_items_data,
+                        customer_name=customer_name,
+                        customer_email=customer_email,
+                        customer_phone=customer_phone,
+                        additional_notes=additional_notes,
+                        state='pending'
+                    )
+                    
+                    # Email de confirmación: la fila del outbox se guarda junto con la orden
+                    self.send_order_confirmation_email(order)
+            except UploadError as e:
+                return upload_error_response(e)
+            print(f"Orden {order.order_number} creada con {len(order_items_data)} items")
             
             # Serializar respuesta
             order_serializer = OrderDetailSerializer(order)
             
-            return Response({
+            #* Keep this client reading from the primary until the replica has the order
+            return stick_to_primary(Response({
                 'success': True,
                 'data': order_serializer.data,
                 'message': 'Pedido creado exitosamente. Revise su email para confirmación.'
-            }, status=status.HTTP_201_CREATED)
+            }, status=status.HTTP_201_CREATED))
             
         except Exception as e:
             print(f"Error general en creación de orden: {e}")
@@ -804,7 +1272,11 @@ class PublicOrderCreateView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def send_order_confirmation_email(self, order):
-        """Send order confirmation email using HTML template"""
+        """
+        Queue the order confirmation email using HTML template
+        Call inside the order's transaction: a template error only skips the email,
+        a failed outbox insert rolls the order back with it
+        """
         try:
             # Prepare context for template
             context = {
@@ -817,26 +1289,23 @@ class PublicOrderCreateView(APIView):
             # Render HTML email - USA EL TEMPLATE QUE YA TIENES
             html_message = render_to_string('emails/order_estimate.html', context)
             plain_message = strip_tags(html_message)
-            
-            # Send email
-            send_mail(
-                subject=f"Order Confirmation - {order.order_number}",
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[order.customer_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-            print(f"Confirmation email sent to {order.customer_email}")
-            return True
-            
         except Exception as e:
             print(f"Error sending email: {e}")
             return False
         
+        queue_email(
+            subject=f"Order Confirmation - {order.order_number}",
+            message=plain_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[order.customer_email],
+            html_message=html_message,
+        )
+        
+        print(f"Confirmation email queued for {order.customer_email}")
+        return True
+        
         
-class CustomerOrdersView(APIView):
+class CustomerOrdersView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.AllowAny]
     
     def get(self, request):
@@ -860,8 +1329,8 @@ class CustomerOrdersView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Get orders for this customer email
-            orders = Order.objects.filter(
-                customer_email__iexact=customer_email
+            orders = Order.objects.with_details().for_customer_email(
+                customer_email
             ).order_by('-created_at')
             
             # Serialize orders with all details
@@ -901,9 +1370,8 @@ class ConfirmOrderView(APIView):
             
             # Find the order
             try:
-                order = Order.objects.get(
-                    order_number=order_number,
-                    customer_email__iexact=customer_email
+                order = Order.objects.for_customer_email(customer_email).get(
+                    order_number=order_number
                 )
             except Order.DoesNotExist:
                 return Response({
@@ -930,10 +1398,10 @@ class ConfirmOrderView(APIView):
             except Exception as email_error:
                 print(f"Warning: Could not send confirmation email: {email_error}")
             
-            return Response({
+            return stick_to_primary(Response({
                 'success': True,
                 'message': 'Order confirmed successfully'
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_200_OK))
             
         except Exception as e:
             print(f"Error confirming order: {e}")
@@ -962,9 +1430,8 @@ class CancelOrderView(APIView):
             
             # Find the order
             try:
-                order = Order.objects.get(
-                    order_number=order_number,
-                    customer_email__iexact=customer_email
+                order = Order.objects.for_customer_email(customer_email).get(
+                    order_number=order_number
                 )
             except Order.DoesNotExist:
                 return Response({
@@ -984,10 +1451,10 @@ class CancelOrderView(APIView):
             order.cancelled_at = timezone.now()
             order.save()
             
-            return Response({
+            return stick_to_primary(Response({
                 'success': True,
                 'message': 'Order cancelled successfully'
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_200_OK))
             
         except Exception as e:
             print(f"Error cancelling order: {e}")
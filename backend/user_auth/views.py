@@ -5,10 +5,10 @@ from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
+from services.outbox import queue_email
 
 
 User = get_user_model()
@@ -188,14 +188,13 @@ class SignupView(APIView):
         Teléfono: +52 665 127 0811
         """
         
-        # Send email
-        send_mail(
+        # Queue email for background delivery
+        queue_email(
             subject=subject,
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
             html_message=html_message,  # This sends the beautiful HTML version
-            fail_silently=True,
         )
 
 
@@ -17,6 +17,7 @@ function Cart() {
     const [userInfo, setUserInfo] = useState(null);
     const [phoneNumber, setPhoneNumber] = useState('');
     const [showConfirmModal, setShowConfirmModal] = useState(false);
+    const [quote, setQuote] = useState(null);
     
     //* Context
     const { 
@@ -44,6 +45,23 @@ function Cart() {
         }
     }, []);
 
+    //* Refresh the price preview whenever the cart changes (falls back to local prices on error)
+    useEffect(() => {
+        if (cartItems.length === 0) {
+            setQuote(null);
+            return;
+        }
+        let cancelled = false;
+        api.cart.previewQuote(cartItems)
+            .then(response => {
+                if (!cancelled) setQuote(response?.success ? response.data : null);
+            })
+            .catch(() => {
+                if (!cancelled) setQuote(null);
+            });
+        return () => { cancelled = true; };
+    }, [cartItems]);
+
     //? Functions
     //* Submit order for review
     const handleSubmitForReview = async () => {
@@ -78,13 +96,16 @@ function Cart() {
         formData.append('customer_phone', phoneNumber.trim());
         formData.append('additional_notes', additionalNotes || '');
 
-        // Preparar items SIN archivos para JSON
+        // Subir los archivos por partes antes del pedido, uno a la vez
+        const designUploadIds = [];
+        for (const item of cartItems) {
+            designUploadIds.push(item.design_file
+                ? await api.uploads.uploadDesignFile(item.design_file)
+                : null);
+        }
+
+        // Preparar items SIN archivos para JSON (los archivos van por su id de subida)
         const itemsForJson = cartItems.map((item, index) => {
-            // Si hay archivo, lo agregaremos por separado al FormData
-            if (item.design_file) {
-                formData.append(`item_${index}_design_file`, item.design_file);
-            }
-            
             return {
                 service: parseInt(item.service),
                 description: item.description?.trim() || "",
@@ -93,7 +114,8 @@ function Cart() {
                 width_dimensions: item.width_dimensions ? parseFloat(item.width_dimensions) : null,
                 height_dimensions: item.height_dimensions ? parseFloat(item.height_dimensions) : null,
                 needs_custom_design: Boolean(item.needs_custom_design),
-                has_design_file: Boolean(item.design_file)
+                has_design_file: Boolean(item.design_file),
+                design_upload_id: designUploadIds[index]
             };
         });
 
@@ -162,8 +184,11 @@ function Cart() {
         setShowConfirmModal(false);
     };
 
-    //* Calculate estimated total
-    const estimatedTotal = calculateTotal();
+    //* Calculate estimated total (backend preview when available)
+    const estimatedTotal = quote ? Number(quote.estimated_total) : calculateTotal();
+    const getItemTotal = (item, index) => (
+        quote?.items[index] ? Number(quote.items[index].estimated_total) : item.estimated_unit_price * item.quantity
+    );
     const itemCount = getCartItemCount();
 
     //? What is gonna be rendered
@@ -205,7 +230,7 @@ function Cart() {
                     {/* <h2>Artículos del Pedido</h2> */}
                     
                     <div className="cart-items-list">
-                        {cartItems.map((item) => (
+                        {cartItems.map((item, index) => (
                             <div key={item.cartItemId} className="cart-item">
                                 <div className="item-details">
                                     <h3>{item.service_name}</h3>
@@ -245,7 +270,7 @@ function Cart() {
                                     </div>
                                     
                                     <div className="item-price">
-                                        ${(item.estimated_unit_price * item.quantity).toFixed(2)}
+                                        ${getItemTotal(item, index).toFixed(2)}
                                     </div>
                                     
                                     <button 
@@ -409,7 +409,7 @@ function Services() {
                                         id="design_file"
                                         name="design_file"
                                         onChange={handleItemInputChange}
-                                        accept=".pdf,.png,.jpg,.jpeg,.svg,.ai,.psd"
+                                        accept=".pdf,.png,.jpg,.jpeg,.svg,.ai,.psd,.dwg,.dxf,.stl,.obj,.3mf"
                                         className="file-input"
                                     />
                                     {itemForm.design_file && (
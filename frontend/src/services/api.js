@@ -17,6 +17,9 @@ class BaseAPI {
         // Setup authentication interceptor automatically
         this.setupAuthInterceptor();
         
+        // Read from the primary database for a while after creating/confirming an order
+        this.setupPrimaryReadInterceptor();
+        
         // Response interceptor for error handling
         this.api.interceptors.response.use(
             response => response,
@@ -51,6 +54,24 @@ class BaseAPI {
         );
     }
 
+    //* Remember the server's read-your-writes window and send it back until it expires
+    setupPrimaryReadInterceptor() {
+        this.api.interceptors.request.use((config) => {
+            const primaryUntil = Number(sessionStorage.getItem('primaryReadUntil'));
+            if (primaryUntil && primaryUntil > Date.now() / 1000) {
+                config.headers['X-Primary-Until'] = String(primaryUntil);
+            }
+            return config;
+        });
+        this.api.interceptors.response.use((response) => {
+            const primaryUntil = response.headers?.['x-primary-until'];
+            if (primaryUntil) {
+                sessionStorage.setItem('primaryReadUntil', primaryUntil);
+            }
+            return response;
+        });
+    }
+
     //* Helper method to handle errors
     handleError(error, defaultMessage = 'An error occurred') {
         if (error.response?.data?.error) {
@@ -66,11 +87,49 @@ class BaseAPI {
     }
 }
 
+//? <|------------------Bootstrap API------------------|>
+class BootstrapAPI extends BaseAPI {
+    //* Get homepage data, active services and company info in a single request
+    async getBootstrapData(fields = null) {
+        const params = fields ? { fields: fields.join(',') } : {};
+        const response = await this.api.get('/api/bootstrap/', { params });
+
+        if (response.data.success) {
+            return response.data.data;
+        }
+        throw new Error(response.data.error || 'Failed to load startup data');
+    }
+}
+
+//* Startup data shared by all APIs - fetched once, each section is used once
+//* (later calls go to their own endpoint, which answers 304 while unchanged)
+const bootstrapAPI = new BootstrapAPI();
+let bootstrapPromise = null;
+
+async function takeBootstrapSection(section) {
+    if (!bootstrapPromise) {
+        bootstrapPromise = bootstrapAPI.getBootstrapData().catch(() => ({}));
+    }
+
+    const data = await bootstrapPromise;
+    if (data && data[section]) {
+        const value = data[section];
+        delete data[section];
+        return value;
+    }
+    return null;
+}
+
 //? <|------------------Home Page APIs------------------|>
 class HomepageAPI extends BaseAPI {
     //* Get homepage data (featured services, stats, company info)
     async getHomepageData() {
         try {
+            const bootstrapped = await takeBootstrapSection('homepage');
+            if (bootstrapped) {
+                return { success: true, data: bootstrapped };
+            }
+
             const response = await this.api.get('/api/homepage/');
 
             // Backend now returns {success, data}
@@ -100,6 +159,11 @@ class ServicesAPI extends BaseAPI {
     //* Function to get all services
     async getServices() {
         try {
+            const bootstrapped = await takeBootstrapSection('services');
+            if (bootstrapped) {
+                return bootstrapped;
+            }
+
             const response = await this.api.get('/api/services/');
             
             // Backend now returns {success, data}
@@ -154,6 +218,11 @@ class AboutUsAPI extends BaseAPI {
     //* Function to get company information
     async getCompanyInfo() {
         try {
+            const bootstrapped = await takeBootstrapSection('company');
+            if (bootstrapped) {
+                return bootstrapped;
+            }
+
             const response = await this.api.get('/api/company/');
             
             // Backend now returns {success, data}
@@ -188,6 +257,11 @@ class ContactAPI extends BaseAPI {
     //* Function to get company information (for contact info)
     async getCompanyInfo() {
         try {
+            const bootstrapped = await takeBootstrapSection('company');
+            if (bootstrapped) {
+                return bootstrapped;
+            }
+
             const response = await this.api.get('/api/company/');
             
             if (response.data.success) {
@@ -311,6 +385,22 @@ class CartAPI extends BaseAPI {
         }
     }
 
+    //* Function to get instant price estimates for the cart from the backend formulas
+    async previewQuote(cartItems) {
+        try {
+            const items = cartItems.map(item => ({
+                service: item.service,
+                quantity: item.quantity,
+                length_dimensions: item.length_dimensions,
+                width_dimensions: item.width_dimensions,
+            }));
+            const response = await this.api.post('/api/quote/preview/', { items });
+            return response.data;
+        } catch (error) {
+            this.handleError(error, 'Failed to preview quote');
+        }
+    }
+
     //* Function to calculate cart total
     async calculateCartTotal(cartItems) {
         try {
@@ -633,20 +723,120 @@ class OrdersAPI extends BaseAPI {
     }
 }
 
+//? <|-------------------Design Upload APIs--------------------|>
+class UploadsAPI extends BaseAPI {
+    constructor() {
+        super();
+        //* Updated from the server when an upload is created
+        this.chunkSize = 1048576;
+    }
+
+    //* tus style checksum header value ("sha256 <base64 digest>") of a Blob
+    async getChecksum(blob) {
+        const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        const bytes = new Uint8Array(digest);
+        let binary = '';
+        bytes.forEach(byte => { binary += String.fromCharCode(byte); });
+        return `sha256 ${btoa(binary)}`;
+    }
+
+    //* Uploads in progress are remembered per file, so a page reload can resume them too
+    getResumeKey(file) {
+        return `designUpload:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    //* Offset the server already has, or null when the upload can't be resumed
+    async getUploadOffset(id) {
+        try {
+            const response = await this.api.head(`/api/uploads/${id}/`);
+            return Number(response.headers['upload-offset']);
+        } catch (error) {
+            return null;
+        }
+    }
+
+    //* Upload a design file in chunks; after a dropped connection only the missing bytes are sent again
+    async uploadDesignFile(file, onProgress = null, maxRetries = 5) {
+        try {
+            const resumeKey = this.getResumeKey(file);
+            let id = localStorage.getItem(resumeKey);
+            let offset = id ? await this.getUploadOffset(id) : null;
+
+            if (offset === null) {
+                const created = await this.api.post('/api/uploads/', {
+                    filename: file.name,
+                    size: file.size,
+                    checksum: await this.getChecksum(file)
+                });
+                id = created.data.data.id;
+                this.chunkSize = created.data.data.chunk_size || this.chunkSize;
+                offset = 0;
+                localStorage.setItem(resumeKey, id);
+            }
+
+            const chunkSize = this.chunkSize;
+            let retries = 0;
+            while (offset < file.size) {
+                const chunk = file.slice(offset, offset + chunkSize);
+                try {
+                    const response = await this.api.patch(`/api/uploads/${id}/`, chunk, {
+                        headers: {
+                            'Content-Type': 'application/offset+octet-stream',
+                            'Upload-Offset': String(offset),
+                            'Upload-Checksum': await this.getChecksum(chunk),
+                        },
+                        timeout: 120000
+                    });
+                    offset = Number(response.headers['upload-offset']);
+                    retries = 0;
+                    if (onProgress) {
+                        onProgress(offset / file.size);
+                    }
+                } catch (error) {
+                    const status = error.response?.status;
+                    if (retries >= maxRetries || (status && ![409, 460].includes(status) && status < 500)) {
+                        throw error;
+                    }
+                    retries += 1;
+                    await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** retries));
+                    //* Ask the server how much arrived and continue from there
+                    const serverOffset = await this.getUploadOffset(id);
+                    if (serverOffset === null) {
+                        throw error;
+                    }
+                    offset = serverOffset;
+                }
+            }
+
+            await this.api.post(`/api/uploads/${id}/complete/`);
+            localStorage.removeItem(resumeKey);
+            return id;
+        } catch (error) {
+            //* A corrupted file starts over next time
+            if (error.response?.status === 460) {
+                localStorage.removeItem(this.getResumeKey(file));
+            }
+            this.handleError(error, 'Failed to upload design file');
+        }
+    }
+}
+
 //? <|--------------------Main API class---------------------|>
 class AGAHAPI {
     constructor() {
+        this.bootstrap = bootstrapAPI;
         this.homepage = new HomepageAPI();
         this.services = new ServicesAPI();
         this.aboutUs = new AboutUsAPI();
         this.cart = new CartAPI();
         this.orders = new OrdersAPI();
         this.contact = new ContactAPI();
+        this.uploads = new UploadsAPI();
     }
 
     //* Method to set base URL if needed
     setBaseURL(url) {
-        const apis = [this.homepage, this.services, this.aboutUs, this.cart, this.orders, this.contact];
+        const apis = [this.bootstrap, this.homepage, this.services, this.aboutUs, this.cart, this.orders, this.contact, this.uploads];
         apis.forEach(api => {
             api.baseURL = url;
             api.api.defaults.baseURL = url;
@@ -655,7 +845,7 @@ class AGAHAPI {
 
     //* Method to add global headers (auth token)
     setAuthHeader(token) {
-        const apis = [this.homepage, this.services, this.aboutUs, this.cart, this.orders, this.contact];
+        const apis = [this.bootstrap, this.homepage, this.services, this.aboutUs, this.cart, this.orders, this.contact, this.uploads];
         apis.forEach(api => {
             api.api.defaults.headers.Authorization = `Bearer ${token}`;
         });
@@ -663,7 +853,7 @@ class AGAHAPI {
 
     //* Method to remove auth headers (logout)
     removeAuthHeader() {
-        const apis = [this.homepage, this.services, this.aboutUs, this.cart, this.orders, this.contact];
+        const apis = [this.bootstrap, this.homepage, this.services, this.aboutUs, this.cart, this.orders, this.contact, this.uploads];
         apis.forEach(api => {
             delete api.api.defaults.headers.Authorization;
         });
@@ -675,4 +865,4 @@ const api = new AGAHAPI();
 
 //* Export main instance and individual classes
 export default api;
-export { HomepageAPI, ServicesAPI, AboutUsAPI, CartAPI, OrdersAPI, ContactAPI, AGAHAPI };
\ No newline at end of file
+export { BootstrapAPI, HomepageAPI, ServicesAPI, AboutUsAPI, CartAPI, OrdersAPI, ContactAPI, UploadsAPI, AGAHAPI };
\ No newline at end of file